@@ -0,0 +1,87 @@
+import ast, os, sys
+from time   import monotonic
+from typing import Any, Callable, Dict, List, Tuple
+
+from scpl.eval   import compile_program, compile_python, Prepared
+from scpl.lexer  import itokenise, TokenTransparent, TokenWord
+from scpl.parser import parse, ParserError, ParseAtom
+from scpl.parser.operators import find_variable
+
+TESTS = os.path.join(os.path.dirname(__file__), "..", "test", "parser_operators.py")
+
+def test_expressions() -> List[str]:
+    # every constant expression passed to `parse(tokenise(...), {})`
+    expressions: List[str] = []
+    with open(TESTS) as file:
+        tree = ast.parse(file.read())
+    for node in ast.walk(tree):
+        if (isinstance(node, ast.Call)
+                and getattr(node.func, "id", None) == "tokenise"
+                and isinstance(node.args[0], ast.Constant)
+                and not node.args[0].value in expressions):
+            expressions.append(node.args[0].value)
+    return expressions
+
+def with_variables(
+        expression: str
+        ) -> Tuple[str, Dict[str, ParseAtom], Dict[str, ParseAtom]]:
+    # swap each literal for a variable holding the same value, so that
+    # nothing is constant
+    out: List[str] = []
+    types: Dict[str, ParseAtom] = {}
+    values: Dict[str, ParseAtom] = {}
+    for token in itokenise(expression):
+        text = token.text
+        if not isinstance(token, (TokenTransparent, TokenWord)):
+            try:
+                atoms, _ = parse(itokenise(text), {})
+            except ParserError:
+                atoms = []
+            name = f"v{len(values)}"
+            if len(atoms) == 1 and find_variable(name, atoms[0]) is not None:
+                types[name] = values[name] = atoms[0]
+                text = name
+        out.append(text)
+    return "".join(out), types, values
+
+def bench(func: Callable[[Dict[str, ParseAtom]], Any],
+        values: Dict[str, ParseAtom], rounds: int) -> float:
+    start = monotonic()
+    for _ in range(rounds):
+        func(values)
+    return (monotonic() - start) / rounds
+
+if __name__ == "__main__":
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    totals = {
+        "tree": 0.0, "precomp": 0.0, "python": 0.0, "vm": 0.0, "prepared": 0.0
+    }
+    for constant in test_expressions():
+        expression, types, values = with_variables(constant)
+        try:
+            atoms, _ = parse(itokenise(expression), types)
+            atoms[0].eval(values)
+        except Exception:
+            # the tests that expect an error
+            continue
+
+        tree = atoms[0]
+        python = compile_python(tree)
+        precomp = parse(itokenise(expression), types)[0][0].precompile()
+        program = compile_program(tree)
+        prepared = Prepared(precomp, types)
+        slots = [values[name].eval({}) for name in prepared.variables]
+        funcs = {
+            "tree": tree.eval, "precomp": precomp.eval, "python": python,
+            "vm": program.eval, "prepared": lambda _: prepared.eval_slots(slots)
+        }
+
+        line = f"{constant:<32}"
+        for name, func in funcs.items():
+            duration = bench(func, values, rounds)
+            totals[name] += duration
+            line += f" {name} {duration*1_000_000_000:>7.0f}ns"
+        print(line)
+
+    print("total".ljust(32) + "".join(
+        f" {name} {total*1_000_000:>7.2f}μs" for name, total in totals.items()))
@@ -0,0 +1,36 @@
+import sys
+from time   import monotonic
+from typing import Callable, Dict
+
+from scpl.lexer import tokenise, tokenise_spans
+
+# one of every token type, so every scanner gets exercised
+CHUNK = '(a + 1.5 - 0xff) * 1w2d && "str\\"ing" =~ /re\\/gex/i || 10.0.0.1 in 10.0.0.0/8 || ::1 in {fd84::1, ::2} '
+
+EXPRESSIONS: Dict[str, Callable[[int], str]] = {
+    "mixed":  lambda size: (CHUNK * (size // len(CHUNK) + 1))[:size].rsplit(" ", 1)[0],
+    "string": lambda size: '"' + 'a\\"' * ((size - 2) // 3) + '"',
+    "set":    lambda size: "{" + ", ".join(str(i) for i in range(size // 8)) + "}",
+}
+SIZES = [1_000, 10_000, 100_000]
+
+TOKENISERS: Dict[str, Callable[[str], object]] = {
+    "tokens": tokenise,
+    "spans":  tokenise_spans,
+}
+
+def bench(tokeniser: Callable[[str], object], expression: str, rounds: int) -> float:
+    start = monotonic()
+    for _ in range(rounds):
+        tokeniser(expression)
+    return (monotonic() - start) / rounds
+
+if __name__ == "__main__":
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    for name, make in EXPRESSIONS.items():
+        for size in SIZES:
+            expression = make(size)
+            for tname, tokeniser in TOKENISERS.items():
+                duration = bench(tokeniser, expression, rounds)
+                per_char = duration / len(expression) * 1_000_000_000
+                print(f"{name:<7} {tname:<7} {len(expression):>7} chars: {duration*1_000_000:>10.2f}μs ({per_char:.1f}ns/char)")
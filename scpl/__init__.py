@@ -1,3 +1,4 @@
 
-from .lexer  import tokenise, LexerError, Token
+from .lexer  import itokenise, tokenise, tokenise_spans, LexerError, Token
 from .parser import parse, ParserError, ParseAtom
+from .eval   import prepare, Prepared, RuleSet
@@ -0,0 +1,82 @@
+from collections import deque
+from typing      import Deque, Dict, Generic, List, Set, TypeVar
+
+TValue = TypeVar("TValue")
+
+class AhoCorasick(Generic[TValue]):
+    # many substrings ("needles"), each holding any number of values, found
+    # in a string in one pass over it, however many needles there are.
+    # the automaton is built on the first `find` after an `add`
+    def __init__(self):
+        self._needles: Dict[str, List[TValue]] = {}
+        self._built = False
+
+        # state 0 is the root, which is also the empty needle
+        self._goto: List[Dict[str, int]] = []
+        self._fail: List[int] = []
+        # index in to `_values` of what every needle that ends at a state
+        # (including through its fail links) holds
+        self._output: List[List[int]] = []
+        self._values: List[List[TValue]] = []
+
+    def __repr__(self) -> str:
+        return f"AhoCorasick(needles={len(self)})"
+    def __len__(self) -> int:
+        return len(self._needles)
+
+    def add(self, needle: str, value: TValue):
+        self._needles.setdefault(needle, []).append(value)
+        self._built = False
+
+    def _build(self):
+        goto: List[Dict[str, int]] = [{}]
+        output: List[List[int]] = [[]]
+        self._values = []
+        for needle, values in self._needles.items():
+            state = 0
+            for char in needle:
+                if (next_state := goto[state].get(char)) is None:
+                    next_state = goto[state][char] = len(goto)
+                    goto.append({})
+                    output.append([])
+                state = next_state
+            output[state].append(len(self._values))
+            self._values.append(values)
+
+        # breadth first, so a state's fail state (which is always shallower)
+        # is finished before it is
+        fail = [0] * len(goto)
+        queue: Deque[int] = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in goto[state].items():
+                queue.append(child)
+                fallback = fail[state]
+                while fallback and char not in goto[fallback]:
+                    fallback = fail[fallback]
+                fail[child] = goto[fallback].get(char, 0)
+                output[child] = output[child] + output[fail[child]]
+
+        self._goto, self._fail, self._output = goto, fail, output
+        self._built = True
+
+    # values of every needle that is in `text`, each needle's once
+    def find(self, text: str) -> List[TValue]:
+        if not self._built:
+            self._build()
+
+        # inlined, as this is the hot path
+        goto, fail, output = self._goto, self._fail, self._output
+        matched: Set[int] = set(output[0])
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                matched.update(output[state])
+
+        values: List[TValue] = []
+        for index in matched:
+            values.extend(self._values[index])
+        return values
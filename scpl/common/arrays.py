@@ -0,0 +1,37 @@
+from array  import array
+from bisect import bisect_left
+from typing import Iterable, Iterator
+
+# 4 byte unsigned, for IPv4 addresses, on any platform that has one
+TYPECODE_U32 = "I" if array("I").itemsize >= 4 else "L"
+TYPECODE_I64 = "q"
+
+class SortedArray:
+    # distinct integers in a sorted `array`, with membership by binary search.
+    # a fraction of the size of a frozenset of the same integers, for when
+    # there are a lot of them
+    __slots__ = ("_values", "_hash")
+    def __init__(self, values: Iterable[int], typecode: str):
+        # OverflowError if any of `values` don't fit `typecode`
+        self._values = array(typecode, sorted(set(values)))
+        self._hash = hash((typecode, self._values.tobytes()))
+
+    def __repr__(self) -> str:
+        return f"SortedArray({len(self)} values)"
+    def __len__(self) -> int:
+        return len(self._values)
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._values)
+
+    def __eq__(self, other: object) -> bool:
+        return (isinstance(other, SortedArray)
+            and self._hash == other._hash
+            and self._values == other._values)
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __contains__(self, value: object) -> bool:
+        if not isinstance(value, int):
+            return False
+        index = bisect_left(self._values, value)
+        return index < len(self._values) and self._values[index] == value
@@ -0,0 +1,47 @@
+from collections import OrderedDict
+from typing      import Generic, Hashable, Optional, TypeVar
+
+TKey   = TypeVar("TKey", bound=Hashable)
+TValue = TypeVar("TValue")
+
+class LRUCache(Generic[TKey, TValue]):
+    def __init__(self, maxsize: int):
+        self.maxsize   = maxsize
+        self.hits      = 0
+        self.misses    = 0
+        self.evictions = 0
+        self._items: "OrderedDict[TKey, TValue]" = OrderedDict()
+
+    def __repr__(self) -> str:
+        return (f"LRUCache(size={len(self)}, maxsize={self.maxsize}, "
+            f"hits={self.hits}, misses={self.misses}, evictions={self.evictions})")
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key: TKey) -> Optional[TValue]:
+        if (value := self._items.get(key)) is not None:
+            self.hits += 1
+            self._items.move_to_end(key)
+        else:
+            self.misses += 1
+        return value
+
+    def __setitem__(self, key: TKey, value: TValue):
+        self._items[key] = value
+        self._items.move_to_end(key)
+        self._evict()
+
+    def _evict(self):
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+            self.evictions += 1
+
+    def resize(self, maxsize: int):
+        self.maxsize = maxsize
+        self._evict()
+
+    def clear(self):
+        self._items.clear()
+        self.hits      = 0
+        self.misses    = 0
+        self.evictions = 0
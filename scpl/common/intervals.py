@@ -0,0 +1,65 @@
+from array  import array
+from bisect import bisect_right
+from typing import Iterable, Iterator, List, MutableSequence, Tuple
+
+class IntervalSet:
+    # inclusive ranges of `maxbits` bit integers, merged where they overlap
+    # or touch and kept sorted, so that membership is a binary search and
+    # memory is proportional to how many ranges are left after merging
+    def __init__(self, ranges: Iterable[Tuple[int, int]], maxbits: int):
+        self.maxbits = maxbits
+
+        merged: List[List[int]] = []
+        for start, end in sorted(ranges):
+            if merged and start <= merged[-1][1] + 1:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+
+        self._starts: MutableSequence[int]
+        self._ends:   MutableSequence[int]
+        if maxbits <= 64:
+            self._starts = array("Q", (start for start, _ in merged))
+            self._ends   = array("Q", (end for _, end in merged))
+        else:
+            self._starts = [start for start, _ in merged]
+            self._ends   = [end for _, end in merged]
+
+    @staticmethod
+    def from_networks(
+            networks: Iterable[Tuple[int, int]], maxbits: int) -> "IntervalSet":
+        # (network, prefix length) pairs, e.g. from ParseConstCIDR
+        ranges: List[Tuple[int, int]] = []
+        for network, prefix in networks:
+            hostmask = (1 << (maxbits - prefix)) - 1
+            ranges.append((network & ~hostmask, network | hostmask))
+        return IntervalSet(ranges, maxbits)
+
+    def __repr__(self) -> str:
+        return f"IntervalSet(maxbits={self.maxbits}, ranges={len(self)})"
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def __contains__(self, value: object) -> bool:
+        if not isinstance(value, int):
+            return False
+        index = bisect_right(self._starts, value) - 1
+        return index >= 0 and value <= self._ends[index]
+
+    def ranges(self) -> Iterator[Tuple[int, int]]:
+        return zip(self._starts, self._ends)
+
+    # the fewest (network, prefix length) pairs that cover exactly the
+    # same integers
+    def networks(self) -> Iterator[Tuple[int, int]]:
+        for start, end in self.ranges():
+            while start <= end:
+                # the biggest network that starts at `start`, because of how
+                # it's aligned, and doesn't go past `end`
+                size = self.maxbits
+                if start:
+                    size = min(size, (start & -start).bit_length() - 1)
+                while start + (1 << size) - 1 > end:
+                    size -= 1
+                yield start, self.maxbits - size
+                start += 1 << size
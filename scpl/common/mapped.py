@@ -0,0 +1,283 @@
+import hashlib
+import math
+import mmap
+import os
+import struct
+import zlib
+from typing import Any, Container, Iterable, Iterator, List, Tuple, Union
+
+# files are mapped read only, so every process that maps the same file shares
+# the same pages of the page cache rather than each having its own copy.
+# files are only ever replaced (see `_replace`), never written over, so a
+# mapping already made of an older file stays valid until it is dropped
+
+def _map(path: str) -> Union[mmap.mmap, bytes]:
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            # an empty file can't be mapped
+            return b""
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+def _replace(path: str, data: Iterable[bytes]):
+    temp = f"{path}.{os.getpid()}.tmp"
+    with open(temp, "wb") as file:
+        for chunk in data:
+            file.write(chunk)
+    os.replace(temp, path)
+
+class MappedIntegers:
+    # a file of sorted, distinct, `width` byte big endian integers, searched
+    # where it lies. the file isn't checked for being sorted when it's
+    # opened, as that would mean reading all of it
+    def __init__(self, path: str, width: int, signed: bool = False):
+        self.path = path
+        self.width = width
+        self.signed = signed
+        self._map = _map(path)
+        if len(self._map) % width:
+            raise ValueError(f"{path} isn't a whole number of {width} byte integers")
+        self._count = len(self._map) // width
+    def __reduce__(self) -> Tuple[Any, ...]:
+        # mapped again from the same path, e.g. in another process
+        return (MappedIntegers, (self.path, self.width, self.signed))
+
+    def __repr__(self) -> str:
+        return f"MappedIntegers({self.path!r}, width={self.width}, count={len(self)})"
+    def __len__(self) -> int:
+        return self._count
+    def __iter__(self) -> Iterator[int]:
+        width, signed = self.width, self.signed
+        for offset in range(0, len(self._map), width):
+            yield int.from_bytes(self._map[offset:offset+width], "big", signed=signed)
+
+    def __contains__(self, value: object) -> bool:
+        if not isinstance(value, int):
+            return False
+        width, data = self.width, self._map
+        low, high = 0, self._count
+
+        if self.signed:
+            # inlined binary search
+            while low < high:
+                middle = (low + high) // 2
+                offset = middle * width
+                found = int.from_bytes(data[offset:offset+width], "big", signed=True)
+                if found < value:
+                    low = middle + 1
+                elif found > value:
+                    high = middle
+                else:
+                    return True
+            return False
+
+        # unsigned big endian bytes sort the same as the integers they
+        # encode, so compare bytes rather than decoding each
+        try:
+            key = value.to_bytes(width, "big")
+        except OverflowError:
+            return False
+        while low < high:
+            middle = (low + high) // 2
+            offset = middle * width
+            found_bytes = data[offset:offset+width]
+            if found_bytes < key:
+                low = middle + 1
+            elif found_bytes > key:
+                high = middle
+            else:
+                return True
+        return False
+
+def write_integers(path: str, values: Iterable[int], width: int, signed: bool = False):
+    # OverflowError if any of `values` don't fit in `width` bytes
+    _replace(path, (
+        v.to_bytes(width, "big", signed=signed) for v in sorted(set(values))
+    ))
+
+# string files are an open addressing hash table of offsets to entries, each
+# a 4 byte length and that many bytes of utf-8, after a header of MAGIC, how
+# many slots the table has (always a power of 2) and how many are in use
+STRINGS_MAGIC = b"scplstr1"
+_HEADER = struct.Struct("<8sQQ")
+_SLOT   = struct.Struct("<Q")
+_LENGTH = struct.Struct("<I")
+
+def _string_hash(value: bytes) -> int:
+    # the same in every process, unlike hash()
+    return zlib.crc32(value)
+
+class MappedStrings:
+    # a string file (see `write_strings`), looked up where it lies, which
+    # reads one or two slots and entries from it per lookup
+    def __init__(self, path: str):
+        self.path = path
+        self._map = _map(path)
+        if len(self._map) < _HEADER.size:
+            raise ValueError(f"{path} is too short to be a string file")
+        magic, slots, self._count = _HEADER.unpack_from(self._map, 0)
+        if magic != STRINGS_MAGIC or not slots or slots & (slots - 1):
+            raise ValueError(f"{path} isn't a string file")
+        self._mask = slots - 1
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return (MappedStrings, (self.path,))
+
+    def __repr__(self) -> str:
+        return f"MappedStrings({self.path!r}, count={len(self)})"
+    def __len__(self) -> int:
+        return self._count
+
+    def _offsets(self) -> Iterator[int]:
+        for slot in range(self._mask + 1):
+            offset, = _SLOT.unpack_from(self._map, _HEADER.size + slot * _SLOT.size)
+            if offset:
+                yield offset
+    def _entry(self, offset: int) -> bytes:
+        length, = _LENGTH.unpack_from(self._map, offset)
+        start = offset + _LENGTH.size
+        return self._map[start:start+length]
+
+    def __iter__(self) -> Iterator[str]:
+        for offset in self._offsets():
+            yield self._entry(offset).decode("utf8")
+
+    def __contains__(self, value: object) -> bool:
+        if not isinstance(value, str):
+            return False
+        try:
+            encoded = value.encode("utf8")
+        except UnicodeEncodeError:
+            # e.g. a lone surrogate, which couldn't have been written
+            return False
+
+        data, mask = self._map, self._mask
+        slot = _string_hash(encoded) & mask
+        while True:
+            offset, = _SLOT.unpack_from(data, _HEADER.size + slot * _SLOT.size)
+            if not offset:
+                return False
+            elif self._entry(offset) == encoded:
+                return True
+            slot = (slot + 1) & mask
+
+def write_strings(path: str, values: Iterable[str]):
+    encoded = sorted({v.encode("utf8") for v in values})
+    # at most half full, so a miss finds an empty slot quickly
+    slots = 1
+    while slots < len(encoded) * 2:
+        slots *= 2
+
+    table: List[int] = [0] * slots
+    entries: List[bytes] = []
+    offset = _HEADER.size + slots * _SLOT.size
+    for value in encoded:
+        slot = _string_hash(value) & (slots - 1)
+        while table[slot]:
+            slot = (slot + 1) & (slots - 1)
+        table[slot] = offset
+        entries.append(_LENGTH.pack(len(value)) + value)
+        offset += len(entries[-1])
+
+    def _chunks() -> Iterator[bytes]:
+        yield _HEADER.pack(STRINGS_MAGIC, slots, len(encoded))
+        for slot_offset in table:
+            yield _SLOT.pack(slot_offset)
+        yield from entries
+    _replace(path, _chunks())
+
+# bloom filter files are a header of BLOOM_MAGIC, how many bits the filter
+# has, how many of them each value sets and how many values were added, then
+# the bits themselves, least significant bit of each byte first
+BLOOM_MAGIC = b"scplblm1"
+_BLOOM_HEADER = struct.Struct("<8sQQQ")
+
+def _bloom_hashes(value: bytes) -> Tuple[int, int]:
+    # two independent hashes, from which every bit's index is made (see
+    # "less hashing, same performance", kirsch and mitzenmacher)
+    digest = hashlib.blake2b(value, digest_size=16).digest()
+    return (int.from_bytes(digest[:8], "little"),
+        int.from_bytes(digest[8:], "little") | 1)
+
+class MappedBloom:
+    # a bloom filter file (see `write_bloom`) of strings. never says a string
+    # that was added isn't in it, but might say one that wasn't added is, at
+    # about the rate it was written for. a fraction of the size of the
+    # strings themselves, however long they are
+    def __init__(self, path: str):
+        self.path = path
+        self._map = _map(path)
+        if len(self._map) < _BLOOM_HEADER.size:
+            raise ValueError(f"{path} is too short to be a bloom filter file")
+        magic, self._bits, self._hashes, self._count = _BLOOM_HEADER.unpack_from(
+            self._map, 0
+        )
+        if (magic != BLOOM_MAGIC
+                or not self._bits
+                or len(self._map) < _BLOOM_HEADER.size + (self._bits + 7) // 8):
+            raise ValueError(f"{path} isn't a bloom filter file")
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return (MappedBloom, (self.path,))
+
+    def __repr__(self) -> str:
+        return (f"MappedBloom({self.path!r}, bits={self._bits}, "
+            f"hashes={self._hashes}, count={len(self)})")
+    def __len__(self) -> int:
+        # how many were added, not how many it'd say it contains
+        return self._count
+
+    def __contains__(self, value: object) -> bool:
+        if not isinstance(value, str):
+            return False
+        try:
+            first, second = _bloom_hashes(value.encode("utf8"))
+        except UnicodeEncodeError:
+            return False
+        data, bits = self._map, self._bits
+        for _ in range(self._hashes):
+            bit = first % bits
+            if not data[_BLOOM_HEADER.size + (bit >> 3)] >> (bit & 7) & 1:
+                return False
+            first += second
+        return True
+
+def write_bloom(path: str, values: Iterable[str], error_rate: float = 0.001):
+    if not 0.0 < error_rate < 1.0:
+        raise ValueError("error_rate must be between 0 and 1")
+    encoded = {v.encode("utf8") for v in values}
+    # the optimal size and number of hashes for `error_rate`
+    count = max(len(encoded), 1)
+    bits = max(math.ceil(-count * math.log(error_rate) / math.log(2) ** 2), 8)
+    hashes = max(round(bits / count * math.log(2)), 1)
+
+    table = bytearray((bits + 7) // 8)
+    for value in encoded:
+        first, second = _bloom_hashes(value)
+        for _ in range(hashes):
+            bit = first % bits
+            table[bit >> 3] |= 1 << (bit & 7)
+            first += second
+    _replace(path, [
+        _BLOOM_HEADER.pack(BLOOM_MAGIC, bits, hashes, len(encoded)), bytes(table)
+    ])
+
+class Confirmed:
+    # an approximate set (e.g. a MappedBloom) with an exact one behind it,
+    # only asked about what the approximate one says it contains. for when
+    # the exact one is slow (e.g. on disk, or remote) but most values asked
+    # about aren't in it
+    __slots__ = ("approximate", "exact")
+    def __init__(self, approximate: Container[Any], exact: Container[Any]):
+        self.approximate = approximate
+        self.exact = exact
+    def __repr__(self) -> str:
+        return f"Confirmed({self.approximate!r}, {self.exact!r})"
+    def __contains__(self, value: object) -> bool:
+        return value in self.approximate and value in self.exact
+
+# a string file or a bloom filter file, whichever `path` is
+def open_strings(path: str) -> Container[str]:
+    with open(path, "rb") as file:
+        magic = file.read(len(BLOOM_MAGIC))
+    if magic == BLOOM_MAGIC:
+        return MappedBloom(path)
+    else:
+        return MappedStrings(path)
@@ -0,0 +1,103 @@
+from typing import Generic, Iterator, List, Optional, Tuple, TypeVar
+
+TValue = TypeVar("TValue")
+
+class _Node(Generic[TValue]):
+    __slots__ = ("network", "prefix", "values", "children")
+    def __init__(self, network: int, prefix: int, values: List[TValue]):
+        self.network = network
+        self.prefix  = prefix
+        self.values  = values
+        self.children: List[Optional["_Node[TValue]"]] = [None, None]
+
+class RadixTrie(Generic[TValue]):
+    # a path compressed (patricia) binary trie of networks, as integers of
+    # `maxbits` bits (32 for IPv4, 128 for IPv6) and prefix lengths, each
+    # holding any number of values. finding every network that covers an
+    # address visits at most one node per bit of the longest prefix
+    def __init__(self, maxbits: int):
+        self.maxbits = maxbits
+        self._root: _Node[TValue] = _Node(0, 0, [])
+        self._count = 0
+
+    def __repr__(self) -> str:
+        return f"RadixTrie(maxbits={self.maxbits}, networks={len(self)})"
+    def __len__(self) -> int:
+        return self._count
+
+    def _mask(self, prefix: int) -> int:
+        return ((1 << prefix) - 1) << (self.maxbits - prefix)
+    def _bit(self, integer: int, index: int) -> int:
+        # the `index`th bit from the top
+        return (integer >> (self.maxbits - index - 1)) & 1
+
+    def add(self, network: int, prefix: int, value: TValue):
+        network &= self._mask(prefix)
+        self._count += 1
+
+        node = self._root
+        while node.prefix < prefix:
+            bit = self._bit(network, node.prefix)
+            child = node.children[bit]
+            if child is None:
+                node.children[bit] = _Node(network, prefix, [value])
+                return
+
+            # how many leading bits `network` shares with `child`
+            limit = min(prefix, child.prefix)
+            differ = (network ^ child.network) >> (self.maxbits - limit)
+            common = limit - differ.bit_length()
+            if common == child.prefix:
+                node = child
+                continue
+
+            # they diverge (or `network` ends) before `child` does, so put a
+            # node between them where they do
+            split: _Node[TValue] = _Node(network & self._mask(common), common, [])
+            node.children[bit] = split
+            split.children[self._bit(child.network, common)] = child
+            if common == prefix:
+                split.values.append(value)
+            else:
+                split.children[self._bit(network, common)] = _Node(
+                    network, prefix, [value]
+                )
+            return
+
+        node.values.append(value)
+
+    # values of every network that covers `address`, least specific first
+    def find(self, address: int) -> List[TValue]:
+        # inlined rather than using _bit(), as this is the hot path
+        maxbits = self.maxbits
+        values: List[TValue] = []
+        node: Optional[_Node[TValue]] = self._root
+        while node is not None and not (address ^ node.network) >> (maxbits - node.prefix):
+            values.extend(node.values)
+            if node.prefix == maxbits:
+                break
+            node = node.children[(address >> (maxbits - node.prefix - 1)) & 1]
+        return values
+
+    # whether any network covers `address`
+    def __contains__(self, address: object) -> bool:
+        if not isinstance(address, int):
+            return False
+        maxbits = self.maxbits
+        node: Optional[_Node[TValue]] = self._root
+        while node is not None and not (address ^ node.network) >> (maxbits - node.prefix):
+            if node.values:
+                return True
+            elif node.prefix == maxbits:
+                break
+            node = node.children[(address >> (maxbits - node.prefix - 1)) & 1]
+        return False
+
+    # every (network, prefix) held, in order
+    def networks(self) -> Iterator[Tuple[int, int]]:
+        work: List[_Node[TValue]] = [self._root]
+        while work:
+            node = work.pop()
+            if node.values:
+                yield node.network, node.prefix
+            work.extend(c for c in reversed(node.children) if c is not None)
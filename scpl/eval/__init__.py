@@ -0,0 +1,4 @@
+from .codegen  import compile_python, compile_rules, python_source, rules_source
+from .prepared import prepare, Prepared
+from .ruleset  import RuleSet
+from .vm       import compile_program, Op, Program
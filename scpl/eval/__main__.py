@@ -1,19 +1,14 @@
 import json, sys, traceback
-from collections import deque
 from time        import monotonic
 from typing      import Dict
 
-from ..lexer import tokenise
+from ..lexer import itokenise
 from ..parser import parse
 from ..parser.operands import ParseAtom
-from ..parser.operators.common import ParseOperator
 from ..parser.__main__ import main_parser
 
 def main_eval(line: str, vars: Dict[str, ParseAtom]):
     ast = main_parser(line, vars)
-    if not isinstance(ast, ParseOperator):
-        print(f"nothing to do")
-        sys.exit(1)
 
     start = monotonic()
     try:
@@ -33,8 +28,7 @@ if __name__ == "__main__":
     if len(sys.argv) > 2:
         import json
         for key, value in json.loads(sys.argv[2]).items():
-            tokens = deque(tokenise(value))
-            atoms, deps = parse(tokens, {})
+            atoms, deps = parse(itokenise(value), {})
             vars[key] = atoms[0]
 
     main_eval(sys.argv[1], vars)
@@ -0,0 +1,435 @@
+import math, typing
+from typing import Any, Callable, Dict, List, Optional, Protocol, Sequence, Tuple
+
+from ..parser.operands  import ParseAtom
+from ..parser.operators import (add, bitwise, bools, cast, casemap, complement,
+    contains, divide, equal, exponent, greater, lesser, match, modulo, multiply, negative,
+    positive, subtract)
+from ..parser.operators.set      import ParseNamedSet, ParseSet, SetMembers
+from ..parser.operators.variable import ParseVariable
+
+# python operator precedence, loosest to tightest. an operand is wrapped in
+# parentheses when it binds looser than its position needs
+PREC_TERNARY = 1
+PREC_OR      = 2
+PREC_AND     = 3
+PREC_NOT     = 4
+PREC_COMPARE = 5
+PREC_BOR     = 6
+PREC_BXOR    = 7
+PREC_BAND    = 8
+PREC_SHIFT   = 9
+PREC_ADD     = 10
+PREC_MUL     = 11
+PREC_UNARY   = 12
+PREC_POW     = 13
+PREC_ATOM    = 14
+
+# (operator, precedence, minimum left precedence, minimum right precedence)
+BinaryTemplate = Tuple[str, int, int, int]
+def _left_assoc(op: str, prec: int) -> BinaryTemplate:
+    return (op, prec, prec, prec + 1)
+def _compare(op: str) -> BinaryTemplate:
+    # comparisons chain in python, so never let one be an operand of another
+    return (op, PREC_COMPARE, PREC_COMPARE + 1, PREC_COMPARE + 1)
+
+# keyed on the class that defines `eval`, so subclasses that only cast their
+# operands (e.g. ParseBinaryAddFloatInteger) share their parent's template
+BINARY: Dict[type, BinaryTemplate] = {
+    add.ParseBinaryAddIntegerInteger:           _left_assoc("+", PREC_ADD),
+    add.ParseBinaryAddFloatFloat:               _left_assoc("+", PREC_ADD),
+    add.ParseBinaryAddStringString:             _left_assoc("+", PREC_ADD),
+    subtract.ParseBinarySubtractIntegerInteger: _left_assoc("-", PREC_ADD),
+    subtract.ParseBinarySubtractFloatFloat:     _left_assoc("-", PREC_ADD),
+    multiply.ParseBinaryMultiplyIntegerInteger: _left_assoc("*", PREC_MUL),
+    multiply.ParseBinaryMultiplyFloatFloat:     _left_assoc("*", PREC_MUL),
+    divide.ParseBinaryDivideFloatFloat:         _left_assoc("/", PREC_MUL),
+    modulo.ParseBinaryModuloIntegerInteger:     _left_assoc("%", PREC_MUL),
+    modulo.ParseBinaryModuloFloatFloat:         _left_assoc("%", PREC_MUL),
+    bitwise.ParseBinaryAndIntegerInteger:       _left_assoc("&", PREC_BAND),
+    bitwise.ParseBinaryOrIntegerInteger:        _left_assoc("|", PREC_BOR),
+    bitwise.ParseBinaryXorIntegerInteger:       _left_assoc("^", PREC_BXOR),
+    bitwise.ParseBinaryLeftIntegerInteger:      _left_assoc("<<", PREC_SHIFT),
+    bitwise.ParseBinaryRightIntegerInteger:     _left_assoc(">>", PREC_SHIFT),
+    # right associative, and binds tighter than a unary operator on its left
+    exponent.ParseBinaryExponentIntegerInteger: ("**", PREC_POW, PREC_ATOM, PREC_UNARY),
+    exponent.ParseBinaryExponentFloatFloat:     ("**", PREC_POW, PREC_ATOM, PREC_UNARY),
+    equal.ParseBinaryEqualBoolBool:             _compare("=="),
+    equal.ParseBinaryEqualIntegerInteger:       _compare("=="),
+    equal.ParseBinaryEqualStringString:         _compare("=="),
+    greater.ParseBinaryGreaterIntegerInteger:   _compare(">"),
+    greater.ParseBinaryGreaterFloatFloat:       _compare(">"),
+    lesser.ParseBinaryLesserIntegerInteger:     _compare("<"),
+    lesser.ParseBinaryLesserFloatFloat:         _compare("<"),
+    contains.ParseBinaryContainsStringString:   _compare("in"),
+    contains.ParseBinaryContainsIPCIDRSet:      _compare("in"),
+}
+
+# (prefix, suffix, precedence, minimum operand precedence)
+UnaryTemplate = Tuple[str, str, int, int]
+UNARY: Dict[type, UnaryTemplate] = {
+    negative.ParseUnaryNegativeInteger:     ("-", "", PREC_UNARY, PREC_UNARY),
+    negative.ParseUnaryNegativeFloat:       ("-", "", PREC_UNARY, PREC_UNARY),
+    positive.ParseUnaryPositiveInteger:     ("+", "", PREC_UNARY, PREC_UNARY),
+    positive.ParseUnaryPositiveFloat:       ("+", "", PREC_UNARY, PREC_UNARY),
+    complement.ParseUnaryComplementInteger: ("~", "", PREC_UNARY, PREC_UNARY),
+    bools.ParseUnaryNot:                    ("not ", "", PREC_NOT, PREC_NOT),
+    cast.ParseCastIntegerBool:              ("not ", " == 0", PREC_NOT, PREC_COMPARE + 1),
+    cast.ParseCastFloatBool:                ("not ", " == 0.0", PREC_NOT, PREC_COMPARE + 1),
+    cast.ParseCastStringBool:               ("_len(", ") > 0", PREC_COMPARE, PREC_TERNARY),
+    cast.ParseCastRegexBool:                ("_len(", ".pattern) > 0", PREC_COMPARE, PREC_ATOM),
+    cast.ParseCastIntegerFloat:             ("_float(", ")", PREC_ATOM, PREC_TERNARY),
+    cast.ParseCastStringRegex:              ("_escape(", ")", PREC_ATOM, PREC_TERNARY),
+}
+
+# what the operators in BINARY and UNARY keep their operands in, cast as
+# `eval` needs them
+class _Binary(Protocol):
+    _left: ParseAtom
+    _right: ParseAtom
+class _Unary(Protocol):
+    _atom: ParseAtom
+
+def _evaluator(atom_type: type) -> type:
+    for parent in atom_type.__mro__:
+        if "eval" in parent.__dict__:
+            return parent
+    return atom_type
+
+class _Bound(ParseAtom):
+    # a plain value standing in for a variable's atom
+    def __init__(self, value: Any):
+        self.value = value
+    def eval(self, vars: Dict[str, ParseAtom]) -> Any:
+        return self.value
+
+# what a memo lookup finds before the entry has been evaluated
+_UNSET = object()
+
+def _store(memo: Dict[int, Any], index: int, value: Any) -> Any:
+    memo[index] = value
+    return value
+
+BUILTINS = [
+    ("_len", len), ("_float", float),
+    ("_escape", cast.escape_regex), ("_bound", _Bound), ("_unset", _UNSET),
+    ("_store", _store)
+]
+
+class _Generator:
+    def __init__(self,
+            slots: Optional[Sequence[str]] = None,
+            memo:  Optional[Dict[int, int]] = None):
+        self.constants: List[Any] = []
+        self._constant_names: Dict[int, str] = {}
+        # variable name to the local it has been read in to. only holds
+        # locals that are certain to have been assigned at this point
+        self._variables: Dict[str, str] = {}
+        self._temps = 0
+
+        # variable name to the argument it's passed as, when values are
+        # passed positionally rather than in `vars`
+        self._slots: Optional[Dict[str, str]] = None
+        if slots is not None:
+            self._slots = {name: f"_s{i}" for i, name in enumerate(slots)}
+        # whether anything needs `vars` built from the slots
+        self.needs_vars = False
+        # id() of an atom to its key in `_m`, a dict of results shared
+        # between functions, for atoms worth evaluating only once
+        self._memo = memo or {}
+
+        for name, builtin in BUILTINS:
+            self._constant_names[id(builtin)] = name
+            self.constants.append(builtin)
+
+    def constant(self, value: Any) -> str:
+        if (name := self._constant_names.get(id(value))) is None:
+            name = self._constant_names[id(value)] = f"_k{len(self.constants)}"
+            self.constants.append(value)
+        return name
+
+    def temp(self) -> str:
+        self._temps += 1
+        return f"_t{self._temps}"
+
+    def literal(self, value: Any) -> Tuple[str, int]:
+        if (type(value) in {bool, int, str}
+                or (type(value) is float and math.isfinite(value))):
+            try:
+                code = repr(value)
+            except ValueError:
+                # ints past python's digit limit (e.g. `2 << 1w`) can't be
+                # written out as source
+                return self.constant(value), PREC_ATOM
+            if code.startswith("-"):
+                return code, PREC_UNARY
+            else:
+                return code, PREC_ATOM
+        else:
+            return self.constant(value), PREC_ATOM
+
+    def operand(self, atom: ParseAtom, min_prec: int) -> str:
+        code, prec = self.expression(atom)
+        if prec < min_prec:
+            return f"({code})"
+        else:
+            return code
+
+    def conditional(self, atom: ParseAtom, min_prec: int) -> str:
+        # might not be evaluated, so variables first read in here can't be
+        # reused after it
+        variables = dict(self._variables)
+        code = self.operand(atom, min_prec)
+        self._variables = variables
+        return code
+
+    def expression(self, atom: ParseAtom) -> Tuple[str, int]:
+        if isinstance(atom, ParseVariable) and self._slots is not None:
+            return self._slots[atom.name], PREC_ATOM
+        elif isinstance(atom, ParseVariable):
+            if (local := self._variables.get(atom.name)) is not None:
+                return local, PREC_ATOM
+            local = self._variables[atom.name] = self.temp()
+            return f"({local} := _vars[{atom.name!r}].eval(_vars))", PREC_ATOM
+
+        if atom.is_constant():
+            try:
+                value = atom.eval({})
+            except Exception:
+                # leave the error for eval time
+                pass
+            else:
+                return self.literal(value)
+
+        if (index := self._memo.get(id(atom))) is not None:
+            # whoever gets here first evaluates it, so everything inside is
+            # conditional
+            variables = dict(self._variables)
+            code, _ = self._operator(atom)
+            self._variables = variables
+            value = self.temp()
+            return (f"{value} if ({value} := _m.get({index}, _unset)) is not _unset "
+                f"else _store(_m, {index}, {code})"), PREC_TERNARY
+
+        return self._operator(atom)
+
+    def _string_match(self,
+            atom: match.ParseBinaryMatchStringRegex,
+            string_match: match.StringMatch,
+            test: bool) -> Tuple[str, int]:
+        # a pattern that's really a plain string test (`string_match`), as
+        # that test, or as what the match would be if not `test`
+        if isinstance(string_match, match.MembersMatch):
+            left = self.operand(atom._left, PREC_TERNARY)
+            text = self.temp()
+            members = self.constant(string_match.members)
+            found = f"({text} := {left}) in {members}"
+            if string_match.newline:
+                before = f'{text}[-1:] == "\\n" and {text}[:-1] in {members}'
+                if test:
+                    return f"{found} or {before}", PREC_OR
+                return (f'{text} if {found} else {text}[:-1] if {before} else ""'
+                    ), PREC_TERNARY
+            elif test:
+                return found, PREC_COMPARE
+            return f'{text} if {found} else ""', PREC_TERNARY
+
+        literal = repr(string_match.literal)
+        if isinstance(string_match, match.SubstringMatch):
+            found = f"{literal} in {self.operand(atom._left, PREC_COMPARE + 1)}"
+            prec = PREC_COMPARE
+        elif isinstance(string_match, match.PrefixMatch):
+            found = f"{self.operand(atom._left, PREC_ATOM)}.startswith({literal})"
+            prec = PREC_ATOM
+        else:
+            suffixes = repr(string_match.suffixes)
+            found = f"{self.operand(atom._left, PREC_ATOM)}.endswith({suffixes})"
+            prec = PREC_ATOM
+        if test:
+            return found, prec
+        return f'{literal} if {found} else ""', PREC_TERNARY
+
+    def _operator(self, atom: ParseAtom) -> Tuple[str, int]:
+        evaluator = _evaluator(type(atom))
+        if (isinstance(atom, cast.ParseCastStringBool)
+                and isinstance(atom._atom, match.ParseBinaryMatchStringRegex)
+                and (string_match := atom._atom._string_match) is not None):
+            # only whether it matched, not what
+            return self._string_match(atom._atom, string_match, True)
+
+        if (binary := BINARY.get(evaluator)) is not None:
+            op, prec, left_prec, right_prec = binary
+            operands = typing.cast(_Binary, atom)
+            left = self.operand(operands._left, left_prec)
+            right = self.operand(operands._right, right_prec)
+            return f"{left} {op} {right}", prec
+        elif (unary := UNARY.get(evaluator)) is not None:
+            prefix, suffix, prec, atom_prec = unary
+            operand = typing.cast(_Unary, atom)._atom
+            return f"{prefix}{self.operand(operand, atom_prec)}{suffix}", prec
+
+        elif isinstance(atom, add.ParseBinaryAddRegexRegex):
+            left = self.operand(atom._left, PREC_TERNARY)
+            right = self.operand(atom._right, PREC_TERNARY)
+            return f"{self.constant(add.add_regex)}({left}, {right})", PREC_ATOM
+        elif isinstance(atom, casemap.ParseCasemappedRegex):
+            regex = self.operand(atom._atom, PREC_TERNARY)
+            args = [self.constant(atom._casemap), self.constant(atom._casemap_key)]
+            return (f"{self.constant(casemap.casemap_regex)}({regex}, "
+                f"{', '.join(args)})"), PREC_ATOM
+
+        elif isinstance(atom, (bools.ParseAll, bools.ParseAny)):
+            joiner = " and " if isinstance(atom, bools.ParseAll) else " or "
+            first, *rest = atom._atoms
+            atoms = [self.operand(first, PREC_NOT)]
+            atoms += [self.conditional(a, PREC_NOT) for a in rest]
+            return f"True if {joiner.join(atoms)} else False", PREC_TERNARY
+
+        elif isinstance(atom, match.ParseBinaryMatchStringRegex):
+            if (string_match := atom._string_match) is not None:
+                return self._string_match(atom, string_match, False)
+            left = self.operand(atom._left, PREC_TERNARY)
+            if atom._right.is_constant():
+                # the pattern is known, so call its bound `search` directly
+                pattern = atom._prefiltered or atom._right.eval({})
+                search = self.constant(pattern.search)
+                found = self.temp()
+                return (f'{found}.group(0) if ({found} := {search}({left})) '
+                    'is not None else ""'), PREC_TERNARY
+            else:
+                right = self.operand(atom._right, PREC_TERNARY)
+                return f"{self.constant(match.match_regex)}({left}, {right})", PREC_ATOM
+
+        elif isinstance(atom, contains.ParseBinaryContainsIPCIDR):
+            # the tree walker evaluates `right` first, so we do too
+            if atom._right.is_constant():
+                network, mask = atom._right.eval({})
+                left = self.operand(atom._left, PREC_BAND + 1)
+                return f"{left} & {mask} == {network}", PREC_COMPARE
+            else:
+                right = self.operand(atom._right, PREC_TERNARY)
+                left = self.operand(atom._left, PREC_BAND + 1)
+                cidr = self.temp()
+                return (f"(({cidr} := {right}), "
+                    f"{left} & {cidr}[1] == {cidr}[0])[1]"), PREC_ATOM
+        elif isinstance(atom, contains.ParseBinaryContainsSet):
+            right = self.operand(atom._right, PREC_COMPARE + 1)
+            left = self.operand(atom._left, PREC_COMPARE + 1)
+            if atom._right.is_constant():
+                return f"{left} in {right}", PREC_COMPARE
+            else:
+                members = self.temp()
+                return f"(({members} := {right}), {left} in {members})[1]", PREC_ATOM
+        elif isinstance(atom, ParseSet):
+            # only reached when some members aren't constant
+            items = [self.operand(a, PREC_TERNARY) for a in atom._atoms]
+            return (f"{self.constant(SetMembers)}({self.constant(atom._constant)}, "
+                f"[{', '.join(items)}])"), PREC_ATOM
+        elif isinstance(atom, ParseNamedSet):
+            # whatever it holds when it's evaluated, not when it's compiled
+            return f"{self.constant(atom)}.members", PREC_ATOM
+
+        else:
+            # nothing better to do than let the atom evaluate itself
+            self.needs_vars = True
+            return f"{self.constant(atom)}.eval(_vars)", PREC_ATOM
+
+# the source of a python function equivalent to `atom.eval`, and the
+# constants it needs to be passed. with `slots`, the function instead takes
+# the plain value of each of those variables as positional arguments
+def python_source(
+        atom: ParseAtom, slots: Optional[Sequence[str]] = None
+        ) -> Tuple[str, List[Any]]:
+
+    generator = _Generator(slots)
+    code, _ = generator.expression(atom)
+    names = [generator.constant(c) for c in generator.constants]
+
+    if slots is None:
+        args = "_vars"
+        preamble = ""
+    else:
+        args = ", ".join(f"_s{i}" for i in range(len(slots)))
+        preamble = ""
+        if generator.needs_vars:
+            bound = ", ".join(f"{n!r}: _bound(_s{i})" for i, n in enumerate(slots))
+            preamble = f"        _vars = {{{bound}}}\n"
+
+    source = (
+        f"def _factory({', '.join(names)}):\n"
+        f"    def _compiled({args}):\n"
+        f"{preamble}"
+        f"        return {code}\n"
+         "    return _compiled\n"
+    )
+    return source, generator.constants
+
+# a python function that takes the same `vars` as, and returns the same as,
+# `atom.eval`, or that takes plain values positionally if `slots` is given.
+# falls back to the tree walker for expressions too deeply nested for python
+# to compile
+def compile_python(
+        atom: ParseAtom, slots: Optional[Sequence[str]] = None
+        ) -> Callable[..., Any]:
+
+    try:
+        source, constants = python_source(atom, slots)
+        code = compile(source, "<scpl>", "exec")
+    except (MemoryError, RecursionError, SyntaxError):
+        if slots is None:
+            return atom.eval
+        names = list(slots)
+        def _fallback(*values: Any) -> Any:
+            return atom.eval({n: _Bound(v) for n, v in zip(names, values)})
+        return _fallback
+
+    namespace: Dict[str, Any] = {}
+    exec(code, namespace)
+    return namespace["_factory"](*constants)
+
+# the source of a python function for each of `atoms`, each taking `vars` and
+# `_m`, an empty dict made fresh for each `vars`, and the
+# constants they need as globals. atoms that are in `memo` (by id()) are
+# evaluated by whichever function needs them first and then read from `_m`
+# by every other. constants are globals, rather than closed over as in
+# `python_source`, because compiling thousands of closures that each have
+# thousands of free variables takes python a very long time
+def rules_source(
+        atoms: Sequence[ParseAtom], memo: Dict[int, int]
+        ) -> Tuple[str, Dict[str, Any]]:
+
+    generator = _Generator(memo=memo)
+    functions: List[str] = []
+    for i, atom in enumerate(atoms):
+        generator._variables = {}
+        try:
+            code, _ = generator.expression(atom)
+        except RecursionError:
+            code = f"{generator.constant(atom)}.eval(_vars)"
+        functions.append(
+            f"def _r{i}(_vars, _m):\n"
+            f"    return {code}\n"
+        )
+
+    source = (
+        f"{''.join(functions)}"
+        f"_rules = [{', '.join(f'_r{i}' for i in range(len(atoms)))}]\n"
+    )
+    constants = {generator.constant(c): c for c in generator.constants}
+    return source, constants
+
+def compile_rules(
+        atoms: Sequence[ParseAtom], memo: Dict[int, int]
+        ) -> List[Callable[[Dict[str, ParseAtom], Dict[int, Any]], Any]]:
+
+    try:
+        source, constants = rules_source(atoms, memo)
+        code = compile(source, "<scpl>", "exec")
+    except (MemoryError, RecursionError, SyntaxError):
+        # `_m` goes unused, so nothing is shared
+        def _rule(atom: ParseAtom) -> Callable[[Dict[str, ParseAtom], Dict[int, Any]], Any]:
+            return lambda vars, _m: atom.eval(vars)
+        return [_rule(atom) for atom in atoms]
+
+    exec(code, constants)
+    return constants["_rules"]
@@ -0,0 +1,43 @@
+from typing import Any, Callable, Dict, Optional, Sequence
+
+from .codegen           import compile_python
+from ..lexer            import itokenise
+from ..parser           import parse
+from ..parser.operands  import ParseAtom
+from ..parser.operators import ParseNamedSet
+from ..regex.redos      import Risk
+
+class Prepared:
+    # an expression compiled against a fixed set of variables (`schema`,
+    # name to type, e.g. {"nick": ParseString()}) that is evaluated with
+    # plain values, in the order the schema declares them, rather than a
+    # `vars` dict of atoms. values are what the atom for that variable would
+    # eval to (e.g. an int for an IPv4, a compiled pattern for a regex).
+    # named sets in the schema aren't variables, so don't take a slot
+    def __init__(self, atom: ParseAtom, schema: Dict[str, ParseAtom]):
+        self.atom = atom
+        self.variables = [
+            name for name, var_type in schema.items()
+            if not isinstance(var_type, ParseNamedSet)
+        ]
+        self._slots = {name: i for i, name in enumerate(self.variables)}
+        # the compiled function itself, rather than a method wrapping it,
+        # to save a call on every eval
+        self.eval: Callable[..., Any] = compile_python(atom, self.variables)
+
+    def __repr__(self) -> str:
+        return f"Prepared({self.atom!r}, {self.variables!r})"
+
+    def slot(self, name: str) -> int:
+        return self._slots[name]
+
+    def eval_slots(self, slots: Sequence[Any]) -> Any:
+        return self.eval(*slots)
+
+def prepare(
+        expression: str,
+        schema: Dict[str, ParseAtom],
+        max_regex_risk: Optional[Risk] = None
+        ) -> Prepared:
+    atoms, deps = parse(itokenise(expression), schema, max_regex_risk)
+    return Prepared(atoms[0].precompile(), schema)
@@ -0,0 +1,282 @@
+import typing
+from typing import (Any, Callable, Collection, Dict, Hashable, List, Optional, Pattern,
+    Sequence, Tuple, Type, Union)
+
+from .codegen             import compile_rules
+from ..common.ahocorasick import AhoCorasick
+from ..common.radix       import RadixTrie
+from ..lexer              import itokenise
+from ..parser             import parse
+from ..parser.operands    import ParseAtom, ParseConstCIDR, ParseIPv6
+from ..parser.operators          import bools, cast, contains, equal, match
+from ..parser.operators.variable import ParseVariable
+from ..regex.combined            import CombinedPatterns, mergeable
+from ..regex.redos               import Risk
+
+Rule = Callable[[Dict[str, ParseAtom], Dict[int, Any]], Any]
+# an atom's type, whatever else makes it distinct (`_key()`) and the id()s of
+# its (already interned) operands
+InternKey = Tuple[type, Hashable, Tuple[int, ...]]
+
+EQUALS = (
+    equal.ParseBinaryEqualBoolBool,
+    equal.ParseBinaryEqualIntegerInteger,
+    equal.ParseBinaryEqualStringString
+)
+
+class _HashIndex:
+    # rules by the values their probe has to be one of
+    def __init__(self, probe: ParseAtom):
+        self._rules: Dict[Hashable, List[int]] = {}
+    def add(self, values: Collection[Hashable], rule: int):
+        for value in values:
+            self._rules.setdefault(value, []).append(rule)
+    def find(self, value: Any) -> Collection[int]:
+        return self._rules.get(value, ())
+
+class _NetworkIndex:
+    # rules by the networks their probe, an address, has to be in one of
+    def __init__(self, probe: ParseAtom):
+        maxbits = 128 if isinstance(probe, ParseIPv6) else 32
+        self._rules: RadixTrie[int] = RadixTrie(maxbits)
+    def add(self, networks: Collection[Tuple[int, int]], rule: int):
+        for network, prefix in networks:
+            self._rules.add(network, prefix, rule)
+    def find(self, value: Any) -> Collection[int]:
+        return self._rules.find(value)
+
+class _SubstringIndex:
+    # rules by the substrings their probe has to contain one of, all found
+    # in one pass over it rather than one pass per rule
+    def __init__(self, probe: ParseAtom):
+        self._rules: AhoCorasick[int] = AhoCorasick()
+    def add(self, needles: Collection[str], rule: int):
+        for needle in needles:
+            self._rules.add(needle, rule)
+    def find(self, value: Any) -> Collection[int]:
+        return self._rules.find(value)
+
+class _RegexIndex:
+    # rules by the patterns their probe has to match, merged in to a few
+    # alternations (see CombinedPatterns)
+    def __init__(self, probe: ParseAtom):
+        self._rules: CombinedPatterns[int] = CombinedPatterns()
+    def add(self, patterns: Collection[Pattern], rule: int):
+        for pattern in patterns:
+            self._rules.add(pattern, rule)
+    def find(self, value: Any) -> Collection[int]:
+        return self._rules.find(value)
+
+Index = Union[_HashIndex, _NetworkIndex, _SubstringIndex, _RegexIndex]
+# something cheap to evaluate (`probe`), the kind of index it goes in and
+# the values (or networks) it has to be one of for a rule to match
+Guard = Tuple[ParseAtom, Type[Index], Collection[Any]]
+
+def _guard(atom: ParseAtom) -> Optional[Guard]:
+    if (isinstance(atom, cast.ParseCastStringBool)
+            and isinstance(atom._atom, match.ParseBinaryMatchStringRegex)):
+        # false whenever the match is
+        atom = atom._atom
+
+    if isinstance(atom, EQUALS):
+        for probe, value in [(atom._left, atom._right), (atom._right, atom._left)]:
+            if isinstance(probe, ParseVariable) and value.is_constant():
+                return probe, _HashIndex, [value.eval({})]
+    elif (isinstance(atom, contains.ParseBinaryContainsSet)
+            and isinstance(atom._left, ParseVariable)
+            and atom._right.is_constant()):
+        # a constant set's members are frozen, so can be iterated
+        members = typing.cast(Collection[Any], atom._right.eval({}))
+        return atom._left, _HashIndex, members
+    elif (isinstance(atom, contains.ParseBinaryContainsIPCIDR)
+            and isinstance(atom._left, ParseVariable)
+            and isinstance(atom._right, ParseConstCIDR)):
+        return atom._left, _NetworkIndex, [(atom._right.integer, atom._right.prefix)]
+    elif (isinstance(atom, contains.ParseBinaryContainsIPCIDRSet)
+            and isinstance(atom._left, ParseVariable)):
+        return atom._left, _NetworkIndex, list(atom._right.networks())
+    elif (isinstance(atom, contains.ParseBinaryContainsStringString)
+            and isinstance(atom._right, ParseVariable)
+            and atom._left.is_constant()):
+        return atom._right, _SubstringIndex, [atom._left.eval({})]
+    elif (isinstance(atom, match.ParseBinaryMatchStringRegex)
+            and isinstance(atom._left, ParseVariable)
+            and atom._right.is_constant()):
+        string_match = atom._string_match
+        if isinstance(string_match, match.MembersMatch):
+            members = list(string_match.members)
+            if string_match.newline:
+                members += [m + "\n" for m in string_match.members]
+            return atom._left, _HashIndex, members
+        elif string_match is not None:
+            # a substring, prefix or suffix, none of which can be there
+            # without being in it
+            return atom._left, _SubstringIndex, [string_match.literal]
+
+        prefiltered = atom._prefiltered
+        if prefiltered is not None and not prefiltered.fold:
+            # nothing can match without the literal in it
+            return atom._left, _SubstringIndex, [prefiltered.literal]
+        # without a literal to look for first, one search of many patterns
+        # merged together is much quicker than a search of each
+        pattern = atom._right.eval({})
+        if mergeable(pattern):
+            # only python's own patterns are
+            return atom._left, _RegexIndex, [typing.cast(Pattern, pattern)]
+    return None
+
+# a guard from `atom`'s top level `&&`s, if it has one; if its probe isn't one
+# of the values then neither is `atom` true
+def find_guard(atom: ParseAtom) -> Optional[Guard]:
+    conjunction: Sequence[ParseAtom]
+    if isinstance(atom, bools.ParseAll):
+        conjunction = atom._atoms
+    else:
+        conjunction = [atom]
+
+    for operand in conjunction:
+        if (guard := _guard(operand)) is not None:
+            return guard
+    return None
+
+class RuleSet:
+    # many expressions against the same variables (`types`, name to type, as
+    # given to `parse`) evaluated together. structurally equal subexpressions
+    # are merged in to one atom, and each of those is evaluated at most once
+    # per `vars`, however many rules it's in.
+    # rules with a guard (see `find_guard`) are indexed on it, and only
+    # evaluated when `vars` passes it. a rule that is skipped can't match,
+    # but any error it would have raised before reaching its guard is lost.
+    # `max_regex_risk` is as given to `parse`, for rules added as text
+    def __init__(self,
+            types: Dict[str, ParseAtom],
+            max_regex_risk: Optional[Risk] = None):
+        self._types = types
+        self._max_regex_risk = max_regex_risk
+        self._ids:   List[Hashable] = []
+        self._atoms: List[ParseAtom] = []
+        self._interned: Dict[InternKey, ParseAtom] = {}
+
+        # id() of a probe and its kind of index to the probe, every rule
+        # guarded on it and the index
+        self._guards: Dict[Tuple[int, type], Tuple[ParseAtom, List[int], Index]] = {}
+        self._unguarded: List[int] = []
+
+        # compiled on first eval after a change
+        self._rules: Optional[List[Rule]] = None
+
+    def __len__(self) -> int:
+        return len(self._atoms)
+    def __repr__(self) -> str:
+        return f"RuleSet({len(self._atoms)} rules, {len(self._interned)} atoms)"
+
+    def add(self, rule_id: Hashable, expression: str) -> ParseAtom:
+        atoms, deps = parse(itokenise(expression), self._types, self._max_regex_risk)
+        return self.add_atom(rule_id, atoms[0])
+
+    # returns the atom as merged with the rest of the set, which may share
+    # operands with other rules
+    def add_atom(self, rule_id: Hashable, atom: ParseAtom) -> ParseAtom:
+        atom = self._intern(atom.precompile())
+        index = len(self._atoms)
+        self._ids.append(rule_id)
+        self._atoms.append(atom)
+        self._rules = None
+
+        if (guard := find_guard(atom)) is None:
+            self._unguarded.append(index)
+        else:
+            probe, index_type, values = guard
+            key = (id(probe), index_type)
+            if key not in self._guards:
+                self._guards[key] = (probe, [], index_type(probe))
+            _, guarded, rules = self._guards[key]
+            guarded.append(index)
+            rules.add(values, index)
+        return atom
+
+    def _intern(self, atom: ParseAtom) -> ParseAtom:
+        # bottom up, so an atom's operands are already interned when it is
+        # and it can be keyed on their id()s rather than hashing its subtree
+        interned: Dict[int, ParseAtom] = {}
+        work: List[Tuple[ParseAtom, bool]] = [(atom, False)]
+        while work:
+            node, visited = work.pop()
+            if id(node) in interned:
+                continue
+            elif not visited and (operands := node.operands()):
+                work.append((node, True))
+                work.extend((operand, False) for operand in operands)
+                continue
+
+            node.replace_operands(interned)
+            key = (type(node), node._key(), tuple(id(o) for o in node.operands()))
+            interned[id(node)] = self._interned.setdefault(key, node)
+        return interned[id(atom)]
+
+    def _compile(self) -> List[Rule]:
+        # anything with more than one parent, or that is more than one rule,
+        # is remembered once it has been evaluated
+        references: Dict[int, int] = {}
+        shared: List[ParseAtom] = []
+        seen: Dict[int, ParseAtom] = {}
+        work = list(self._atoms)
+        for atom in work:
+            references[id(atom)] = references.get(id(atom), 0) + 1
+        while work:
+            node = work.pop()
+            if id(node) in seen:
+                continue
+            seen[id(node)] = node
+            for operand in node.operands():
+                references[id(operand)] = references.get(id(operand), 0) + 1
+                work.append(operand)
+
+        for node_id, count in references.items():
+            # not worth remembering a constant or a variable
+            if count > 1 and seen[node_id].operands():
+                shared.append(seen[node_id])
+
+        memo = {id(atom): i for i, atom in enumerate(shared)}
+        return compile_rules(self._atoms, memo)
+
+    def _compiled(self) -> List[Rule]:
+        if self._rules is None:
+            self._rules = self._compile()
+        return self._rules
+
+    # indexes, in order, of the rules that `vars` passes the guard of
+    def candidates(self, vars: Dict[str, ParseAtom]) -> List[int]:
+        # a set, because a rule can be in more than one overlapping network
+        candidates = set(self._unguarded)
+        for probe, guarded, rules in self._guards.values():
+            try:
+                value = probe.eval(vars)
+            except Exception:
+                # leave the error to the rules themselves
+                candidates.update(guarded)
+            else:
+                candidates.update(rules.find(value))
+        return sorted(candidates)
+
+    # the id of the first rule, in the order they were added, that `vars`
+    # matches (is truthy for), or None if it matches none
+    def first(self, vars: Dict[str, ParseAtom]) -> Optional[Hashable]:
+        rules = self._compiled()
+        memo: Dict[int, Any] = {}
+        for i in self.candidates(vars):
+            if rules[i](vars, memo):
+                return self._ids[i]
+        return None
+
+    # the id of every rule that `vars` matches
+    def all(self, vars: Dict[str, ParseAtom]) -> List[Hashable]:
+        rules = self._compiled()
+        memo: Dict[int, Any] = {}
+        return [self._ids[i] for i in self.candidates(vars) if rules[i](vars, memo)]
+
+    # how many rules `vars` matches
+    def count(self, vars: Dict[str, ParseAtom]) -> int:
+        rules = self._compiled()
+        memo: Dict[int, Any] = {}
+        return sum(1 for i in self.candidates(vars) if rules[i](vars, memo))
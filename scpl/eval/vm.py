@@ -0,0 +1,454 @@
+import operator, typing
+from array  import array
+from enum   import IntEnum
+from typing import Any, Callable, Dict, List, Protocol, Tuple
+
+from ..parser.operands  import ParseAtom
+from ..parser.operators import (add, bitwise, bools, cast, casemap, complement,
+    contains, divide, equal, exponent, greater, lesser, match, modulo, multiply,
+    negative, positive, subtract)
+from ..parser.operators.set      import ParseSet, SetMembers
+from ..parser.operators.variable import ParseVariable
+
+class Op(IntEnum):
+    # push constants[arg]
+    CONST      = 0
+    # push the value of variables[arg]
+    LOAD       = 1
+    # pop; if falsy push False and jump to arg
+    JUMP_FALSE = 2
+    # pop; if truthy push True and jump to arg
+    JUMP_TRUE  = 3
+    # pop arg values and combine them with the constant members below them
+    # in to a SetMembers
+    BUILD_SET  = 4
+    # replace the top with its casemapped regex, constants[arg] being
+    # (casemap, frozenset(casemap.items()))
+    CASEMAP    = 5
+    # push constants[arg].eval(vars), for atoms we don't know how to compile
+    EVAL       = 6
+
+    # replace the top with UNARY[op](top)
+    NEGATIVE   = 16
+    POSITIVE   = 17
+    INVERT     = 18
+    NOT        = 19
+    FLOAT      = 20
+    BOOL       = 21
+    BOOL_STR   = 22
+    BOOL_REGEX = 23
+    ESCAPE     = 24
+
+    # pop right, replace the top (left) with BINARY[op](left, right)
+    ADD        = 32
+    SUBTRACT   = 33
+    MULTIPLY   = 34
+    DIVIDE     = 35
+    MODULO     = 36
+    POWER      = 37
+    AND        = 38
+    OR         = 39
+    XOR        = 40
+    LSHIFT     = 41
+    RSHIFT     = 42
+    EQUAL      = 43
+    GREATER    = 44
+    LESSER     = 45
+    CONTAINS   = 46
+    MATCH      = 47
+    ADD_REGEX  = 48
+    # these two are evaluated right first, so the right operand is below the
+    # left one on the stack
+    IN_SET     = 49
+    IN_CIDR    = 50
+    # with the right being a plain string test (see `string_match`)
+    MATCH_STR  = 51
+    TEST_STR   = 52
+
+OP_UNARY  = Op.NEGATIVE
+OP_BINARY = Op.ADD
+
+# enum members are slow to look up, plain ints aren't
+_OP_CONST      = Op.CONST.value
+_OP_LOAD       = Op.LOAD.value
+_OP_JUMP_FALSE = Op.JUMP_FALSE.value
+_OP_JUMP_TRUE  = Op.JUMP_TRUE.value
+_OP_BUILD_SET  = Op.BUILD_SET.value
+_OP_CASEMAP    = Op.CASEMAP.value
+_OP_UNARY      = OP_UNARY.value
+_OP_BINARY     = OP_BINARY.value
+
+def _bool_str(value: str) -> bool:
+    return len(value) > 0
+def _bool_regex(value: Any) -> bool:
+    return len(value.pattern) > 0
+def _contains(left: str, right: str) -> bool:
+    return left in right
+def _in_cidr(cidr: Tuple[int, int], ip: int) -> bool:
+    return ip & cidr[1] == cidr[0]
+def _match_str(text: str, string_match: match.StringMatch) -> str:
+    return string_match.match(text)
+def _test_str(text: str, string_match: match.StringMatch) -> bool:
+    return string_match.test(text)
+
+UNARY: List[Callable[[Any], Any]] = [
+    operator.neg,
+    operator.pos,
+    operator.invert,
+    operator.not_,
+    float,
+    operator.truth,
+    _bool_str,
+    _bool_regex,
+    cast.escape_regex,
+]
+BINARY: List[Callable[[Any, Any], Any]] = [
+    operator.add,
+    operator.sub,
+    operator.mul,
+    operator.truediv,
+    operator.mod,
+    operator.pow,
+    operator.and_,
+    operator.or_,
+    operator.xor,
+    operator.lshift,
+    operator.rshift,
+    operator.eq,
+    operator.gt,
+    operator.lt,
+    _contains,
+    match.match_regex,
+    add.add_regex,
+    operator.contains,
+    _in_cidr,
+    _match_str,
+    _test_str,
+]
+
+# keyed on the class that defines `eval`, as in codegen
+BINARY_OPS: Dict[type, Op] = {
+    add.ParseBinaryAddIntegerInteger:           Op.ADD,
+    add.ParseBinaryAddFloatFloat:               Op.ADD,
+    add.ParseBinaryAddStringString:             Op.ADD,
+    add.ParseBinaryAddRegexRegex:               Op.ADD_REGEX,
+    subtract.ParseBinarySubtractIntegerInteger: Op.SUBTRACT,
+    subtract.ParseBinarySubtractFloatFloat:     Op.SUBTRACT,
+    multiply.ParseBinaryMultiplyIntegerInteger: Op.MULTIPLY,
+    multiply.ParseBinaryMultiplyFloatFloat:     Op.MULTIPLY,
+    divide.ParseBinaryDivideFloatFloat:         Op.DIVIDE,
+    modulo.ParseBinaryModuloIntegerInteger:     Op.MODULO,
+    modulo.ParseBinaryModuloFloatFloat:         Op.MODULO,
+    exponent.ParseBinaryExponentIntegerInteger: Op.POWER,
+    exponent.ParseBinaryExponentFloatFloat:     Op.POWER,
+    bitwise.ParseBinaryAndIntegerInteger:       Op.AND,
+    bitwise.ParseBinaryOrIntegerInteger:        Op.OR,
+    bitwise.ParseBinaryXorIntegerInteger:       Op.XOR,
+    bitwise.ParseBinaryLeftIntegerInteger:      Op.LSHIFT,
+    bitwise.ParseBinaryRightIntegerInteger:     Op.RSHIFT,
+    equal.ParseBinaryEqualBoolBool:             Op.EQUAL,
+    equal.ParseBinaryEqualIntegerInteger:       Op.EQUAL,
+    equal.ParseBinaryEqualStringString:         Op.EQUAL,
+    greater.ParseBinaryGreaterIntegerInteger:   Op.GREATER,
+    greater.ParseBinaryGreaterFloatFloat:       Op.GREATER,
+    lesser.ParseBinaryLesserIntegerInteger:     Op.LESSER,
+    lesser.ParseBinaryLesserFloatFloat:         Op.LESSER,
+    contains.ParseBinaryContainsStringString:   Op.CONTAINS,
+    contains.ParseBinaryContainsIPCIDRSet:      Op.CONTAINS,
+    match.ParseBinaryMatchStringRegex:          Op.MATCH,
+}
+UNARY_OPS: Dict[type, Op] = {
+    negative.ParseUnaryNegativeInteger:     Op.NEGATIVE,
+    negative.ParseUnaryNegativeFloat:       Op.NEGATIVE,
+    positive.ParseUnaryPositiveInteger:     Op.POSITIVE,
+    positive.ParseUnaryPositiveFloat:       Op.POSITIVE,
+    complement.ParseUnaryComplementInteger: Op.INVERT,
+    bools.ParseUnaryNot:                    Op.NOT,
+    cast.ParseCastIntegerFloat:             Op.FLOAT,
+    cast.ParseCastIntegerBool:              Op.BOOL,
+    cast.ParseCastFloatBool:                Op.BOOL,
+    cast.ParseCastStringBool:               Op.BOOL_STR,
+    cast.ParseCastRegexBool:                Op.BOOL_REGEX,
+    cast.ParseCastStringRegex:              Op.ESCAPE,
+}
+
+# what the operators in BINARY_OPS and UNARY_OPS keep their operands in,
+# cast as `eval` needs them
+class _Binary(Protocol):
+    _left: ParseAtom
+    _right: ParseAtom
+class _Unary(Protocol):
+    _atom: ParseAtom
+
+def _evaluator(atom_type: type) -> type:
+    for parent in atom_type.__mro__:
+        if "eval" in parent.__dict__:
+            return parent
+    return atom_type
+
+# a variable that hasn't been read yet this run
+_UNSET = object()
+
+class Program:
+    __slots__ = ("code", "constants", "variables")
+    def __init__(self,
+            code: "array[int]",
+            constants: List[Any],
+            variables: List[str]):
+        # (op, arg) pairs
+        self.code = code
+        self.constants = constants
+        self.variables = variables
+
+    def __repr__(self) -> str:
+        return f"Program({len(self.code)//2} ops, {len(self.constants)} constants, {self.variables!r})"
+    def __getstate__(self) -> Tuple["array[int]", List[Any], List[str]]:
+        return (self.code, self.constants, self.variables)
+    def __setstate__(self, state: Tuple["array[int]", List[Any], List[str]]):
+        self.code, self.constants, self.variables = state
+
+    def disassemble(self) -> str:
+        lines: List[str] = []
+        for pc in range(0, len(self.code), 2):
+            op, arg = Op(self.code[pc]), self.code[pc+1]
+            line = f"{pc//2:>4} {op.name:<10} {arg}"
+            if op in {Op.CONST, Op.CASEMAP, Op.EVAL}:
+                line += f" ({self.constants[arg]!r})"
+            elif op == Op.LOAD:
+                line += f" ({self.variables[arg]})"
+            elif op in {Op.JUMP_FALSE, Op.JUMP_TRUE}:
+                line += f" (to {arg//2})"
+            lines.append(line)
+        return "\n".join(lines)
+
+    def eval(self, vars: Dict[str, ParseAtom]) -> Any:
+        return self.run([_UNSET] * len(self.variables), vars)
+
+    def run(self, slots: List[Any], vars: Dict[str, ParseAtom]) -> Any:
+        # `slots` holds the value of each of `self.variables`, or _UNSET for
+        # those to be read from `vars` the first time they're needed
+        code      = self.code
+        constants = self.constants
+        unary     = UNARY
+        binary    = BINARY
+        stack: List[Any] = []
+        push      = stack.append
+        pop       = stack.pop
+
+        op_binary = _OP_BINARY
+        op_unary  = _OP_UNARY
+        op_load   = _OP_LOAD
+        op_const  = _OP_CONST
+        op_false  = _OP_JUMP_FALSE
+        op_true   = _OP_JUMP_TRUE
+        op_set    = _OP_BUILD_SET
+        op_cmap   = _OP_CASEMAP
+
+        pc  = 0
+        end = len(code)
+        while pc < end:
+            op  = code[pc]
+            arg = code[pc+1]
+            pc += 2
+
+            if op >= op_binary:
+                right = pop()
+                stack[-1] = binary[op-op_binary](stack[-1], right)
+            elif op == op_load:
+                if (value := slots[arg]) is _UNSET:
+                    name = self.variables[arg]
+                    value = slots[arg] = vars[name].eval(vars)
+                push(value)
+            elif op == op_const:
+                push(constants[arg])
+            elif op >= op_unary:
+                stack[-1] = unary[op-op_unary](stack[-1])
+            elif op == op_false:
+                if not pop():
+                    push(False)
+                    pc = arg
+            elif op == op_true:
+                if pop():
+                    push(True)
+                    pc = arg
+            elif op == op_set:
+                values = stack[-arg:]
+                del stack[-arg:]
+                stack[-1] = SetMembers(stack[-1], values)
+            elif op == op_cmap:
+                stack[-1] = casemap.casemap_regex(stack[-1], *constants[arg])
+            else:
+                push(constants[arg].eval(vars))
+
+        return stack[-1]
+
+def _constants(atom: ParseAtom) -> Dict[int, bool]:
+    # what `is_constant()` would return for `atom` and everything under it,
+    # without recursing
+    constant: Dict[int, bool] = {}
+    work: List[Tuple[ParseAtom, bool]] = [(atom, False)]
+    while work:
+        node, visited = work.pop()
+        if not (children := node.operands()):
+            constant[id(node)] = node.is_constant()
+        elif not visited:
+            work.append((node, True))
+            work.extend((child, False) for child in children)
+        else:
+            constant[id(node)] = all(constant[id(c)] for c in children)
+    return constant
+
+# compiler work items
+_NODE  = 0
+_EMIT  = 1
+_JUMP  = 2
+_LABEL = 3
+
+class _Compiler:
+    def __init__(self):
+        self.code = array("i")
+        self.constants: List[Any] = []
+        self.variables: List[str] = []
+        self._constant_index: Dict[Tuple[type, Any], int] = {}
+        self._variable_index: Dict[str, int] = {}
+        self._constant: Dict[int, bool] = {}
+
+    def constant(self, value: Any) -> int:
+        # type too, so that e.g. 1, 1.0 and True stay separate
+        key: Tuple[type, Any] = (type(value), value)
+        if type(value) is float:
+            # 0.0 == -0.0
+            key = (float, repr(value))
+        else:
+            try:
+                hash(key)
+            except TypeError:
+                key = (type(value), id(value))
+        if (index := self._constant_index.get(key)) is None:
+            index = self._constant_index[key] = len(self.constants)
+            self.constants.append(value)
+        return index
+
+    def variable(self, name: str) -> int:
+        if (index := self._variable_index.get(name)) is None:
+            index = self._variable_index[name] = len(self.variables)
+            self.variables.append(name)
+        return index
+
+    def compile(self, atom: ParseAtom):
+        # an explicit stack rather than recursion, so that there's no limit
+        # on how deep an expression can be
+        self._constant = _constants(atom)
+        work: List[Tuple[int, Any]] = [(_NODE, atom)]
+        while work:
+            kind, item = work.pop()
+            if kind == _NODE:
+                work.extend(reversed(self._node(item)))
+            elif kind == _EMIT:
+                self.code.extend(item)
+            elif kind == _JUMP:
+                op, jumps = item
+                jumps.append(len(self.code))
+                self.code.extend((op, 0))
+            elif kind == _LABEL:
+                for jump in item:
+                    self.code[jump+1] = len(self.code)
+
+    def _node(self, atom: ParseAtom) -> List[Tuple[int, Any]]:
+        if isinstance(atom, ParseVariable):
+            return [(_EMIT, (Op.LOAD, self.variable(atom.name)))]
+
+        evaluator = _evaluator(type(atom))
+        if isinstance(atom, contains.ParseBinaryContainsSet):
+            return [
+                (_NODE, atom._right),
+                (_NODE, atom._left),
+                (_EMIT, (Op.IN_SET, 0))
+            ]
+        elif isinstance(atom, ParseSet):
+            return self._set(atom)
+
+        if self._constant[id(atom)]:
+            try:
+                value = atom.eval({})
+            except Exception:
+                # leave the error for eval time
+                pass
+            else:
+                return [(_EMIT, (Op.CONST, self.constant(value)))]
+
+        if (isinstance(atom, cast.ParseCastStringBool)
+                and isinstance(atom._atom, match.ParseBinaryMatchStringRegex)
+                and atom._atom._string_match is not None):
+            # only whether it matched, not what
+            return [
+                (_NODE, atom._atom._left),
+                (_EMIT, (Op.CONST, self.constant(atom._atom._string_match))),
+                (_EMIT, (Op.TEST_STR, 0))
+            ]
+        elif (isinstance(atom, match.ParseBinaryMatchStringRegex)
+                and atom._string_match is not None):
+            return [
+                (_NODE, atom._left),
+                (_EMIT, (Op.CONST, self.constant(atom._string_match))),
+                (_EMIT, (Op.MATCH_STR, 0))
+            ]
+        elif (isinstance(atom, match.ParseBinaryMatchStringRegex)
+                and atom._prefiltered is not None):
+            return [
+                (_NODE, atom._left),
+                (_EMIT, (Op.CONST, self.constant(atom._prefiltered))),
+                (_EMIT, (Op.MATCH, 0))
+            ]
+        elif (binary := BINARY_OPS.get(evaluator)) is not None:
+            operands = typing.cast(_Binary, atom)
+            return [
+                (_NODE, operands._left),
+                (_NODE, operands._right),
+                (_EMIT, (binary, 0))
+            ]
+        elif (unary := UNARY_OPS.get(evaluator)) is not None:
+            return [(_NODE, typing.cast(_Unary, atom)._atom), (_EMIT, (unary, 0))]
+
+        elif isinstance(atom, (bools.ParseAll, bools.ParseAny)):
+            if isinstance(atom, bools.ParseAll):
+                jump, otherwise = Op.JUMP_FALSE, True
+            else:
+                jump, otherwise = Op.JUMP_TRUE, False
+            jumps: List[int] = []
+            items: List[Tuple[int, Any]] = []
+            for child in atom._atoms:
+                items.append((_NODE, child))
+                items.append((_JUMP, (jump, jumps)))
+            items.append((_EMIT, (Op.CONST, self.constant(otherwise))))
+            items.append((_LABEL, jumps))
+            return items
+
+        elif isinstance(atom, contains.ParseBinaryContainsIPCIDR):
+            return [
+                (_NODE, atom._right),
+                (_NODE, atom._left),
+                (_EMIT, (Op.IN_CIDR, 0))
+            ]
+        elif isinstance(atom, casemap.ParseCasemappedRegex):
+            key = (atom._casemap, atom._casemap_key)
+            return [
+                (_NODE, atom._atom),
+                (_EMIT, (Op.CASEMAP, self.constant(key)))
+            ]
+
+        else:
+            # nothing better to do than let the atom evaluate itself
+            return [(_EMIT, (Op.EVAL, self.constant(atom)))]
+
+    def _set(self, atom: ParseSet) -> List[Tuple[int, Any]]:
+        items: List[Tuple[int, Any]] = [(_EMIT, (Op.CONST, self.constant(atom._constant)))]
+        if atom._atoms:
+            items.extend((_NODE, member) for member in atom._atoms)
+            items.append((_EMIT, (Op.BUILD_SET, len(atom._atoms))))
+        return items
+
+def compile_program(atom: ParseAtom) -> Program:
+    compiler = _Compiler()
+    compiler.compile(atom)
+    return Program(compiler.code, compiler.constants, compiler.variables)
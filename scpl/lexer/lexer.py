@@ -1,5 +1,6 @@
+from array       import array
 from collections import deque
-from typing      import Deque, List, Optional, Tuple
+from typing      import Deque, Dict, Iterator, List, Optional, Tuple, Type
 
 from ..common    import *
 from .tokens     import *
@@ -17,66 +18,120 @@ class LexerUnfinishedError(LexerError):
         self.token = token
         super().__init__(token.index, f"unfinished {type(token).__name__}")
 
+# when more than one token type stops accepting characters at the same index,
+# the one furthest down this list wins
+TOKEN_TYPES: List[Type[Token]] = [
+    TokenRegex,
+    TokenString,
+    TokenIPv4,
+    TokenIPv6,
+    TokenParenthesis,
+    TokenBracket,
+    TokenBrace,
+    TokenWord,
+    TokenOperator,
+    TokenSpace,
+    TokenDuration,
+    TokenHex,
+    TokenNumber,
+]
+
+# (first character, after_operand) to the token types that accept that first
+# character, filled in lazily as characters are seen
+_CANDIDATES: Dict[Tuple[str, bool], List[Type[Token]]] = {}
+
+def _find_candidates(char: str, after_operand: bool) -> List[Type[Token]]:
+    key = (char, after_operand)
+    if (candidates := _CANDIDATES.get(key)) is None:
+        candidates = _CANDIDATES[key] = [
+            token_type for token_type in TOKEN_TYPES
+            if token_type.scan(char, 0, after_operand)[0] > 0
+        ]
+    return candidates
+
+# TOKEN_TYPES index for each token type, used as the `kind` in TokenSpans
+TOKEN_KINDS: Dict[Type[Token], int] = {
+    token_type: kind for kind, token_type in enumerate(TOKEN_TYPES)
+}
+_KINDS_TRANSPARENT = {
+    TOKEN_KINDS[t] for t in TOKEN_TYPES if issubclass(t, TokenTransparent)
+}
+_KINDS_OPERATOR = {
+    TOKEN_KINDS[t] for t in TOKEN_TYPES if issubclass(t, TokenOperator)
+}
+
+class TokenSpans:
+    # every token in `source` as flat (kind, start, end) triples, where
+    # `kind` is an index in to TOKEN_TYPES. Token objects are only created
+    # when the spans are iterated or indexed
+    __slots__ = ("source", "spans")
+
+    def __init__(self, source: str):
+        self.source = source
+        self.spans  = array("L")
+
+    def __repr__(self) -> str:
+        return f"TokenSpans({list(self)!r})"
+    def __len__(self) -> int:
+        return len(self.spans) // 3
+
+    def __getitem__(self, index: int) -> Token:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("token index out of range")
+        kind, start, end = self.spans[index*3:index*3+3]
+        return TOKEN_TYPES[kind](self.source, start, end)
+    def __iter__(self) -> Iterator[Token]:
+        spans = self.spans
+        for i in range(0, len(spans), 3):
+            yield TOKEN_TYPES[spans[i]](self.source, spans[i+1], spans[i+2])
+
+def _spans(expression: str) -> Iterator[Tuple[int, int, int]]:
+    kind_last: Optional[int] = None
+
+    index  = 0
+    length = len(expression)
+    while index < length:
+        after_operand = (kind_last is not None
+            and not kind_last in _KINDS_OPERATOR)
+        candidates    = _find_candidates(expression[index], after_operand)
+        if not candidates:
+            raise LexerError(index, "unknown token")
+
+        # every candidate reads ahead for as long as it accepts characters.
+        # the one that reads furthest is the token, whether it's complete or
+        # not - there is no backtracking to a shorter candidate
+        best_type     = candidates[0]
+        best_end      = index
+        best_complete = False
+        for token_type in candidates:
+            end, complete = token_type.scan(expression, index, after_operand)
+            if end >= best_end:
+                best_type     = token_type
+                best_end      = end
+                best_complete = complete
+
+        if not best_complete:
+            raise LexerUnfinishedError(best_type(expression, index, best_end))
+
+        kind = TOKEN_KINDS[best_type]
+        yield kind, index, best_end
+        if not kind in _KINDS_TRANSPARENT:
+            kind_last = kind
+        index = best_end
+
+def itokenise(expression: str) -> Iterator[Token]:
+    # tokens are only lexed as they're asked for, so this can be handed
+    # straight to parse() and lexing will happen as parsing goes
+    for kind, start, end in _spans(expression):
+        yield TOKEN_TYPES[kind](expression, start, end)
+
+def tokenise_spans(expression: str) -> TokenSpans:
+    out = TokenSpans(expression)
+    for span in _spans(expression):
+        out.spans.extend(span)
+    return out
+
 def tokenise(expression: str) -> Deque[Token]:
-    char_stream       = deque(expression)
-    # empty string used to force all tokens to invalidate/finish at the end of
-    # the expression
-    char_stream.append("")
-    # +1 to account for the above empty string
-    expression_length = len(expression)+1
-
-    tokens_finished:   Deque[Token] = deque()
-    tokens_unfinished: List[Token] = []
-
-    token_text = ""
-    token_last: Optional[Token] = None
-
-    while char_stream:
-        char_index = expression_length - len(char_stream)
-
-        if not tokens_unfinished:
-            token_text = ""
-            tokens_unfinished = [
-                TokenRegex(char_index, token_last),
-                TokenString(char_index, token_last),
-                TokenIPv4(char_index, token_last),
-                TokenIPv6(char_index, token_last),
-                TokenParenthesis(char_index, token_last),
-                TokenBracket(char_index, token_last),
-                TokenBrace(char_index, token_last),
-                TokenWord(char_index, token_last),
-                TokenOperator(char_index, token_last),
-                TokenSpace(char_index, token_last),
-                TokenDuration(char_index, token_last),
-                TokenHex(char_index, token_last),
-                TokenNumber(char_index, token_last),
-            ]
-
-        token_text += char_stream[0]
-        for token in list(tokens_unfinished):
-            error = token.push(char_stream[0])
-
-            if error is not None or not char_stream[0]:
-                tokens_unfinished.remove(token)
-
-                if len(tokens_unfinished) == 0:
-                    # no more valid tokens left
-                    if token.complete:
-                        # the current character failed to be added to the
-                        # current token, but it didn't invalidate the token
-                        tokens_finished.append(token)
-                        if not isinstance(token, TokenTransparent):
-                            token_last = token
-                    elif token_text:
-                        raise LexerUnfinishedError(token)
-                    elif char_stream[0]:
-                        # unrecognised single character
-                        raise LexerError(char_index, "unknown token")
-                    else:
-                        # we've reached "" (end of expression)
-                        char_stream.popleft()
-        else:
-            if tokens_unfinished:
-                char_stream.popleft()
-
-    return tokens_finished
+    return deque(itokenise(expression))
@@ -1,5 +1,5 @@
 import string
-from typing import Optional, Set
+from typing import Optional, Set, Tuple
 from ..common.operators import OPERATORS_BINARY, OPERATORS_UNARY
 
 CHARS_SPACE    = set(" ")
@@ -9,349 +9,393 @@ CHARS_HEX      = set(string.hexdigits)
 OPERATORS_BOTH = set(OPERATORS_BINARY) | set(OPERATORS_UNARY)
 CHARS_OPERATOR = set(op[0] for op in OPERATORS_BOTH)
 
+CHARS_WORD_DIGIT    = CHARS_WORD | CHARS_DIGIT
+CHARS_DURATION      = set("wdhms")
+CHARS_REGEX_NODELIM = CHARS_WORD | CHARS_DIGIT | CHARS_SPACE | set("\\()[]{}")
+
 DELIMS_STRING = {
     '"': '"',
     "'": "'",
     "“": "”"
 }
 
+def _scan_delimited(
+        expression: str,
+        index:      int,
+        delim:      str
+        ) -> Tuple[int, bool]:
+    # find the first `delim` at or after `index` that isn't escaped. the
+    # `delim` search is only redone once we've skipped an escape past it, so
+    # this stays linear no matter how many escapes there are
+    length  = len(expression)
+    delim_i = -1
+    while True:
+        if delim_i < index:
+            delim_i = expression.find(delim, index)
+            if delim_i == -1:
+                return length, False
+
+        escape_i = expression.find("\\", index, delim_i)
+        if escape_i == -1:
+            return delim_i + 1, True
+        else:
+            index = escape_i + 2
+
 class Token:
+    # a token is only a span of `source`. `text` is sliced out on demand so
+    # the lexer doesn't copy every character of the expression
+    __slots__ = ("source", "index", "end")
+
     def __init__(self,
-            index: int,
-            last:  Optional["Token"]):
-        self.index    = index
-        self.last     = last
-        self.text     = ""
-        self.complete = False
+            source: str,
+            index:  int,
+            end:    int):
+        self.source = source
+        self.index  = index
+        self.end    = end
     def __repr__(self) -> str:
         name = self.__class__.__name__.replace("Token", "", 1)
         return f"{name}({self.text})"
-    def push(self, next: str) -> Optional[str]:
-        return None
+    def __eq__(self, other: object) -> bool:
+        return (type(self) == type(other)
+            and isinstance(other, Token)
+            and self.index == other.index
+            and self.end == other.end
+            and self.source == other.source)
+    def __hash__(self) -> int:
+        return hash((type(self), self.index, self.end))
+
+    @property
+    def text(self) -> str:
+        return self.source[self.index:self.end]
+
+    # returns the index of the first character, at or after `index`, that
+    # this token type would not accept and whether the token would be
+    # complete at that point. `after_operand` is whether the last
+    # non-transparent token was something other than an operator
+    @classmethod
+    def scan(cls,
+            expression:    str,
+            index:         int,
+            after_operand: bool
+            ) -> Tuple[int, bool]:
+        return index, False
 
 class TokenTransparent(Token):
-    pass
+    __slots__ = ()
 class TokenSpace(TokenTransparent):
-    def push(self, next: str) -> Optional[str]:
-        if next in CHARS_SPACE:
-            self.text    += next
-            self.complete = True
-            return None
-        else:
-            return "not a space"
+    __slots__ = ()
+
+    @classmethod
+    def scan(cls,
+            expression:    str,
+            index:         int,
+            after_operand: bool
+            ) -> Tuple[int, bool]:
+        end    = index
+        length = len(expression)
+        while end < length and expression[end] in CHARS_SPACE:
+            end += 1
+        return end, end > index
 
 class TokenSingle(Token):
-    def __init__(self,
-            index: int,
-            last: Optional[Token],
-            wanted: Set[str]):
-        super().__init__(index, last)
-        self._wanted = wanted
-    def push(self, next: str) -> Optional[str]:
-        if self.text:
-            return "already finished"
-        elif next in self._wanted:
-            self.text    += next
-            self.complete = True
-            return None
+    __slots__ = ()
+    WANTED: Set[str] = set()
+
+    @classmethod
+    def scan(cls,
+            expression:    str,
+            index:         int,
+            after_operand: bool
+            ) -> Tuple[int, bool]:
+        if expression[index:index+1] in cls.WANTED:
+            return index+1, True
         else:
-            return "not a wanted character"
+            return index, False
 class TokenScope(TokenSingle):
-    pass
+    __slots__ = ()
 class TokenParenthesis(TokenScope):
-    def __init__(self, index: int, last: Optional[Token]):
-        super().__init__(index, last, {"(", ")"})
+    __slots__ = ()
+    WANTED = {"(", ")"}
 class TokenBracket(TokenScope):
-    def __init__(self, index: int, last: Optional[Token]):
-        super().__init__(index, last, {"[", "]"})
+    __slots__ = ()
+    WANTED = {"[", "]"}
 class TokenBrace(TokenScope):
-    def __init__(self, index: int, last: Optional[Token]):
-        super().__init__(index, last, {"{", "}"})
+    __slots__ = ()
+    WANTED = {"{", "}"}
 
 class TokenWord(Token):
-    def push(self, next: str) -> Optional[str]:
-        if (next in CHARS_WORD or
-                (next in CHARS_DIGIT and len(self.text) > 0)):
-            self.text    += next
-            self.complete = True
-            return None
-        else:
-            return "invalid word character"
+    __slots__ = ()
+
+    @classmethod
+    def scan(cls,
+            expression:    str,
+            index:         int,
+            after_operand: bool
+            ) -> Tuple[int, bool]:
+        end    = index
+        length = len(expression)
+        if end < length and expression[end] in CHARS_WORD:
+            end += 1
+            while end < length and expression[end] in CHARS_WORD_DIGIT:
+                end += 1
+        return end, end > index
 
 class TokenOperator(Token):
-    def push(self, next: str) -> Optional[str]:
-        if self.text:
-            if (op := self.text + next) in OPERATORS_BOTH:
-                self.text     = op
-                self.complete = True
-                return None
-            else:
-                return "invalid operator"
-        elif next in CHARS_OPERATOR:
-            self.text     = next
-            self.complete = next in OPERATORS_BOTH
-            return None
-        else:
-            return "not an operator"
+    __slots__ = ()
+
+    @classmethod
+    def scan(cls,
+            expression:    str,
+            index:         int,
+            after_operand: bool
+            ) -> Tuple[int, bool]:
+        text = expression[index:index+1]
+        if not text in CHARS_OPERATOR:
+            return index, False
+
+        end      = index + 1
+        length   = len(expression)
+        complete = text in OPERATORS_BOTH
+        while end < length and (op := text + expression[end]) in OPERATORS_BOTH:
+            text     = op
+            complete = True
+            end     += 1
+        return end, complete
 
 class TokenNumber(Token):
-    def __init__(self,
-            index: int,
-            last:  Optional[Token]):
-        super().__init__(index, last)
-        self._point = False
-
-    def push(self, next: str) -> Optional[str]:
-        if next in CHARS_DIGIT:
-            self.text    += next
-            self.complete = True
-            return None
-        elif next == ".":
-            self.complete = False
-            if not self._point:
-                self.text  += next
-                self._point = True
-                return None
+    __slots__ = ()
+
+    @classmethod
+    def scan(cls,
+            expression:    str,
+            index:         int,
+            after_operand: bool
+            ) -> Tuple[int, bool]:
+        end      = index
+        length   = len(expression)
+        complete = False
+        point    = False
+        while end < length:
+            char = expression[end]
+            if char in CHARS_DIGIT:
+                complete = True
+            elif char == ".":
+                complete = False
+                if point:
+                    # too many points
+                    break
+                point = True
             else:
-                return "too many points"
-        else:
-            if next in CHARS_WORD:
-                self.complete = False
-            return "invalid number character"
+                if char in CHARS_WORD:
+                    complete = False
+                break
+            end += 1
+        return end, complete
 
 class TokenHex(Token):
-    def push(self, next: str) -> Optional[str]:
-        if not self.text:
-            if next == "0":
-                self.text += next
-                return None
-            else:
-                return "not a hex literal"
-        elif self.text == "0":
-            if next == "x":
-                self.text += next
-                return None
-            else:
-                return "not a hex literal"
-        elif len(self.text) > 1:
-            if next in CHARS_HEX:
-                self.text += next
-                self.complete = True
-                return None
+    __slots__ = ()
+
+    @classmethod
+    def scan(cls,
+            expression:    str,
+            index:         int,
+            after_operand: bool
+            ) -> Tuple[int, bool]:
+        if not expression[index:index+1] == "0":
+            return index, False
+        elif not expression[index+1:index+2] == "x":
+            return index+1, False
+
+        end      = index + 2
+        length   = len(expression)
+        complete = False
+        while end < length:
+            char = expression[end]
+            if char in CHARS_HEX:
+                complete = True
             else:
-                if next in CHARS_WORD:
-                    self.complete = False
-                return "not a hex digit"
-        else:
-            return "not a hex literal"
+                if char in CHARS_WORD:
+                    complete = False
+                break
+            end += 1
+        return end, complete
 
 class TokenString(Token):
-    def __init__(self,
-            index: int,
-            last:  Optional[Token]):
-        super().__init__(index, last)
-        self._delim  = ""
-        self._escape = False
-
-    def push(self, next: str) -> Optional[str]:
-        if self.complete:
-            return "string already completed"
-        elif self.text:
-            self.text += next
-            if not self._escape:
-                if next == DELIMS_STRING[self._delim]:
-                    self.complete = True
-                elif next == "\\":
-                    self._escape = True
-            else:
-                self._escape = False
-            return None
-        elif next in DELIMS_STRING:
-            self._delim = next
-            self.text  += next
-            return None
+    __slots__ = ()
+
+    @classmethod
+    def scan(cls,
+            expression:    str,
+            index:         int,
+            after_operand: bool
+            ) -> Tuple[int, bool]:
+        delim = expression[index:index+1]
+        if delim in DELIMS_STRING:
+            return _scan_delimited(expression, index+1, DELIMS_STRING[delim])
         else:
-            return "invalid string delimiter"
+            return index, False
 
 class TokenRegex(Token):
-    def __init__(self,
-            index: int,
-            last:  Optional[Token]):
-        super().__init__(index, last)
-        self._delim  = ""
-        self._escape = False
-
-    def push(self, next: str) -> Optional[str]:
-        if self.complete:
-            if next in CHARS_WORD:
-                self.text += next
-                return None
-            else:
-                return "invalid flag character"
-        elif self.text:
-            self.text += next
-            if not self._escape:
-                if next == self._delim:
-                    self.complete = True
-                elif next == "\\":
-                    self._escape = True
-            else:
-                self._escape = False
-            return None
-        elif next in CHARS_WORD | CHARS_DIGIT | CHARS_SPACE | set("\\()[]{}"):
-            return "invalid regex delimiter"
-        elif next in OPERATORS_UNARY:
-            return "invalid regex delimiter"
-        elif (next in CHARS_OPERATOR
-                and self.last is not None
-                and not isinstance(self.last, TokenOperator)):
-            return "invalid regex delimiter"
-        else:
-            self.text  += next
-            self._delim = next
-            return None
+    __slots__ = ()
+
+    @classmethod
+    def scan(cls,
+            expression:    str,
+            index:         int,
+            after_operand: bool
+            ) -> Tuple[int, bool]:
+        delim = expression[index:index+1]
+        if (not delim
+                or delim in CHARS_REGEX_NODELIM
+                or delim in OPERATORS_UNARY
+                # an operator character after an operand is a binary operator
+                or (delim in CHARS_OPERATOR and after_operand)):
+            return index, False
+
+        end, complete = _scan_delimited(expression, index+1, delim)
+        if complete:
+            length = len(expression)
+            while end < length and expression[end] in CHARS_WORD:
+                # flags
+                end += 1
+        return end, complete
 
 class TokenIPv4(Token):
-    def __init__(self,
-            index: int,
-            last:  Optional[Token]):
-        super().__init__(index, last)
-        self._octet  = ""
-        self._octets = 0
-        self._cidr   = False
-
-    def push(self, next: str) -> Optional[str]:
-        if next == ".":
-            if self._octets == 3:
-                return "too many octets"
-            elif not self._octet:
-                return "empty octet"
-            else:
-                self.text    += next
-                self._octets += 1
-                self._octet   = ""
-                self.complete = False
-                return None
-        elif next == "/":
-            if self._cidr:
-                return "excess cidr delimiter"
-            elif not self.complete:
-                return "invalid position for cidr delimiter"
-            else:
-                self.complete = False
-                self.text += next
-                self._cidr = True
-                return None
-        elif next in CHARS_DIGIT:
-            self._octet += next
-            if self._cidr:
-                self.text += next
-                self.complete = True
-                return None
-            elif 0 <= int(self._octet) <= 255:
-                self.text    += next
-                self.complete = self._octets == 3
-                return None
+    __slots__ = ()
+
+    @classmethod
+    def scan(cls,
+            expression:    str,
+            index:         int,
+            after_operand: bool
+            ) -> Tuple[int, bool]:
+        end      = index
+        length   = len(expression)
+        complete = False
+        octet: Optional[int] = None
+        octets   = 0
+        cidr     = False
+        while end < length:
+            char = expression[end]
+            if char == ".":
+                if octets == 3:
+                    # too many octets
+                    break
+                elif octet is None:
+                    # empty octet
+                    break
+                octets  += 1
+                octet    = None
+                complete = False
+            elif char == "/":
+                if cidr or not complete:
+                    break
+                complete = False
+                cidr     = True
+            elif char in CHARS_DIGIT:
+                if cidr:
+                    complete = True
+                elif (octet := (octet or 0) * 10 + int(char)) <= 255:
+                    complete = octets == 3
+                else:
+                    # octet must be between 0 and 255
+                    complete = False
+                    break
             else:
-                self.complete = False
-                return "octet must be between 0 and 255"
-        else:
-            return "invalid IPv4 character"
+                break
+            end += 1
+        return end, complete
 
 class TokenIPv6(Token):
-    def __init__(self,
-            index: int,
-            last:  Optional[Token]):
-        super().__init__(index, last)
-        self._trunc   = False
-        self._hextet  = ""
-        self._hextets = 0
-        self._cidr    = False
-
-    def push(self, next: str) -> Optional[str]:
-        if next == ":":
-            if not self.text:
-                self.text += next
-                return None
-            elif self._hextets == 7:
-                return "too many hextets"
-            elif self.text[-1] == ":":
-                if self._trunc:
-                    self.complete = False
-                    return "double truncation"
-                elif self._hextets == 6:
-                    self.complete = False
-                    return "insufficient truncation"
+    __slots__ = ()
+
+    @classmethod
+    def scan(cls,
+            expression:    str,
+            index:         int,
+            after_operand: bool
+            ) -> Tuple[int, bool]:
+        end      = index
+        length   = len(expression)
+        complete = False
+        trunc    = False
+        hextet   = 0
+        hextets  = 0
+        cidr     = False
+        while end < length:
+            char = expression[end]
+            if char == ":":
+                if end == index:
+                    pass
+                elif hextets == 7:
+                    # too many hextets
+                    break
+                elif expression[end-1] == ":":
+                    if trunc or hextets == 6:
+                        # double or insufficient truncation
+                        complete = False
+                        break
+                    trunc     = True
+                    hextets  += 2
+                    complete  = True
                 else:
-                    self.text     += next
-                    self._trunc    = True
-                    self._hextets += 2
-                    self.complete  = True
-                    return None
-            else:
-                self.text     += next
-                self._hextet   = ""
-                self._hextets += 1
-                if not self.complete:
-                    self.complete = self._hextets == 7
-                return None
-        elif next == "/":
-            if self._cidr:
-                return "excess cidr delimiter"
-            elif not self.complete:
-                return "invalid position for cidr delimiter"
-            else:
-                self.complete = False
-                self.text += next
-                self._cidr = True
-                return None
-        elif self._cidr:
-            if next in CHARS_DIGIT:
-                self.text += next
-                self.complete = True
-                return None
-            else:
-                return "invalid cidr character"
-        elif next in CHARS_HEX:
-            self._hextet += next
-            if 0 <= int(self._hextet, 16) <= 0xffff:
-                self.text += next
-                return None
+                    hextet    = 0
+                    hextets  += 1
+                    if not complete:
+                        complete = hextets == 7
+            elif char == "/":
+                if cidr or not complete:
+                    break
+                complete = False
+                cidr     = True
+            elif cidr:
+                if char in CHARS_DIGIT:
+                    complete = True
+                else:
+                    break
+            elif char in CHARS_HEX:
+                hextet = hextet * 16 + int(char, 16)
+                if hextet > 0xffff:
+                    # hextet must be between 0 and ffff
+                    complete = False
+                    break
             else:
-                self.complete = False
-                return "hextet must be between 0 and ffff"
-        else:
-            if next in CHARS_WORD:
-                self.complete = False
-            return "invalid IPv6 character"
+                if char in CHARS_WORD:
+                    complete = False
+                break
+            end += 1
+        return end, complete
 
 class TokenDuration(Token):
-    def __init__(self,
-            index: int,
-            last:  Optional[Token]):
-        super().__init__(index, last)
-        self._on_unit = False
-
-    def push(self, next: str) -> Optional[str]:
-        if next.isdigit():
-            self._on_unit = False;
-            self.complete = False
-            self.text += next
-            return None
-        elif not self.text:
-            return "not a duration string"
-        elif next in CHARS_WORD:
-            if next in set("wdhms"):
-                if self._on_unit:
-                    self.complete = False
-                    return "consecutive unit chars"
-                else:
-                    self._on_unit = True;
-                    self.text += next
-                    self.complete = True
-                    return None
+    __slots__ = ()
+
+    @classmethod
+    def scan(cls,
+            expression:    str,
+            index:         int,
+            after_operand: bool
+            ) -> Tuple[int, bool]:
+        end      = index
+        length   = len(expression)
+        complete = False
+        on_unit  = False
+        while end < length:
+            char = expression[end]
+            if char.isdigit():
+                on_unit  = False
+                complete = False
+            elif end == index:
+                # not a duration string
+                break
+            elif char in CHARS_WORD:
+                if on_unit or not char in CHARS_DURATION:
+                    # consecutive or invalid unit chars
+                    complete = False
+                    break
+                on_unit  = True
+                complete = True
             else:
-                self.complete = False
-                return "invalid unit character"
-        else:
-            return "invalid duration chracter"
+                break
+            end += 1
+        return end, complete
@@ -1,12 +1,11 @@
 import json, sys
-from collections import deque
 from time        import monotonic
 from typing      import Dict, List
 
 from .parser     import parse, ParserError
 from .operands   import ParseAtom
 
-from ..lexer          import tokenise, LexerError
+from ..lexer          import itokenise, LexerError
 from ..lexer.__main__ import main_lexer
 
 def main_parser(line: str, vars: Dict[str, ParseAtom]) -> ParseAtom:
@@ -26,16 +25,17 @@ def main_parser(line: str, vars: Dict[str, ParseAtom]) -> ParseAtom:
         print(f"deps    : {sorted(deps)}")
         print(f"duration: {(end-start)*1_000_000:.2f}μs")
 
-        #ast = ast.precompile()
-        #print(f"precomp : {ast!r}")
-        return ast[0]
+        atom = ast[0]
+        print(f"constant: {atom.is_constant()}")
+        atom = atom.precompile()
+        print(f"precomp : {atom!r}")
+        return atom
 
 if __name__ == "__main__":
     vars: Dict[str, ParseAtom] = {}
     if len(sys.argv) > 2:
         for key, value in json.loads(sys.argv[2]).items():
-            tokens = deque(tokenise(value))
-            atoms, deps = parse(tokens, {})
+            atoms, deps = parse(itokenise(value), {})
             vars[key] = atoms[0]
 
     main_parser(sys.argv[1], vars)
@@ -1,4 +1,5 @@
 from ..lexer import Token
+from ..regex.redos import Risk
 
 class ParserError(Exception):
     def __init__(self, token: Token, error: str):
@@ -15,3 +16,10 @@ class ParserTypeError(ParserError):
             token: Token,
             error: str):
         super().__init__(token, error)
+
+class ParserRegexRiskError(ParserError):
+    def __init__(self,
+            token: Token,
+            risk: Risk):
+        super().__init__(token, f"regex could take {risk.name.lower()} time to match")
+        self.risk = risk
@@ -3,10 +3,14 @@ from collections import deque, OrderedDict
 from dataclasses import dataclass
 from socket      import inet_ntop, inet_pton, AF_INET, AF_INET6
 from struct      import pack, unpack
-from typing      import Any, Deque, Dict, List, Optional, Pattern, Set, Tuple, Type
+from typing      import (Any, cast, Deque, Dict, Hashable, List, Optional, Set, Tuple,
+    Type)
 from typing      import OrderedDict as TOrderedDict
+from weakref     import WeakValueDictionary
 
-from ..common.util import with_delimiter
+from ..common.cache     import LRUCache
+from ..common.util      import with_delimiter
+from ..regex.automaton  import compile_linear, CompiledPattern, LINEAR
 
 # used for pretty printing when we don't have a delim already.
 # it'll pick whichever doesn't already exist in the string, or pick [0] and
@@ -18,12 +22,32 @@ class ParseBadOperandError(Exception):
     pass
 
 class ParseAtom:
-    def __eq__(self, other: object):
+    # structural; atoms are equal when they're the same type, have the same
+    # value (if they have one) and have equal operands
+    def __eq__(self, other: object) -> bool:
         return (type(self) == type(other)
-            and hash(self) == hash(other))
+            and self._key() == cast(ParseAtom, other)._key()
+            and self.operands() == cast(ParseAtom, other).operands())
+    def __hash__(self) -> int:
+        return hash((type(self), self._key(), self.operands()))
+
+    # whatever, other than operands, makes this atom different from another
+    # of the same type
+    def _key(self) -> Hashable:
+        return None
+    def operands(self) -> Tuple["ParseAtom", ...]:
+        return ()
+    # swap each operand for mapping[id(operand)], where it has one
+    def replace_operands(self, mapping: Dict[int, "ParseAtom"]):
+        pass
 
     def is_constant(self) -> bool:
         return True
+    def precompile(self) -> "ParseAtom":
+        return self
+
+    def eval(self, vars: Dict[str, "ParseAtom"]) -> Any:
+        raise NotImplementedError()
 
 class ParseBool(ParseAtom):
     def eval(self, vars: Dict[str, ParseAtom]) -> bool:
@@ -34,6 +58,8 @@ class ParseConstBool(ParseBool):
     def __repr__(self) -> str:
         tostr = {True: "true", False: "false"}[self.value]
         return f"Bool({tostr})"
+    def _key(self) -> Hashable:
+        return self.value
 
     @staticmethod
     def from_text(text: str) -> "ParseBool":
@@ -50,8 +76,8 @@ class ParseConstInteger(ParseInteger):
         self.value = value
     def __repr__(self) -> str:
         return f"Integer({self.value})"
-    def __hash__(self) -> int:
-        return hash(self.value)
+    def _key(self) -> Hashable:
+        return self.value
 
     @staticmethod
     def from_text(text: str) -> "ParseInteger":
@@ -96,8 +122,8 @@ class ParseConstFloat(ParseFloat):
         self.value = value
     def __repr__(self) -> str:
         return f"Float({self.value})"
-    def __hash__(self) -> int:
-        return hash(self.value)
+    def _key(self) -> Hashable:
+        return self.value
 
     @staticmethod
     def from_text(text: str) -> "ParseFloat":
@@ -122,8 +148,8 @@ class ParseConstString(ParseString):
             return f"{self.delimiter}{self.value}{self.delimiter}"
         else:
             return with_delimiter(self.value, STRING_DELIMS)
-    def __hash__(self) -> int:
-        return hash(self.value)
+    def _key(self) -> Hashable:
+        return self.value
 
     @staticmethod
     def from_text(text: str) -> "ParseString":
@@ -132,8 +158,26 @@ class ParseConstString(ParseString):
     def eval(self, vars: Dict[str, ParseAtom]) -> str:
         return self.value
 
+# compiled patterns shared between every regex with the same pattern and
+# flags. held weakly so a pattern goes away with the last rule using it.
+# patterns that backtracking could take exponential time on, or that have
+# LINEAR in their flags, are matched by an automaton instead (see
+# `compile_linear`)
+REGEX_POOL: "WeakValueDictionary[Tuple[str, int], CompiledPattern]" = WeakValueDictionary()
+
+def compile_regex(pattern: str, flags: int) -> CompiledPattern:
+    key = (pattern, flags)
+    if (compiled := REGEX_POOL.get(key)) is None:
+        compiled = REGEX_POOL[key] = compile_linear(pattern, flags)
+    return compiled
+
+# patterns built from variables at eval time (e.g. `a + /b/`), keyed on
+# whatever they were built from. shared by every rule in the process; use
+# REGEX_CACHE.resize() to change how many are kept
+REGEX_CACHE: LRUCache[Hashable, CompiledPattern] = LRUCache(4096)
+
 class ParseRegex(ParseAtom):
-    def eval(self, vars: Dict[str, ParseAtom]) -> Pattern:
+    def eval(self, vars: Dict[str, ParseAtom]) -> CompiledPattern:
         raise NotImplementedError()
 class ParseConstRegex(ParseRegex):
     def __init__(self,
@@ -145,6 +189,13 @@ class ParseConstRegex(ParseRegex):
         self.pattern = pattern
         self.flags = flags
 
+        re_flags = 0
+        if "i" in flags:
+            re_flags |= re.I
+        if "l" in flags:
+            re_flags |= LINEAR
+        self.compiled = compile_regex(pattern, re_flags)
+
     def __str__(self) -> str:
         if self.delimiter is not None:
             regex = f"{self.delimiter}{self.pattern}{self.delimiter}"
@@ -155,21 +206,18 @@ class ParseConstRegex(ParseRegex):
 
     def __repr__(self) -> str:
         return f"Regex({str(self)})"
-    def __hash__(self) -> int:
-        return hash((self.pattern, self.flags))
+    def _key(self) -> Hashable:
+        return (self.pattern, frozenset(self.flags))
 
     @staticmethod
-    def from_text(text: str) -> "ParseRegex":
+    def from_text(text: str) -> "ParseConstRegex":
         delim, r = text[0], text[1:]
         r, flags = r.rsplit(delim, 1)
 
         return ParseConstRegex(delim, r, set(flags))
 
-    def eval(self, vars: Dict[str, ParseAtom]) -> Pattern:
-        flags = 0
-        if "i" in self.flags:
-            flags |= re.I
-        return re.compile(self.pattern, flags)
+    def eval(self, vars: Dict[str, ParseAtom]) -> CompiledPattern:
+        return self.compiled
 
 class ParseIP(ParseAtom):
     def eval(self, vars: Dict[str, ParseAtom]) -> int:
@@ -177,8 +225,8 @@ class ParseIP(ParseAtom):
 class ParseConstIP(ParseIP):
     def __init__(self, ip: int):
         self.integer = ip
-    def __hash__(self) -> int:
-        return hash(self.integer)
+    def _key(self) -> Hashable:
+        return self.integer
 
     def eval(self, vars: Dict[str, ParseAtom]) -> int:
         return self.integer
@@ -233,10 +281,8 @@ class ParseConstCIDR(ParseCIDR):
         # & here to remove any host bits
         self.integer = integer & self.mask
 
-        self._hash = hash((self.prefix, self.integer))
-
-    def __hash__(self) -> int:
-        return self._hash
+    def _key(self) -> Hashable:
+        return (self.prefix, self.integer)
 
     def eval(self, vars: Dict[str, ParseAtom]) -> Tuple[int, int]:
         return (self.integer, self.mask)
@@ -1,8 +1,11 @@
 import re
-from typing import Dict, Optional, Pattern
-from .common import ParseBinaryOperator
-from ..operands import ParseAtom, ParseFloat, ParseInteger, ParseRegex, ParseString
+from typing import Dict
+from .common import ParseBinaryOperator, register_binary
+from ...common.operators import OperatorName
+from ..operands import (compile_regex, ParseAtom, ParseFloat, ParseInteger, ParseRegex,
+    ParseString, REGEX_CACHE)
 from .cast import ParseCastIntegerFloat, ParseCastStringRegex
+from ...regex.automaton import CompiledPattern, LINEAR
 
 class ParseBinaryAddIntegerInteger(ParseBinaryOperator, ParseInteger):
     def __init__(self, left: ParseInteger, right: ParseInteger):
@@ -46,6 +49,25 @@ def _reflags(flags: int):
         sflags += "i"
     return sflags
 
+def add_regex(left: CompiledPattern, right: CompiledPattern) -> CompiledPattern:
+    key = ("add", left, right)
+    if (compiled := REGEX_CACHE.get(key)) is not None:
+        return compiled
+
+    common_flags = left.flags & right.flags
+    regex_1      = left.pattern
+    regex_2      = right.pattern
+
+    if uncommon := left.flags - common_flags:
+        regex_1 = f"(?{_reflags(uncommon)}:{regex_1})"
+    if uncommon := right.flags - common_flags:
+        regex_2 = f"(?{_reflags(uncommon)}:{regex_2})"
+
+    # linear if either is, as neither pattern had better be backtracked on
+    common_flags |= (left.flags | right.flags) & LINEAR
+    compiled = REGEX_CACHE[key] = compile_regex(regex_1 + regex_2, common_flags)
+    return compiled
+
 class ParseBinaryAddRegexRegex(ParseBinaryOperator, ParseRegex):
     def __init__(self, left: ParseRegex, right: ParseRegex):
         super().__init__(left, right)
@@ -53,20 +75,8 @@ class ParseBinaryAddRegexRegex(ParseBinaryOperator, ParseRegex):
         self._right = right
     def __repr__(self) -> str:
         return f"Add({self._left!r}, {self._right!r})"
-    def eval(self, vars: Dict[str, ParseAtom]) -> Pattern:
-        left = self._left.eval(vars)
-        right = self._right.eval(vars)
-
-        common_flags = left.flags & right.flags
-        regex_1      = left.pattern
-        regex_2      = right.pattern
-
-        if uncommon := left.flags - common_flags:
-            regex_1 = f"(?{_reflags(uncommon)}:{regex_1})"
-        if uncommon := right.flags - common_flags:
-            regex_2 = f"(?{_reflags(uncommon)}:{regex_2})"
-
-        return re.compile(regex_1 + regex_2, common_flags)
+    def eval(self, vars: Dict[str, ParseAtom]) -> CompiledPattern:
+        return add_regex(self._left.eval(vars), self._right.eval(vars))
 class ParseBinaryAddRegexString(ParseBinaryAddRegexRegex):
     def __init__(self, left: ParseRegex, right: ParseString):
         super().__init__(left, ParseCastStringRegex(right))
@@ -74,34 +84,11 @@ class ParseBinaryAddStringRegex(ParseBinaryAddRegexRegex):
     def __init__(self, left: ParseString, right: ParseRegex):
         super().__init__(ParseCastStringRegex(left), right)
 
-def find_binary_add(left: ParseAtom, right: ParseAtom) -> Optional[ParseAtom]:
-    if isinstance(left, ParseInteger):
-        if isinstance(right, ParseInteger):
-            return ParseBinaryAddIntegerInteger(left, right)
-        elif isinstance(right, ParseFloat):
-            return ParseBinaryAddIntegerFloat(left, right)
-        else:
-            return None
-    elif isinstance(left, ParseFloat):
-        if isinstance(right, ParseFloat):
-            return ParseBinaryAddFloatFloat(left, right)
-        elif isinstance(right, ParseInteger):
-            return ParseBinaryAddFloatInteger(left, right)
-        else:
-            return None
-    elif isinstance(left, ParseString):
-        if isinstance(right, ParseString):
-            return ParseBinaryAddStringString(left, right)
-        elif isinstance(right, ParseRegex):
-            return ParseBinaryAddStringRegex(left, right)
-        else:
-            return None
-    elif isinstance(left, ParseRegex):
-        if isinstance(right, ParseRegex):
-            return ParseBinaryAddRegexRegex(left, right)
-        elif isinstance(right, ParseString):
-            return ParseBinaryAddRegexString(left, right)
-        else:
-            return None
-    else:
-        return None
+register_binary(OperatorName.ADD, ParseInteger, ParseInteger, ParseBinaryAddIntegerInteger)
+register_binary(OperatorName.ADD, ParseInteger, ParseFloat, ParseBinaryAddIntegerFloat)
+register_binary(OperatorName.ADD, ParseFloat, ParseFloat, ParseBinaryAddFloatFloat)
+register_binary(OperatorName.ADD, ParseFloat, ParseInteger, ParseBinaryAddFloatInteger)
+register_binary(OperatorName.ADD, ParseString, ParseString, ParseBinaryAddStringString)
+register_binary(OperatorName.ADD, ParseString, ParseRegex, ParseBinaryAddStringRegex)
+register_binary(OperatorName.ADD, ParseRegex, ParseRegex, ParseBinaryAddRegexRegex)
+register_binary(OperatorName.ADD, ParseRegex, ParseString, ParseBinaryAddRegexString)
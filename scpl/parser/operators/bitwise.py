@@ -1,5 +1,6 @@
-from typing import Dict, Optional
-from .common import ParseBinaryOperator
+from typing import Dict
+from .common import ParseBinaryOperator, register_binary
+from ...common.operators import OperatorName
 from ..operands import ParseAtom, ParseInteger
 
 class ParseBinaryAndIntegerInteger(ParseBinaryOperator, ParseInteger):
@@ -11,11 +12,8 @@ class ParseBinaryAndIntegerInteger(ParseBinaryOperator, ParseInteger):
         return f"And({self._left!r}, {self._right!r})"
     def eval(self, vars: Dict[str, ParseAtom]) -> int:
         return self._left.eval(vars) & self._right.eval(vars)
-def find_binary_and(left: ParseAtom, right: ParseAtom) -> Optional[ParseAtom]:
-    if isinstance(left, ParseInteger) and isinstance(right, ParseInteger):
-        return ParseBinaryAndIntegerInteger(left, right)
-    else:
-        return None
+register_binary(OperatorName.AND, ParseInteger, ParseInteger,
+    ParseBinaryAndIntegerInteger)
 
 class ParseBinaryOrIntegerInteger(ParseBinaryOperator, ParseInteger):
     def __init__(self, left: ParseInteger, right: ParseInteger):
@@ -26,11 +24,8 @@ class ParseBinaryOrIntegerInteger(ParseBinaryOperator, ParseInteger):
         return f"Or({self._left!r}, {self._right!r})"
     def eval(self, vars: Dict[str, ParseAtom]) -> int:
         return self._left.eval(vars) | self._right.eval(vars)
-def find_binary_or(left: ParseAtom, right: ParseAtom) -> Optional[ParseAtom]:
-    if isinstance(left, ParseInteger) and isinstance(right, ParseInteger):
-        return ParseBinaryOrIntegerInteger(left, right)
-    else:
-        return None
+register_binary(OperatorName.OR, ParseInteger, ParseInteger,
+    ParseBinaryOrIntegerInteger)
 
 class ParseBinaryXorIntegerInteger(ParseBinaryOperator, ParseInteger):
     def __init__(self, left: ParseInteger, right: ParseInteger):
@@ -41,11 +36,8 @@ class ParseBinaryXorIntegerInteger(ParseBinaryOperator, ParseInteger):
         return f"Xor({self._left!r}, {self._right!r})"
     def eval(self, vars: Dict[str, ParseAtom]) -> int:
         return self._left.eval(vars) ^ self._right.eval(vars)
-def find_binary_xor(left: ParseAtom, right: ParseAtom) -> Optional[ParseAtom]:
-    if isinstance(left, ParseInteger) and isinstance(right, ParseInteger):
-        return ParseBinaryXorIntegerInteger(left, right)
-    else:
-        return None
+register_binary(OperatorName.XOR, ParseInteger, ParseInteger,
+    ParseBinaryXorIntegerInteger)
 
 class ParseBinaryLeftIntegerInteger(ParseBinaryOperator, ParseInteger):
     def __init__(self, left: ParseInteger, right: ParseInteger):
@@ -56,11 +48,8 @@ class ParseBinaryLeftIntegerInteger(ParseBinaryOperator, ParseInteger):
         return f"Left({self._left!r}, {self._right!r})"
     def eval(self, vars: Dict[str, ParseAtom]) -> int:
         return self._left.eval(vars) << self._right.eval(vars)
-def find_binary_left(left: ParseAtom, right: ParseAtom) -> Optional[ParseAtom]:
-    if isinstance(left, ParseInteger) and isinstance(right, ParseInteger):
-        return ParseBinaryLeftIntegerInteger(left, right)
-    else:
-        return None
+register_binary(OperatorName.LEFT, ParseInteger, ParseInteger,
+    ParseBinaryLeftIntegerInteger)
 
 class ParseBinaryRightIntegerInteger(ParseBinaryOperator, ParseInteger):
     def __init__(self, left: ParseInteger, right: ParseInteger):
@@ -71,8 +60,5 @@ class ParseBinaryRightIntegerInteger(ParseBinaryOperator, ParseInteger):
         return f"Right({self._left!r}, {self._right!r})"
     def eval(self, vars: Dict[str, ParseAtom]) -> int:
         return self._left.eval(vars) >> self._right.eval(vars)
-def find_binary_right(left: ParseAtom, right: ParseAtom) -> Optional[ParseAtom]:
-    if isinstance(left, ParseInteger) and isinstance(right, ParseInteger):
-        return ParseBinaryRightIntegerInteger(left, right)
-    else:
-        return None
+register_binary(OperatorName.RIGHT, ParseInteger, ParseInteger,
+    ParseBinaryRightIntegerInteger)
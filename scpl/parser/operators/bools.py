@@ -1,27 +1,91 @@
-from typing import Dict, Optional, Tuple
-from .common import ParseBinaryOperator, ParseUnaryOperator
+from typing import cast, Dict, List, Optional, Tuple, Type, Union
+from .common import (fold_constant, ParseOperator, ParseUnaryOperator,
+    register_binary, register_unary)
+from ...common.operators import OperatorName
 from .cast import find_cast_bool
-from ..operands import ParseAtom, ParseBool
+from ..operands import ParseAtom, ParseBool, ParseConstBool
 
-class ParseBinaryBoth(ParseBinaryOperator, ParseBool):
-    def __init__(self, left: ParseBool, right: ParseBool):
-        super().__init__(left, right)
-        self._left = left
-        self._right = right
-    def __repr__(self):
-        return f"Both({self._left!r}, {self._right!r})"
+class ParseAll(ParseOperator, ParseBool):
+    # `a && b && c`, flattened so that long chains are evaluated in a loop
+    # rather than one nested call per operand
+    def __init__(self, atoms: List[ParseBool]):
+        self._atoms = atoms
+    def __repr__(self) -> str:
+        return f"All({', '.join(repr(a) for a in self._atoms)})"
+    def operands(self) -> Tuple[ParseAtom, ...]:
+        return tuple(self._atoms)
+    def replace_operands(self, mapping: Dict[int, ParseAtom]):
+        self._atoms = [cast(ParseBool, mapping.get(id(a), a)) for a in self._atoms]
+    def is_constant(self) -> bool:
+        return all(atom.is_constant() for atom in self._atoms)
+    def precompile(self) -> ParseAtom:
+        return _precompile_chain(self, False)
     def eval(self, vars: Dict[str, ParseAtom]) -> bool:
-        return self._left.eval(vars) and self._right.eval(vars)
+        for atom in self._atoms:
+            if not atom.eval(vars):
+                return False
+        return True
 
-class ParseBinaryEither(ParseBinaryOperator, ParseBool):
-    def __init__(self, left: ParseBool, right: ParseBool):
-        super().__init__(left, right)
-        self._left = left
-        self._right = right
-    def __repr__(self):
-        return f"Either({self._left!r}, {self._right!r})"
+class ParseAny(ParseOperator, ParseBool):
+    # `a || b || c`, flattened as above
+    def __init__(self, atoms: List[ParseBool]):
+        self._atoms = atoms
+    def __repr__(self) -> str:
+        return f"Any({', '.join(repr(a) for a in self._atoms)})"
+    def operands(self) -> Tuple[ParseAtom, ...]:
+        return tuple(self._atoms)
+    def replace_operands(self, mapping: Dict[int, ParseAtom]):
+        self._atoms = [cast(ParseBool, mapping.get(id(a), a)) for a in self._atoms]
+    def is_constant(self) -> bool:
+        return all(atom.is_constant() for atom in self._atoms)
+    def precompile(self) -> ParseAtom:
+        return _precompile_chain(self, True)
     def eval(self, vars: Dict[str, ParseAtom]) -> bool:
-        return self._left.eval(vars) or self._right.eval(vars)
+        for atom in self._atoms:
+            if atom.eval(vars):
+                return True
+        return False
+
+class ParseBinaryBoth(ParseAll):
+    def __init__(self, left: ParseBool, right: ParseBool):
+        super().__init__([left, right])
+    def __repr__(self) -> str:
+        return f"Both({', '.join(repr(a) for a in self._atoms)})"
+
+class ParseBinaryEither(ParseAny):
+    def __init__(self, left: ParseBool, right: ParseBool):
+        super().__init__([left, right])
+    def __repr__(self) -> str:
+        return f"Either({', '.join(repr(a) for a in self._atoms)})"
+
+def _precompile_chain(
+        chain: Union[ParseAll, ParseAny], stop: bool) -> ParseAtom:
+
+    if (chain.is_constant()
+            and (folded := fold_constant(chain)) is not chain):
+        return folded
+
+    # constants that can't short-circuit are dropped. the first one that
+    # can makes everything after it unreachable, but anything before it
+    # still has to be evaluated in case it raises
+    atoms: List[ParseBool] = []
+    for atom in chain._atoms:
+        # folding a bool gives a bool
+        atom = cast(ParseBool, atom.precompile())
+        if isinstance(atom, ParseConstBool):
+            if atom.eval({}) == stop:
+                atoms.append(atom)
+                break
+        else:
+            atoms.append(atom)
+
+    if not atoms:
+        return ParseConstBool(not stop)
+    elif len(atoms) == 1:
+        return atoms[0]
+    else:
+        chain._atoms = atoms
+        return chain
 
 def _double_cast(
         aleft: ParseAtom, aright: ParseAtom
@@ -38,17 +102,41 @@ def _cast(aatom: ParseAtom) -> Optional[ParseBool]:
     else:
         return None
 
-def find_binary_both(left: ParseAtom, right: ParseAtom) -> Optional[ParseBool]:
-    if (dcast := _double_cast(left, right)) is not None:
-        return ParseBinaryBoth(*dcast)
+def _flatten(atom: ParseBool, chain: Type) -> List[ParseBool]:
+    if isinstance(atom, chain):
+        return atom._atoms
     else:
-        return None
+        return [atom]
+
+def _chain(
+        left: ParseBool, right: ParseBool, chain: Type, binary: Type) -> ParseBool:
+
+    if isinstance(left, chain) and not isinstance(left, binary):
+        # a chain this parse built from the operators to the left, which
+        # nothing else holds, so it's extended rather than copied; copying
+        # makes parsing a long chain quadratic
+        left._atoms.extend(_flatten(right, chain))
+        return left
+    elif isinstance(left, chain) or isinstance(right, chain):
+        return chain(_flatten(left, chain) + _flatten(right, chain))
+    else:
+        return binary(left, right)
 
-def find_binary_either(left: ParseAtom, right: ParseAtom) -> Optional[ParseBool]:
-    if (dcast := _double_cast(left, right)) is not None:
-        return ParseBinaryEither(*dcast)
+def _both(left: ParseAtom, right: ParseAtom) -> Optional[ParseBool]:
+    if (dcast := _double_cast(left, right)) is None:
+        return None
     else:
+        return _chain(*dcast, ParseAll, ParseBinaryBoth)
+
+def _either(left: ParseAtom, right: ParseAtom) -> Optional[ParseBool]:
+    if (dcast := _double_cast(left, right)) is None:
         return None
+    else:
+        return _chain(*dcast, ParseAny, ParseBinaryEither)
+
+# anything that can be cast to a bool
+register_binary(OperatorName.BOTH, ParseAtom, ParseAtom, _both)
+register_binary(OperatorName.EITHER, ParseAtom, ParseAtom, _either)
 
 class ParseUnaryNot(ParseUnaryOperator, ParseBool):
     def __init__(self, atom: ParseBool):
@@ -59,8 +147,10 @@ class ParseUnaryNot(ParseUnaryOperator, ParseBool):
     def eval(self, vars: Dict[str, ParseAtom]) -> bool:
         return not self._atom.eval(vars)
 
-def find_unary_not(atom: ParseAtom) -> Optional[ParseBool]:
+def _not(atom: ParseAtom) -> Optional[ParseBool]:
     if (cast := _cast(atom)) is not None:
         return ParseUnaryNot(cast)
     else:
         return None
+
+register_unary(OperatorName.NOT, ParseAtom, _not)
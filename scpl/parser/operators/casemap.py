@@ -1,25 +1,78 @@
 import re
-from typing import Dict, Pattern
-from ..operands import ParseAtom, ParseRegex
-from ... import regex
+from typing import cast, Dict, FrozenSet, Hashable, Optional, Tuple
+from .common import fold_constant
+from ..operands import compile_regex, ParseAtom, ParseConstRegex, ParseRegex
+from ...common.cache import LRUCache
+from ...regex import lexer as regex_lexer, translator as regex_translator
+from ...regex.automaton import CompiledPattern
+
+# translated patterns for casemapped regexes that aren't known until eval,
+# keyed on (pattern, flags, casemap)
+CASEMAP_CACHE: LRUCache[Tuple[str, int, FrozenSet[Tuple[int, str]]], CompiledPattern] = LRUCache(1024)
+
+def translate_casemap(compiled: CompiledPattern, casemap: Dict[int, str]) -> CompiledPattern:
+    if compiled.flags & re.I:
+        # because this is about case insensitivity, the replacement for `k` should
+        # include `k` - i.e. a casemap of a:A should translate `a` in to `aA`
+        casemap_i = {k: f"{chr(k)}{v}" for k, v in casemap.items()}
+        tokens = regex_translator.translate(
+            regex_lexer.tokenise(compiled.pattern),
+            casemap
+        )
+        newregex = "".join(t.text for t in tokens)
+        return compile_regex(newregex, compiled.flags & ~re.I)
+    else:
+        return compiled
+
+# `casemap_key` is `frozenset(casemap.items())`, which callers should keep
+# rather than build on every call
+def casemap_regex(
+        compiled: CompiledPattern, casemap: Dict[int, str],
+        casemap_key: FrozenSet[Tuple[int, str]]) -> CompiledPattern:
+
+    if compiled.flags & re.I:
+        key = (compiled.pattern, compiled.flags, casemap_key)
+        if (translated := CASEMAP_CACHE.get(key)) is None:
+            translated = CASEMAP_CACHE[key] = translate_casemap(compiled, casemap)
+        return translated
+    else:
+        return compiled
 
 class ParseCasemappedRegex(ParseRegex):
     def __init__(self, atom: ParseRegex, casemap: Dict[int, str]):
         self._atom = atom
         self._casemap = casemap
+        # frozensets cache their hash, so this is cheap to key on every eval
+        self._casemap_key = frozenset(casemap.items())
+
+        self._compiled: Optional[CompiledPattern] = None
+        if isinstance(atom, ParseConstRegex):
+            self._compiled = self._translate(atom.compiled)
+
     def __repr__(self) -> str:
         return f"Casemapped({self._atom!r}, {self._casemap!r})"
-    def eval(self, vars: Dict[str, ParseAtom]) -> Pattern:
-        compiled = self._atom.eval(vars)
-        if compiled.flags & re.I:
-            # because this is about case insensitivity, the replacement for `k` should
-            # include `k` - i.e. a casemap of a:A should translate `a` in to `aA`
-            casemap = {k: f"{chr(k)}{v}" for k, v in self._casemap.items()}
-            tokens = regex.translator.translate(
-                regex.lexer.tokenise(compiled.pattern),
-                self._casemap
-            )
-            newregex = "".join(t.text for t in tokens)
-            return re.compile(newregex, compiled.flags & ~re.I)
+    def _key(self) -> Hashable:
+        return self._casemap_key
+    def operands(self) -> Tuple[ParseAtom, ...]:
+        return (self._atom,)
+    def replace_operands(self, mapping: Dict[int, ParseAtom]):
+        self._atom = cast(ParseRegex, mapping.get(id(self._atom), self._atom))
+    def is_constant(self) -> bool:
+        return self._atom.is_constant()
+    def precompile(self) -> ParseAtom:
+        if (self.is_constant()
+                and (folded := fold_constant(self)) is not self):
+            return folded
+        else:
+            # folding a regex gives a regex
+            self._atom = cast(ParseRegex, self._atom.precompile())
+            return self
+
+    def _translate(self, compiled: CompiledPattern) -> CompiledPattern:
+        return translate_casemap(compiled, self._casemap)
+
+    def eval(self, vars: Dict[str, ParseAtom]) -> CompiledPattern:
+        if self._compiled is not None:
+            return self._compiled
         else:
-            return compiled
+            return casemap_regex(self._atom.eval(vars), self._casemap, self._casemap_key)
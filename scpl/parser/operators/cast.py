@@ -1,8 +1,15 @@
-from re import compile as re_compile, escape as re_escape
-from typing import Dict, Optional, Pattern
+from re import escape as re_escape
+from typing import Dict, Optional
 from .common import ParseUnaryOperator
-from ..operands import (ParseAtom, ParseBool, ParseFloat, ParseInteger, ParseIPv4,
-    ParseIPv6, ParseRegex, ParseString)
+from ..operands import (compile_regex, ParseAtom, ParseBool, ParseFloat, ParseInteger,
+    ParseRegex, ParseString, REGEX_CACHE)
+from ...regex.automaton import CompiledPattern
+
+def escape_regex(value: str) -> CompiledPattern:
+    key = ("escape", value)
+    if (compiled := REGEX_CACHE.get(key)) is None:
+        compiled = REGEX_CACHE[key] = compile_regex(re_escape(value), 0)
+    return compiled
 
 class ParseCastIntegerFloat(ParseUnaryOperator, ParseFloat):
     def __init__(self, atom: ParseInteger):
@@ -19,8 +26,8 @@ class ParseCastStringRegex(ParseUnaryOperator, ParseRegex):
         self._atom = atom
     def __repr__(self) -> str:
         return f"CastRegex({self._atom!r})"
-    def eval(self, vars: Dict[str, ParseAtom]) -> Pattern:
-        return re_compile(re_escape(self._atom.eval(vars)))
+    def eval(self, vars: Dict[str, ParseAtom]) -> CompiledPattern:
+        return escape_regex(self._atom.eval(vars))
 
 class ParseCastStringBool(ParseUnaryOperator, ParseBool):
     def __init__(self, atom: ParseString):
@@ -55,50 +62,6 @@ class ParseCastFloatBool(ParseUnaryOperator, ParseBool):
     def eval(self, vars: Dict[str, ParseAtom]) -> bool:
         return not (self._atom.eval(vars) == 0.0)
 
-class ParseCastHash(ParseUnaryOperator):
-    def __init__(self, atom: ParseAtom):
-        self.atom = atom
-    def __repr__(self) -> str:
-        return f"CastHash({self.atom!r})"
-    def eval(self, vars: Dict[str, ParseAtom]) -> int:
-        raise NotImplementedError()
-class ParseCastHashInteger(ParseCastHash, ParseInteger):
-    def __init__(self, atom: ParseInteger):
-        super().__init__(atom)
-        self._atom = atom
-    def eval(self, vars: Dict[str, ParseAtom]) -> int:
-        return hash(self._atom.eval(vars))
-class ParseCastHashFloat(ParseCastHash, ParseInteger):
-    def __init__(self, atom: ParseFloat):
-        super().__init__(atom)
-        self._atom = atom
-    def eval(self, vars: Dict[str, ParseAtom]) -> int:
-        return hash(self._atom.eval(vars))
-class ParseCastHashString(ParseCastHash, ParseInteger):
-    def __init__(self, atom: ParseString):
-        super().__init__(atom)
-        self._atom = atom
-    def eval(self, vars: Dict[str, ParseAtom]) -> int:
-        return hash(self._atom.eval(vars))
-class ParseCastHashRegex(ParseCastHash, ParseInteger):
-    def __init__(self, atom: ParseRegex):
-        super().__init__(atom)
-        self._atom = atom
-    def eval(self, vars: Dict[str, ParseAtom]) -> int:
-        return hash(self._atom.eval(vars))
-class ParseCastHashIPv4(ParseCastHash, ParseInteger):
-    def __init__(self, atom: ParseIPv4):
-        super().__init__(atom)
-        self._atom = atom
-    def eval(self, vars: Dict[str, ParseAtom]) -> int:
-        return hash(self._atom.eval(vars))
-class ParseCastHashIPv6(ParseCastHash, ParseInteger):
-    def __init__(self, atom: ParseIPv6):
-        super().__init__(atom)
-        self._atom = atom
-    def eval(self, vars: Dict[str, ParseAtom]) -> int:
-        return hash(self._atom.eval(vars))
-
 def find_cast_bool(atom: ParseAtom) -> Optional[ParseBool]:
     if isinstance(atom, ParseBool):
         return atom
@@ -112,13 +75,3 @@ def find_cast_bool(atom: ParseAtom) -> Optional[ParseBool]:
         return ParseCastFloatBool(atom)
     else:
         return None
-
-def find_cast_hash(atom: ParseAtom) -> Optional[ParseCastHash]:
-    if isinstance(atom, ParseInteger):
-        return ParseCastHashInteger(atom)
-    elif isinstance(atom, ParseString):
-        return ParseCastHashString(atom)
-    elif isinstance(atom, ParseRegex):
-        return ParseCastHashRegex(atom)
-    else:
-        return None
@@ -1,15 +1,79 @@
-from typing import Any, Dict
-from ..operands import ParseAtom
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+from ..operands import (ParseAtom, ParseBool, ParseConstBool, ParseConstFloat,
+    ParseConstInteger, ParseConstIPv4, ParseConstIPv6, ParseConstRegex,
+    ParseConstString, ParseFloat, ParseInteger, ParseIPv4, ParseIPv6, ParseRegex,
+    ParseString)
+from ...common.operators import OperatorName
+from ...regex.automaton  import LINEAR
+
+def fold_constant(atom: ParseAtom) -> ParseAtom:
+    # evaluate a constant atom once and return the ParseConst* equivalent of
+    # the result. if it can't be evaluated (e.g. `1 / 0`) leave it as it is,
+    # so that the error still happens at eval time
+    try:
+        value = atom.eval({})
+    except Exception:
+        return atom
+
+    if isinstance(atom, ParseBool):
+        return ParseConstBool(value)
+    elif isinstance(atom, ParseInteger):
+        return ParseConstInteger(value)
+    elif isinstance(atom, ParseFloat):
+        return ParseConstFloat(value)
+    elif isinstance(atom, ParseString):
+        return ParseConstString(None, value)
+    elif isinstance(atom, ParseRegex):
+        flags = set()
+        if value.flags & re.I:
+            flags.add("i")
+        if value.flags & LINEAR:
+            flags.add("l")
+        return ParseConstRegex(None, value.pattern, flags)
+    elif isinstance(atom, ParseIPv4):
+        return ParseConstIPv4(value)
+    elif isinstance(atom, ParseIPv6):
+        return ParseConstIPv6(value)
+    else:
+        return atom
 
 class ParseOperator(ParseAtom):
     def eval(self, vars: Dict[str, ParseAtom]) -> Any:
         raise NotImplementedError()
 
+    def precompile(self) -> ParseAtom:
+        if (self.is_constant()
+                and (folded := fold_constant(self)) is not self):
+            return folded
+        else:
+            self._precompile_operands()
+            return self
+
+    def _precompile_operands(self):
+        # an operand can be there more than once (e.g. once interned), so
+        # precompile each once
+        precompiled: Dict[int, ParseAtom] = {}
+        for operand in self.operands():
+            if not id(operand) in precompiled:
+                precompiled[id(operand)] = operand.precompile()
+        self.replace_operands(precompiled)
+
 class ParseBinaryOperator(ParseOperator):
     def __init__(self, left: ParseAtom, right: ParseAtom):
         self._base_left = left
         self._base_right = right
 
+    def operands(self) -> Tuple[ParseAtom, ...]:
+        return (self._base_left, self._base_right)
+    def replace_operands(self, mapping: Dict[int, ParseAtom]):
+        left = mapping.get(id(self._base_left), self._base_left)
+        right = mapping.get(id(self._base_right), self._base_right)
+        self._base_left = left
+        self._base_right = right
+        # subclasses keep the same operands, typed, as `_left` and `_right`
+        setattr(self, "_left", left)
+        setattr(self, "_right", right)
     def is_constant(self) -> bool:
         return self._base_left.is_constant() and self._base_right.is_constant()
 
@@ -17,6 +81,79 @@ class ParseUnaryOperator(ParseOperator):
     def __init__(self, atom: ParseAtom):
         self._base_atom = atom
 
+    def operands(self) -> Tuple[ParseAtom, ...]:
+        return (self._base_atom,)
+    def replace_operands(self, mapping: Dict[int, ParseAtom]):
+        atom = mapping.get(id(self._base_atom), self._base_atom)
+        self._base_atom = atom
+        # and as `_atom`
+        setattr(self, "_atom", atom)
     def is_constant(self) -> bool:
         return self._base_atom.is_constant()
 
+# an operator's atom class, or a function that picks one, given its operands.
+# returning None means the operands are invalid for the operator
+OperatorFactory = Callable[..., Optional[ParseAtom]]
+
+# registered in order of precedence; the first registration whose types the
+# operands are instances of wins
+_BINARY: Dict[OperatorName, List[Tuple[Type, Type, OperatorFactory]]] = {}
+_UNARY: Dict[OperatorName, List[Tuple[Type, OperatorFactory]]] = {}
+# resolutions of the above for concrete operand classes
+_BINARY_RESOLVED: Dict[Tuple[OperatorName, Type, Type], Optional[OperatorFactory]] = {}
+_UNARY_RESOLVED: Dict[Tuple[OperatorName, Type], Optional[OperatorFactory]] = {}
+
+def register_binary(
+        op_name: OperatorName, left: Type, right: Type, factory: OperatorFactory):
+    _BINARY.setdefault(op_name, []).append((left, right, factory))
+    _BINARY_RESOLVED.clear()
+
+def register_unary(op_name: OperatorName, atom: Type, factory: OperatorFactory):
+    _UNARY.setdefault(op_name, []).append((atom, factory))
+    _UNARY_RESOLVED.clear()
+
+def _resolve_binary(
+        op_name: OperatorName, left: ParseAtom, right: ParseAtom
+        ) -> Optional[OperatorFactory]:
+    for left_type, right_type, factory in _BINARY.get(op_name, []):
+        if isinstance(left, left_type) and isinstance(right, right_type):
+            return factory
+    return None
+
+def _resolve_unary(
+        op_name: OperatorName, atom: ParseAtom
+        ) -> Optional[OperatorFactory]:
+    for atom_type, factory in _UNARY.get(op_name, []):
+        if isinstance(atom, atom_type):
+            return factory
+    return None
+
+def find_binary_operator(
+        op_name: OperatorName, left: ParseAtom, right: ParseAtom
+        ) -> Optional[ParseAtom]:
+
+    key = (op_name, type(left), type(right))
+    if key in _BINARY_RESOLVED:
+        factory = _BINARY_RESOLVED[key]
+    else:
+        factory = _BINARY_RESOLVED[key] = _resolve_binary(op_name, left, right)
+
+    if factory is not None:
+        return factory(left, right)
+    else:
+        return None
+
+def find_unary_operator(
+        op_name: OperatorName, atom: ParseAtom
+        ) -> Optional[ParseAtom]:
+
+    key = (op_name, type(atom))
+    if key in _UNARY_RESOLVED:
+        factory = _UNARY_RESOLVED[key]
+    else:
+        factory = _UNARY_RESOLVED[key] = _resolve_unary(op_name, atom)
+
+    if factory is not None:
+        return factory(atom)
+    else:
+        return None
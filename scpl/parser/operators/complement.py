@@ -1,5 +1,6 @@
-from typing import Dict, Optional
-from .common import ParseUnaryOperator
+from typing import Dict
+from .common import ParseUnaryOperator, register_unary
+from ...common.operators import OperatorName
 from ..operands import ParseAtom, ParseInteger, ParseRegex
 
 class ParseUnaryComplementInteger(ParseUnaryOperator, ParseInteger):
@@ -12,8 +13,4 @@ class ParseUnaryComplementInteger(ParseUnaryOperator, ParseInteger):
         return ~self._atom.eval(vars)
 
 
-def find_unary_complement(atom: ParseAtom) -> Optional[ParseAtom]:
-    if isinstance(atom, ParseInteger):
-        return ParseUnaryComplementInteger(atom)
-    else:
-        return None
+register_unary(OperatorName.COMPLEMENT, ParseInteger, ParseUnaryComplementInteger)
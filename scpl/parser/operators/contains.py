@@ -1,14 +1,16 @@
-from typing import Dict, Optional
-from .common import ParseBinaryOperator
+from typing import Dict, Union
+from .common import ParseBinaryOperator, register_binary
+from ...common.operators import OperatorName
 from ..operands import (ParseAtom, ParseBool, ParseCIDR, ParseCIDRv4, ParseCIDRv6,
     ParseFloat, ParseInteger, ParseIP, ParseIPv4, ParseIPv6, ParseString)
-from .set import (ParseSet, ParseSetInteger, ParseSetIPv4, ParseSetIPv6, ParseSetFloat,
+from .set import (ParseNamedSet, ParseNamedSetInteger, ParseNamedSetIPv4,
+    ParseNamedSetIPv6, ParseNamedSetString, ParseSet, ParseSetCIDR, ParseSetCIDRv4,
+    ParseSetCIDRv6, ParseSetInteger, ParseSetIPv4, ParseSetIPv6, ParseSetFloat,
     ParseSetString)
-from .cast import (ParseCastHash, ParseCastHashFloat, ParseCastHashInteger,
-    ParseCastHashIPv4, ParseCastHashIPv6, ParseCastHashString)
 
 class ParseBinaryContainsStringString(ParseBinaryOperator, ParseBool):
     def __init__(self, left: ParseString, right: ParseString):
+        super().__init__(left, right)
         self._left = left
         self._right = right
     def __repr__(self) -> str:
@@ -28,8 +30,19 @@ class ParseBinaryContainsIPCIDR(ParseBinaryOperator, ParseBool):
         network_l = self._left.eval(vars) & mask
         return network_l == network_r
 
-class ParseBinaryContainsHashSet(ParseBinaryOperator, ParseBool):
-    def __init__(self, left: ParseCastHash, right: ParseSet):
+class ParseBinaryContainsIPCIDRSet(ParseBinaryOperator, ParseBool):
+    def __init__(self, left: ParseIP, right: ParseSetCIDR):
+        super().__init__(left, right)
+        self._left = left
+        self._right = right
+    def __repr__(self) -> str:
+        return f"Contains({self._left!r}, {self._right!r})"
+    def eval(self, vars: Dict[str, ParseAtom]) -> bool:
+        return self._left.eval(vars) in self._right.eval(vars)
+
+class ParseBinaryContainsSet(ParseBinaryOperator, ParseBool):
+    def __init__(self, left: ParseAtom, right: Union[ParseSet, ParseNamedSet]):
+        super().__init__(left, right)
         self._left = left
         self._right = right
     def __repr__(self) -> str:
@@ -38,39 +51,61 @@ class ParseBinaryContainsHashSet(ParseBinaryOperator, ParseBool):
         right = self._right.eval(vars)
         return self._left.eval(vars) in right
 
-class ParseBinaryContainsIntegerSet(ParseBinaryContainsHashSet):
+class ParseBinaryContainsIntegerSet(ParseBinaryContainsSet):
     def __init__(self, left: ParseInteger, right: ParseSetInteger):
-        super().__init__(ParseCastHashInteger(left), right)
-class ParseBinaryContainsFloatSet(ParseBinaryContainsHashSet):
+        super().__init__(left, right)
+class ParseBinaryContainsFloatSet(ParseBinaryContainsSet):
     def __init__(self, left: ParseFloat, right: ParseSetFloat):
-        super().__init__(ParseCastHashFloat(left), right)
-class ParseBinaryContainsStringSet(ParseBinaryContainsHashSet):
+        super().__init__(left, right)
+class ParseBinaryContainsStringSet(ParseBinaryContainsSet):
     def __init__(self, left: ParseString, right: ParseSetString):
-        super().__init__(ParseCastHashString(left), right)
-class ParseBinaryContainsIPv4Set(ParseBinaryContainsHashSet):
+        super().__init__(left, right)
+class ParseBinaryContainsIPv4Set(ParseBinaryContainsSet):
     def __init__(self, left: ParseIPv4, right: ParseSetIPv4):
-        super().__init__(ParseCastHashIPv4(left), right)
-class ParseBinaryContainsIPv6Set(ParseBinaryContainsHashSet):
+        super().__init__(left, right)
+class ParseBinaryContainsIPv6Set(ParseBinaryContainsSet):
     def __init__(self, left: ParseIPv6, right: ParseSetIPv6):
-        super().__init__(ParseCastHashIPv6(left), right)
+        super().__init__(left, right)
+
+class ParseBinaryContainsIntegerNamedSet(ParseBinaryContainsSet):
+    def __init__(self, left: ParseInteger, right: ParseNamedSetInteger):
+        super().__init__(left, right)
+class ParseBinaryContainsStringNamedSet(ParseBinaryContainsSet):
+    def __init__(self, left: ParseString, right: ParseNamedSetString):
+        super().__init__(left, right)
+class ParseBinaryContainsIPv4NamedSet(ParseBinaryContainsSet):
+    def __init__(self, left: ParseIPv4, right: ParseNamedSetIPv4):
+        super().__init__(left, right)
+class ParseBinaryContainsIPv6NamedSet(ParseBinaryContainsSet):
+    def __init__(self, left: ParseIPv6, right: ParseNamedSetIPv6):
+        super().__init__(left, right)
 
-def find_binary_contains(left: ParseAtom, right: ParseAtom) -> Optional[ParseAtom]:
-    # check `right` first because if it is a set then we don't care what `left` is
-    if isinstance(left, ParseInteger) and isinstance(right, ParseSetInteger):
-        return ParseBinaryContainsIntegerSet(left, right)
-    elif isinstance(left, ParseFloat) and isinstance(right, ParseSetFloat):
-        return ParseBinaryContainsFloatSet(left, right)
-    elif isinstance(left, ParseString) and isinstance(right, ParseSetString):
-        return ParseBinaryContainsStringSet(left, right)
-    elif isinstance(left, ParseIPv4) and isinstance(right, ParseSetIPv4):
-        return ParseBinaryContainsIPv4Set(left, right)
-    elif isinstance(left, ParseIPv6) and isinstance(right, ParseSetIPv6):
-        return ParseBinaryContainsIPv6Set(left, right)
-    elif isinstance(left, ParseString) and isinstance(right, ParseString):
-        return ParseBinaryContainsStringString(left, right)
-    elif isinstance(left, ParseIPv4) and isinstance(right, ParseCIDRv4):
-        return ParseBinaryContainsIPCIDR(left, right)
-    elif isinstance(left, ParseIPv6) and isinstance(right, ParseCIDRv6):
-        return ParseBinaryContainsIPCIDR(left, right)
-    else:
-        return None
+# sets first, because if `right` is a set then we don't care what `left` is
+register_binary(OperatorName.CONTAINS, ParseInteger, ParseSetInteger,
+    ParseBinaryContainsIntegerSet)
+register_binary(OperatorName.CONTAINS, ParseFloat, ParseSetFloat,
+    ParseBinaryContainsFloatSet)
+register_binary(OperatorName.CONTAINS, ParseString, ParseSetString,
+    ParseBinaryContainsStringSet)
+register_binary(OperatorName.CONTAINS, ParseIPv4, ParseSetIPv4,
+    ParseBinaryContainsIPv4Set)
+register_binary(OperatorName.CONTAINS, ParseIPv6, ParseSetIPv6,
+    ParseBinaryContainsIPv6Set)
+register_binary(OperatorName.CONTAINS, ParseInteger, ParseNamedSetInteger,
+    ParseBinaryContainsIntegerNamedSet)
+register_binary(OperatorName.CONTAINS, ParseString, ParseNamedSetString,
+    ParseBinaryContainsStringNamedSet)
+register_binary(OperatorName.CONTAINS, ParseIPv4, ParseNamedSetIPv4,
+    ParseBinaryContainsIPv4NamedSet)
+register_binary(OperatorName.CONTAINS, ParseIPv6, ParseNamedSetIPv6,
+    ParseBinaryContainsIPv6NamedSet)
+register_binary(OperatorName.CONTAINS, ParseIPv4, ParseSetCIDRv4,
+    ParseBinaryContainsIPCIDRSet)
+register_binary(OperatorName.CONTAINS, ParseIPv6, ParseSetCIDRv6,
+    ParseBinaryContainsIPCIDRSet)
+register_binary(OperatorName.CONTAINS, ParseString, ParseString,
+    ParseBinaryContainsStringString)
+register_binary(OperatorName.CONTAINS, ParseIPv4, ParseCIDRv4,
+    ParseBinaryContainsIPCIDR)
+register_binary(OperatorName.CONTAINS, ParseIPv6, ParseCIDRv6,
+    ParseBinaryContainsIPCIDR)
@@ -1,5 +1,6 @@
 from typing import Dict
-from .common import ParseBinaryOperator
+from .common import ParseBinaryOperator, register_binary
+from ...common.operators import OperatorName
 from ..operands import ParseAtom, ParseFloat, ParseInteger
 from .cast import ParseCastIntegerFloat
 
@@ -23,20 +24,7 @@ class ParseBinaryDivideFloatInteger(ParseBinaryDivideFloatFloat):
     def __init__(self, left: ParseFloat, right: ParseInteger):
         super().__init__(left, ParseCastIntegerFloat(right))
 
-def find_binary_divide(left: ParseAtom, right: ParseAtom):
-    if isinstance(left, ParseFloat):
-        if isinstance(right, ParseFloat):
-            return ParseBinaryDivideFloatFloat(left, right)
-        elif isinstance(right, ParseInteger):
-            return ParseBinaryDivideFloatInteger(left, right)
-        else:
-            return None
-    elif isinstance(left, ParseInteger):
-        if isinstance(right, ParseInteger):
-            return ParseBinaryDivideIntegerInteger(left, right)
-        elif isinstance(right, ParseFloat):
-            return ParseBinaryDivideIntegerFloat(left, right)
-        else:
-            return None
-    else:
-        return None
+register_binary(OperatorName.DIVIDE, ParseFloat, ParseFloat, ParseBinaryDivideFloatFloat)
+register_binary(OperatorName.DIVIDE, ParseFloat, ParseInteger, ParseBinaryDivideFloatInteger)
+register_binary(OperatorName.DIVIDE, ParseInteger, ParseInteger, ParseBinaryDivideIntegerInteger)
+register_binary(OperatorName.DIVIDE, ParseInteger, ParseFloat, ParseBinaryDivideIntegerFloat)
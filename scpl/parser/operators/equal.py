@@ -1,5 +1,7 @@
 from typing import Dict, Optional
-from .common import ParseBinaryOperator
+from .common import (find_binary_operator, find_unary_operator, ParseBinaryOperator,
+    register_binary)
+from ...common.operators import OperatorName
 from ..operands import ParseAtom, ParseBool, ParseInteger, ParseString
 
 class ParseBinaryEqualBoolBool(ParseBinaryOperator, ParseBool):
@@ -32,12 +34,15 @@ class ParseBinaryEqualStringString(ParseBinaryOperator, ParseBool):
     def eval(self, vars: Dict[str, ParseAtom]) -> bool:
         return self._left.eval(vars) == self._right.eval(vars)
 
-def find_binary_equal(left: ParseAtom, right: ParseAtom) -> Optional[ParseAtom]:
-    if isinstance(left, ParseBool) and isinstance(right, ParseBool):
-        return ParseBinaryEqualBoolBool(left, right)
-    elif isinstance(left, ParseInteger) and isinstance(right, ParseInteger):
-        return ParseBinaryEqualIntegerInteger(left, right)
-    elif isinstance(left, ParseString) and isinstance(right, ParseString):
-        return ParseBinaryEqualStringString(left, right)
+register_binary(OperatorName.EQUAL, ParseBool, ParseBool, ParseBinaryEqualBoolBool)
+register_binary(OperatorName.EQUAL, ParseInteger, ParseInteger, ParseBinaryEqualIntegerInteger)
+register_binary(OperatorName.EQUAL, ParseString, ParseString, ParseBinaryEqualStringString)
+
+def _unequal(left: ParseAtom, right: ParseAtom) -> Optional[ParseAtom]:
+    # just treat != as !(==)
+    if (inner := find_binary_operator(OperatorName.EQUAL, left, right)) is not None:
+        return find_unary_operator(OperatorName.NOT, inner)
     else:
         return None
+
+register_binary(OperatorName.UNEQUAL, ParseAtom, ParseAtom, _unequal)
@@ -1,6 +1,7 @@
-from typing import Dict, Optional
+from typing import Dict
 from .cast import ParseCastIntegerFloat
-from .common import ParseBinaryOperator
+from .common import ParseBinaryOperator, register_binary
+from ...common.operators import OperatorName
 from .negative import ParseUnaryNegativeFloat, ParseUnaryNegativeInteger
 from ..operands import ParseAtom, ParseInteger, ParseFloat
 
@@ -34,22 +35,14 @@ class ParseBinaryExponentIntegerNegative(ParseBinaryExponentFloatFloat):
     def __init__(self, left: ParseInteger, right: ParseUnaryNegativeInteger):
         super().__init__(ParseCastIntegerFloat(left), ParseCastIntegerFloat(right))
 
-def find_binary_exponent(left: ParseAtom, right: ParseAtom) -> Optional[ParseAtom]:
-    if isinstance(left, ParseInteger):
-        if isinstance(right, ParseUnaryNegativeInteger):
-            return ParseBinaryExponentIntegerNegative(left, right)
-        elif isinstance(right, ParseInteger):
-            return ParseBinaryExponentIntegerInteger(left, right)
-        elif isinstance(right, ParseFloat):
-            return ParseBinaryExponentIntegerFloat(left, right)
-        else:
-            return None
-    elif isinstance(left, ParseFloat):
-        if isinstance(right, ParseFloat):
-            return ParseBinaryExponentFloatFloat(left, right)
-        elif isinstance(right, ParseInteger):
-            return ParseBinaryExponentFloatInteger(left, right)
-        else:
-            return None
-    else:
-        return None
+# Negative(Integer) before Integer, because it's also an Integer
+register_binary(OperatorName.EXPONENT, ParseInteger, ParseUnaryNegativeInteger,
+    ParseBinaryExponentIntegerNegative)
+register_binary(OperatorName.EXPONENT, ParseInteger, ParseInteger,
+    ParseBinaryExponentIntegerInteger)
+register_binary(OperatorName.EXPONENT, ParseInteger, ParseFloat,
+    ParseBinaryExponentIntegerFloat)
+register_binary(OperatorName.EXPONENT, ParseFloat, ParseFloat,
+    ParseBinaryExponentFloatFloat)
+register_binary(OperatorName.EXPONENT, ParseFloat, ParseInteger,
+    ParseBinaryExponentFloatInteger)
@@ -1,6 +1,7 @@
-from typing import Dict, Optional
+from typing import Dict
 from .cast import ParseCastIntegerFloat
-from .common import ParseBinaryOperator
+from .common import ParseBinaryOperator, register_binary
+from ...common.operators import OperatorName
 from ..operands import ParseAtom, ParseBool, ParseFloat, ParseInteger
 
 class ParseBinaryGreaterIntegerInteger(ParseBinaryOperator, ParseBool):
@@ -29,20 +30,11 @@ class ParseBinaryGreaterIntegerFloat(ParseBinaryGreaterFloatFloat):
     def __init__(self, left: ParseInteger, right: ParseFloat):
         super().__init__(ParseCastIntegerFloat(left), right)
 
-def find_binary_greater(left: ParseAtom, right: ParseAtom) -> Optional[ParseAtom]:
-    if isinstance(left, ParseInteger):
-        if isinstance(right, ParseInteger):
-            return ParseBinaryGreaterIntegerInteger(left, right)
-        elif isinstance(right, ParseFloat):
-            return ParseBinaryGreaterIntegerFloat(left, right)
-        else:
-            return None
-    elif isinstance(left, ParseFloat):
-        if isinstance(right, ParseFloat):
-            return ParseBinaryGreaterFloatFloat(left, right)
-        elif isinstance(right, ParseInteger):
-            return ParseBinaryGreaterFloatInteger(left, right)
-        else:
-            return None
-    else:
-        return None
+register_binary(OperatorName.GREATER, ParseInteger, ParseInteger,
+    ParseBinaryGreaterIntegerInteger)
+register_binary(OperatorName.GREATER, ParseInteger, ParseFloat,
+    ParseBinaryGreaterIntegerFloat)
+register_binary(OperatorName.GREATER, ParseFloat, ParseFloat,
+    ParseBinaryGreaterFloatFloat)
+register_binary(OperatorName.GREATER, ParseFloat, ParseInteger,
+    ParseBinaryGreaterFloatInteger)
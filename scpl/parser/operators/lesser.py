@@ -1,6 +1,7 @@
-from typing import Dict, Optional
+from typing import Dict
 from .cast import ParseCastIntegerFloat
-from .common import ParseBinaryOperator
+from .common import ParseBinaryOperator, register_binary
+from ...common.operators import OperatorName
 from ..operands import ParseAtom, ParseBool, ParseFloat, ParseInteger
 
 class ParseBinaryLesserIntegerInteger(ParseBinaryOperator, ParseBool):
@@ -29,20 +30,7 @@ class ParseBinaryLesserIntegerFloat(ParseBinaryLesserFloatFloat):
     def __init__(self, left: ParseInteger, right: ParseFloat):
         super().__init__(ParseCastIntegerFloat(left), right)
 
-def find_binary_lesser(left: ParseAtom, right: ParseAtom) -> Optional[ParseAtom]:
-    if isinstance(left, ParseInteger):
-        if isinstance(right, ParseInteger):
-            return ParseBinaryLesserIntegerInteger(left, right)
-        elif isinstance(right, ParseFloat):
-            return ParseBinaryLesserIntegerFloat(left, right)
-        else:
-            return None
-    elif isinstance(left, ParseFloat):
-        if isinstance(right, ParseFloat):
-            return ParseBinaryLesserFloatFloat(left, right)
-        elif isinstance(right, ParseInteger):
-            return ParseBinaryLesserFloatInteger(left, right)
-        else:
-            return None
-    else:
-        return None
+register_binary(OperatorName.LESSER, ParseInteger, ParseInteger, ParseBinaryLesserIntegerInteger)
+register_binary(OperatorName.LESSER, ParseInteger, ParseFloat, ParseBinaryLesserIntegerFloat)
+register_binary(OperatorName.LESSER, ParseFloat, ParseFloat, ParseBinaryLesserFloatFloat)
+register_binary(OperatorName.LESSER, ParseFloat, ParseInteger, ParseBinaryLesserFloatInteger)
@@ -1,31 +1,154 @@
-from typing import Dict
+import re
+from typing import Dict, FrozenSet, Match, Optional, Tuple, Union
 from .casemap import ParseCasemappedRegex
-from .common import ParseBinaryOperator
+from .common import ParseBinaryOperator, register_binary
+from ...common.operators import OperatorName
 from ..operands import ParseAtom, ParseBool, ParseRegex, ParseString
+from ...regex.automaton import CompiledPattern, LinearMatch
+from ...regex.literals import plain_shape, required_literals
+
+class PrefilteredPattern:
+    # a compiled pattern that is only searched when `literal`, which every
+    # match of it contains, is in the text (lowercased, if `fold`), so that
+    # most text that can't match never gets to the regex engine
+    __slots__ = ("compiled", "literal", "fold")
+    def __init__(self, compiled: CompiledPattern, literal: str, fold: bool):
+        self.compiled = compiled
+        self.literal = literal
+        self.fold = fold
+    def __repr__(self) -> str:
+        return f"PrefilteredPattern({self.compiled!r}, {self.literal!r})"
+
+    def search(self, text: str) -> Optional[Union[Match, LinearMatch]]:
+        if self.fold:
+            if self.literal not in text.lower():
+                return None
+        elif self.literal not in text:
+            return None
+        return self.compiled.search(text)
+
+def prefilter(compiled: CompiledPattern) -> Optional[PrefilteredPattern]:
+    if not (literals := required_literals(compiled.pattern, compiled.flags)):
+        return None
+    # the longest, as it's likely the rarest
+    literal = max(literals, key=len)
+    return PrefilteredPattern(compiled, literal, bool(compiled.flags & re.I))
+
+# patterns that are only a plain string test (see `plain_shape`), done
+# without the regex engine. `match` returns what the pattern's match would
+# have (or "" for none) and `test` whether it'd have matched, which is all a
+# match cast to bool needs
+class SubstringMatch:
+    # `spam`
+    __slots__ = ("literal",)
+    def __init__(self, literal: str):
+        self.literal = literal
+    def __repr__(self) -> str:
+        return f"SubstringMatch({self.literal!r})"
+    def match(self, text: str) -> str:
+        return self.literal if self.literal in text else ""
+    def test(self, text: str) -> bool:
+        return self.literal in text
+
+class PrefixMatch:
+    # `^foo`
+    __slots__ = ("literal",)
+    def __init__(self, literal: str):
+        self.literal = literal
+    def __repr__(self) -> str:
+        return f"PrefixMatch({self.literal!r})"
+    def match(self, text: str) -> str:
+        return self.literal if text.startswith(self.literal) else ""
+    def test(self, text: str) -> bool:
+        return text.startswith(self.literal)
+
+class SuffixMatch:
+    # `bar$`, which also matches before a final newline, or `bar\Z`
+    __slots__ = ("literal", "suffixes")
+    def __init__(self, literal: str, newline: bool):
+        self.literal = literal
+        self.suffixes: Tuple[str, ...] = (literal,)
+        if newline:
+            self.suffixes += (literal + "\n",)
+    def __repr__(self) -> str:
+        return f"SuffixMatch({self.literal!r})"
+    def match(self, text: str) -> str:
+        return self.literal if text.endswith(self.suffixes) else ""
+    def test(self, text: str) -> bool:
+        return text.endswith(self.suffixes)
+
+class MembersMatch:
+    # `^(a|b)$`, which also matches before a final newline, or `^(a|b)\Z`
+    __slots__ = ("members", "newline")
+    def __init__(self, members: FrozenSet[str], newline: bool):
+        self.members = members
+        self.newline = newline
+    def __repr__(self) -> str:
+        return f"MembersMatch({sorted(self.members)!r})"
+    def match(self, text: str) -> str:
+        if text in self.members:
+            return text
+        elif self.newline and text[-1:] == "\n" and text[:-1] in self.members:
+            return text[:-1]
+        return ""
+    def test(self, text: str) -> bool:
+        return (text in self.members
+            or (self.newline and text[-1:] == "\n" and text[:-1] in self.members))
+
+StringMatch = Union[SubstringMatch, PrefixMatch, SuffixMatch, MembersMatch]
+
+def string_match(compiled: CompiledPattern) -> Optional[StringMatch]:
+    if (shape := plain_shape(compiled.pattern, compiled.flags)) is None:
+        return None
+    elif shape.start and shape.end:
+        return MembersMatch(frozenset(shape.literals), shape.newline)
+    literal, = shape.literals
+    if shape.start:
+        return PrefixMatch(literal)
+    elif shape.end:
+        return SuffixMatch(literal, shape.newline)
+    else:
+        return SubstringMatch(literal)
+
+def match_regex(reference: str, regex: Union[CompiledPattern, PrefilteredPattern]) -> str:
+    match = regex.search(reference)
+    if match is not None:
+        return match.group(0)
+    else:
+        return ""
 
 class ParseBinaryMatchStringRegex(ParseBinaryOperator, ParseString):
     def __init__(self, left: ParseString, right: ParseRegex):
         super().__init__(left, right)
         self._left = left
         self._right = right
+
+        self._string_match: Optional[StringMatch] = None
+        self._prefiltered: Optional[PrefilteredPattern] = None
+        if right.is_constant():
+            try:
+                compiled = right.eval({})
+            except Exception:
+                # leave the error for eval time
+                pass
+            else:
+                self._string_match = string_match(compiled)
+                if self._string_match is None:
+                    self._prefiltered = prefilter(compiled)
     def __repr__(self) -> str:
         return f"Match({self._left!r}, {self._right!r})"
     def eval(self, vars: Dict[str, ParseAtom]) -> str:
-        reference = self._left.eval(vars)
-        regex = self._right.eval(vars)
-        match = regex.search(reference)
-
-        if match is not None:
-            return match.group(0)
-        else:
-            return ""
-
-def find_binary_match(left: ParseAtom, right: ParseAtom):
-    if isinstance(right, ParseRegex) and isinstance(left, ParseString):
-        if left.casemap is not None:
-            right_c = ParseCasemappedRegex(right, left.casemap)
-            return ParseBinaryMatchStringRegex(left, right_c)
-        else:
-            return ParseBinaryMatchStringRegex(left, right)
+        if self._string_match is not None:
+            return self._string_match.match(self._left.eval(vars))
+        elif self._prefiltered is not None:
+            return match_regex(self._left.eval(vars), self._prefiltered)
+        return match_regex(self._left.eval(vars), self._right.eval(vars))
+
+def _match(left: ParseString, right: ParseRegex) -> ParseAtom:
+    if left.casemap is not None:
+        right_c = ParseCasemappedRegex(right, left.casemap)
+        return ParseBinaryMatchStringRegex(left, right_c)
     else:
-        return None
+        return ParseBinaryMatchStringRegex(left, right)
+
+register_binary(OperatorName.MATCH, ParseString, ParseRegex, _match)
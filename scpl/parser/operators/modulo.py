@@ -1,6 +1,7 @@
-from typing import Dict, Optional
+from typing import Dict
 from .cast import ParseCastIntegerFloat
-from .common import ParseBinaryOperator
+from .common import ParseBinaryOperator, register_binary
+from ...common.operators import OperatorName
 from ..operands import ParseAtom, ParseInteger, ParseFloat
 
 class ParseBinaryModuloIntegerInteger(ParseBinaryOperator, ParseInteger):
@@ -29,20 +30,7 @@ class ParseBinaryModuloIntegerFloat(ParseBinaryModuloFloatFloat):
     def __init__(self, left: ParseInteger, right: ParseFloat):
         super().__init__(ParseCastIntegerFloat(left), right)
 
-def find_binary_modulo(left: ParseAtom, right: ParseAtom) -> Optional[ParseAtom]:
-    if isinstance(left, ParseInteger):
-        if isinstance(right, ParseInteger):
-            return ParseBinaryModuloIntegerInteger(left, right)
-        elif isinstance(right, ParseFloat):
-            return ParseBinaryModuloIntegerFloat(left, right)
-        else:
-            return None
-    elif isinstance(left, ParseFloat):
-        if isinstance(right, ParseFloat):
-            return ParseBinaryModuloFloatFloat(left, right)
-        elif isinstance(right, ParseInteger):
-            return ParseBinaryModuloFloatInteger(left, right)
-        else:
-            return None
-    else:
-        return None
+register_binary(OperatorName.MODULO, ParseInteger, ParseInteger, ParseBinaryModuloIntegerInteger)
+register_binary(OperatorName.MODULO, ParseInteger, ParseFloat, ParseBinaryModuloIntegerFloat)
+register_binary(OperatorName.MODULO, ParseFloat, ParseFloat, ParseBinaryModuloFloatFloat)
+register_binary(OperatorName.MODULO, ParseFloat, ParseInteger, ParseBinaryModuloFloatInteger)
@@ -1,5 +1,6 @@
 from typing import Dict
-from .common import ParseBinaryOperator
+from .common import ParseBinaryOperator, register_binary
+from ...common.operators import OperatorName
 from ..operands import ParseAtom, ParseFloat, ParseInteger
 from .cast import ParseCastIntegerFloat
 
@@ -29,20 +30,11 @@ class ParseBinaryMultiplyIntegerInteger(ParseBinaryOperator, ParseInteger):
     def eval(self, vars: Dict[str, ParseAtom]) -> int:
         return self._left.eval(vars) * self._right.eval(vars)
 
-def find_binary_multiply(left: ParseAtom, right: ParseAtom):
-    if isinstance(left, ParseFloat):
-        if isinstance(right, ParseFloat):
-            return ParseBinaryMultiplyFloatFloat(left, right)
-        elif isinstance(right, ParseInteger):
-            return ParseBinaryMultiplyFloatInteger(left, right)
-        else:
-            return None
-    elif isinstance(left, ParseInteger):
-        if isinstance(right, ParseInteger):
-            return ParseBinaryMultiplyIntegerInteger(left, right)
-        elif isinstance(right, ParseFloat):
-            return ParseBinaryMultiplyIntegerFloat(left, right)
-        else:
-            return None
-    else:
-        return None
+register_binary(OperatorName.MULTIPLY, ParseFloat, ParseFloat,
+    ParseBinaryMultiplyFloatFloat)
+register_binary(OperatorName.MULTIPLY, ParseFloat, ParseInteger,
+    ParseBinaryMultiplyFloatInteger)
+register_binary(OperatorName.MULTIPLY, ParseInteger, ParseInteger,
+    ParseBinaryMultiplyIntegerInteger)
+register_binary(OperatorName.MULTIPLY, ParseInteger, ParseFloat,
+    ParseBinaryMultiplyIntegerFloat)
@@ -1,5 +1,6 @@
-from typing import Dict, Optional
-from .common import ParseUnaryOperator
+from typing import Dict, Union
+from .common import ParseUnaryOperator, register_unary
+from ...common.operators import OperatorName
 from ..operands import ParseAtom, ParseFloat, ParseInteger
 
 class ParseUnaryNegativeInteger(ParseUnaryOperator, ParseInteger):
@@ -20,14 +21,13 @@ class ParseUnaryNegativeFloat(ParseUnaryOperator, ParseFloat):
     def eval(self, vars: Dict[str, ParseAtom]) -> float:
         return -self._atom.eval(vars)
 
-def find_unary_negative(atom: ParseAtom) -> Optional[ParseAtom]:
-    if isinstance(atom, ParseUnaryNegativeInteger):
-        return atom._atom
-    elif isinstance(atom, ParseUnaryNegativeFloat):
-        return atom._atom
-    elif isinstance(atom, ParseInteger):
-        return ParseUnaryNegativeInteger(atom)
-    elif isinstance(atom, ParseFloat):
-        return ParseUnaryNegativeFloat(atom)
-    else:
-        return None
+def _double_negative(
+        atom: Union[ParseUnaryNegativeInteger, ParseUnaryNegativeFloat]
+        ) -> ParseAtom:
+    # -(-1) is just 1
+    return atom._atom
+
+register_unary(OperatorName.NEGATIVE, ParseUnaryNegativeInteger, _double_negative)
+register_unary(OperatorName.NEGATIVE, ParseUnaryNegativeFloat, _double_negative)
+register_unary(OperatorName.NEGATIVE, ParseInteger, ParseUnaryNegativeInteger)
+register_unary(OperatorName.NEGATIVE, ParseFloat, ParseUnaryNegativeFloat)
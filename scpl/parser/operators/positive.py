@@ -1,5 +1,6 @@
 from typing import Dict
-from .common import ParseUnaryOperator
+from .common import ParseUnaryOperator, register_unary
+from ...common.operators import OperatorName
 from ..operands import ParseAtom, ParseFloat, ParseInteger
 
 class ParseUnaryPositiveInteger(ParseUnaryOperator, ParseInteger):
@@ -20,10 +21,5 @@ class ParseUnaryPositiveFloat(ParseUnaryOperator, ParseFloat):
     def eval(self, vars: Dict[str, ParseAtom]) -> float:
         return +self._atom.eval(vars)
 
-def find_unary_positive(atom: ParseAtom):
-    if isinstance(atom, ParseInteger):
-        return ParseUnaryPositiveInteger(atom)
-    elif isinstance(atom, ParseFloat):
-        return ParseUnaryPositiveFloat(atom)
-    else:
-        return None
+register_unary(OperatorName.POSITIVE, ParseInteger, ParseUnaryPositiveInteger)
+register_unary(OperatorName.POSITIVE, ParseFloat, ParseUnaryPositiveFloat)
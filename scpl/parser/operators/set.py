@@ -1,35 +1,184 @@
-from typing import cast, Dict, Optional, Sequence, Set
-from .cast import (ParseCastHash, ParseCastHashFloat, ParseCastHashInteger,
-    ParseCastHashIPv4, ParseCastHashIPv6, ParseCastHashString)
+from typing import (Any, Callable, Collection, Container, cast, Dict, FrozenSet, Hashable,
+    Iterator, List, Optional, Sequence, Tuple, Union)
 from ..common import ParserErrorWithIndex
-from ..operands import (ParseAtom, ParseFloat, ParseInteger, ParseIPv4, ParseIPv6,
-    ParseString)
+from ..operands import (ParseAtom, ParseCIDRv4, ParseCIDRv6, ParseConstCIDR,
+    ParseConstCIDRv4, ParseConstCIDRv6, ParseConstFloat, ParseConstInteger,
+    ParseConstIPv4, ParseConstIPv6, ParseConstString, ParseFloat, ParseInteger, ParseIPv4,
+    ParseIPv6, ParseString)
+from ...common.arrays    import SortedArray, TYPECODE_I64, TYPECODE_U32
+from ...common.intervals import IntervalSet
+from ...common.mapped    import MappedIntegers, open_strings
+
+# constant integer members are kept in a SortedArray rather than a frozenset
+# once there are at least this many of them
+COMPACT_SIZE = 256
+
+# a set's constant members, frozen so they can be hashed
+FrozenMembers = Union[FrozenSet[Any], SortedArray]
+
+class SetMembers:
+    # a set's constant members and the values of the rest of its members for
+    # one eval, checked in that order, without copying them in to a new set
+    __slots__ = ("constant", "values")
+    def __init__(self, constant: Collection[Any], values: Sequence[Any]):
+        self.constant = constant
+        self.values = values
+    def __contains__(self, value: object) -> bool:
+        return value in self.constant or value in self.values
 
 class ParseSet(ParseAtom):
-    def __init__(self, atoms: Sequence[ParseCastHash]):
-        self._atoms = atoms
-        self._precompile: Set[int] = set()
+    # constant members are evaluated once, when the set is made, and frozen
+    # in to `_constant`; only the rest (`_atoms`) are evaluated on eval.
+    # membership is by value, so there are no false positives
+    _typecode: Optional[str] = None
+
+    def __init__(self, atoms: Sequence[ParseAtom]):
+        constant: List[Any] = []
+        self._atoms: List[ParseAtom] = []
+        for atom in atoms:
+            if atom.is_constant():
+                try:
+                    constant.append(atom.eval({}))
+                    continue
+                except Exception:
+                    # leave the error for eval time
+                    pass
+            self._atoms.append(atom)
+        self._constant = self._freeze(constant)
+
+    def _freeze(self, values: List[Any]) -> FrozenMembers:
+        if self._typecode is not None and len(values) >= COMPACT_SIZE:
+            try:
+                return SortedArray(values, self._typecode)
+            except OverflowError:
+                pass
+        return frozenset(values)
+    # a constant atom for one of `_constant`, to show it
+    def _member(self, value: Any) -> ParseAtom:
+        raise NotImplementedError()
+
     def __repr__(self) -> str:
-        return f"Set({', '.join(repr(a.atom) for a in self._atoms)})"
-    def eval(self, vars: Dict[str, ParseAtom]) -> Set[int]:
-        nonconst = set(a.eval(vars) for a in self._atoms)
-        return self._precompile | nonconst
+        members = [self._member(v) for v in sorted(self._constant)] + self._atoms
+        return f"Set({', '.join(repr(a) for a in members)})"
+    def _key(self) -> Hashable:
+        return self._constant
+    def operands(self) -> Tuple[ParseAtom, ...]:
+        return tuple(self._atoms)
+    def replace_operands(self, mapping: Dict[int, ParseAtom]):
+        self._atoms = [mapping.get(id(a), a) for a in self._atoms]
+    def is_constant(self) -> bool:
+        return not self._atoms
+    def precompile(self) -> ParseAtom:
+        self._atoms = [a.precompile() for a in self._atoms]
+        return self
+    def eval(self, vars: Dict[str, ParseAtom]) -> Container[Any]:
+        if not self._atoms:
+            return self._constant
+        else:
+            return SetMembers(self._constant, [a.eval(vars) for a in self._atoms])
 
 class ParseSetInteger(ParseSet):
+    _typecode = TYPECODE_I64
     def __init__(self, atoms: Sequence[ParseInteger]):
-        super().__init__([ParseCastHashInteger(a) for a in atoms])
+        super().__init__(atoms)
+    def _member(self, value: int) -> ParseAtom:
+        return ParseConstInteger(value)
 class ParseSetFloat(ParseSet):
     def __init__(self, atoms: Sequence[ParseFloat]):
-        super().__init__([ParseCastHashFloat(a) for a in atoms])
+        super().__init__(atoms)
+    def _member(self, value: float) -> ParseAtom:
+        return ParseConstFloat(value)
 class ParseSetString(ParseSet):
     def __init__(self, atoms: Sequence[ParseString]):
-        super().__init__([ParseCastHashString(a) for a in atoms])
+        super().__init__(atoms)
+    def _member(self, value: str) -> ParseAtom:
+        return ParseConstString(None, value)
 class ParseSetIPv4(ParseSet):
+    _typecode = TYPECODE_U32
     def __init__(self, atoms: Sequence[ParseIPv4]):
-        super().__init__([ParseCastHashIPv4(a) for a in atoms])
+        super().__init__(atoms)
+    def _member(self, value: int) -> ParseAtom:
+        return ParseConstIPv4(value)
 class ParseSetIPv6(ParseSet):
     def __init__(self, atoms: Sequence[ParseIPv6]):
-        super().__init__([ParseCastHashIPv6(a) for a in atoms])
+        super().__init__(atoms)
+    def _member(self, value: int) -> ParseAtom:
+        return ParseConstIPv6(value)
+
+class ParseSetCIDR(ParseAtom):
+    # networks, which are always constant, merged in to sorted ranges so
+    # that checking whether any of them covers an address is a binary search
+    def __init__(self,
+            atoms: Sequence[ParseConstCIDR],
+            maxbits: int,
+            # makes a network's atom from its network and prefix length
+            cidr: Callable[[int, int], ParseConstCIDR]):
+
+        self._cidr = cidr
+        self._intervals = IntervalSet.from_networks(
+            ((a.integer, a.prefix) for a in atoms), maxbits
+        )
+    def __repr__(self) -> str:
+        networks = (self._cidr(network, prefix) for network, prefix in self.networks())
+        return f"Set({', '.join(repr(n) for n in networks)})"
+    def _key(self) -> Hashable:
+        return tuple(self._intervals.ranges())
+
+    # what's left of the networks after merging, as (network, prefix length)
+    def networks(self) -> Iterator[Tuple[int, int]]:
+        return self._intervals.networks()
+
+    def eval(self, vars: Dict[str, ParseAtom]) -> IntervalSet:
+        return self._intervals
+
+class ParseSetCIDRv4(ParseSetCIDR):
+    def __init__(self, atoms: Sequence[ParseConstCIDR]):
+        super().__init__(atoms, 32, ParseConstCIDRv4)
+class ParseSetCIDRv6(ParseSetCIDR):
+    def __init__(self, atoms: Sequence[ParseConstCIDR]):
+        super().__init__(atoms, 128, ParseConstCIDRv6)
+
+class ParseNamedSet(ParseAtom):
+    # a set that's referred to by name, rather than written out, and whose
+    # members come from elsewhere (e.g. a file, see `load`). they can be
+    # swapped at any time, without parsing or compiling anything again, so it
+    # is never constant. given in place of a variable's type to `parse`
+    def __init__(self, name: str, members: Container[Any] = frozenset()):
+        self.name = name
+        self.members = members
+
+    def __repr__(self) -> str:
+        return f"NamedSet({self.name!r})"
+    def _key(self) -> Hashable:
+        # only ever the same set as itself, whatever is in it
+        return id(self)
+    def is_constant(self) -> bool:
+        return False
+
+    def swap(self, members: Container[Any]):
+        self.members = members
+    # map the file at `path` and swap to it
+    def load(self, path: str):
+        self.members = self._open(path)
+    def _open(self, path: str) -> Container[Any]:
+        raise NotImplementedError()
+
+    def eval(self, vars: Dict[str, ParseAtom]) -> Container[Any]:
+        return self.members
+
+class ParseNamedSetInteger(ParseNamedSet):
+    def _open(self, path: str) -> Container[Any]:
+        return MappedIntegers(path, 8, signed=True)
+class ParseNamedSetString(ParseNamedSet):
+    def _open(self, path: str) -> Container[Any]:
+        # exact, or a bloom filter if that's what's at `path`
+        return open_strings(path)
+class ParseNamedSetIPv4(ParseNamedSet):
+    def _open(self, path: str) -> Container[Any]:
+        return MappedIntegers(path, 4)
+class ParseNamedSetIPv6(ParseNamedSet):
+    def _open(self, path: str) -> Container[Any]:
+        return MappedIntegers(path, 16)
 
 def _all_isinstance(atoms: Sequence[ParseAtom], atype: type) -> bool:
     for i, atom in enumerate(atoms):
@@ -55,5 +204,9 @@ def find_set(atoms: Sequence[ParseAtom]) -> Optional[ParseAtom]:
         return ParseSetIPv4(cast(Sequence[ParseIPv4], atoms))
     elif _all_isinstance(atoms, ParseIPv6):
         return ParseSetIPv6(cast(Sequence[ParseIPv6], atoms))
+    elif _all_isinstance(atoms, ParseCIDRv4):
+        return ParseSetCIDRv4(cast(Sequence[ParseConstCIDR], atoms))
+    elif _all_isinstance(atoms, ParseCIDRv6):
+        return ParseSetCIDRv6(cast(Sequence[ParseConstCIDR], atoms))
     else:
         return None
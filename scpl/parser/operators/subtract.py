@@ -1,5 +1,6 @@
-from typing import Dict, Optional
-from .common import ParseBinaryOperator
+from typing import Dict
+from .common import ParseBinaryOperator, register_binary
+from ...common.operators import OperatorName
 from ..operands import ParseAtom, ParseFloat, ParseInteger
 from .cast import ParseCastIntegerFloat
 
@@ -29,20 +30,11 @@ class ParseBinarySubtractIntegerFloat(ParseBinarySubtractFloatFloat):
     def __init__(self, left: ParseInteger, right: ParseFloat):
         super().__init__(ParseCastIntegerFloat(left), right)
 
-def find_binary_subtract(left: ParseAtom, right: ParseAtom) -> Optional[ParseAtom]:
-    if isinstance(left, ParseInteger):
-        if isinstance(right, ParseInteger):
-            return ParseBinarySubtractIntegerInteger(left, right)
-        elif isinstance(right, ParseFloat):
-            return ParseBinarySubtractIntegerFloat(left, right)
-        else:
-            return None
-    elif isinstance(left, ParseFloat):
-        if isinstance(right, ParseFloat):
-            return ParseBinarySubtractFloatFloat(left, right)
-        elif isinstance(right, ParseInteger):
-            return ParseBinarySubtractFloatInteger(left, right)
-        else:
-            return None
-    else:
-        return None
+register_binary(OperatorName.SUBTRACT, ParseInteger, ParseInteger,
+    ParseBinarySubtractIntegerInteger)
+register_binary(OperatorName.SUBTRACT, ParseInteger, ParseFloat,
+    ParseBinarySubtractIntegerFloat)
+register_binary(OperatorName.SUBTRACT, ParseFloat, ParseFloat,
+    ParseBinarySubtractFloatFloat)
+register_binary(OperatorName.SUBTRACT, ParseFloat, ParseInteger,
+    ParseBinarySubtractFloatInteger)
@@ -1,6 +1,7 @@
-from typing import cast, Dict, Optional, Pattern
+from typing import cast, Dict, Hashable, Optional
 from ..operands import (ParseAtom, ParseBool, ParseFloat, ParseIPv4,
     ParseIPv6, ParseInteger, ParseRegex, ParseString)
+from ...regex.automaton import CompiledPattern
 
 class ParseVariable(ParseAtom):
     def __init__(self, name: str):
@@ -9,6 +10,8 @@ class ParseVariable(ParseAtom):
     def __repr__(self) -> str:
         type = self.__class__.__name__.replace("ParseVariable", "", 1)
         return f"Get{type}({self.name!r})"
+    def _key(self) -> Hashable:
+        return self.name
 
     def is_constant(self) -> bool:
         return False
@@ -17,6 +20,11 @@ class ParseVariableString(ParseVariable, ParseString):
     def __init__(self, name: str, casemap: Optional[Dict[int, str]] = None):
         ParseVariable.__init__(self, name)
         ParseString.__init__(self, casemap)
+    def _key(self) -> Hashable:
+        if self.casemap is not None:
+            return (self.name, frozenset(self.casemap.items()))
+        else:
+            return self.name
     def eval(self, vars: Dict[str, ParseAtom]) -> str:
         return cast(ParseString, vars[self.name]).eval(vars)
 class ParseVariableInteger(ParseVariable, ParseInteger):
@@ -26,7 +34,7 @@ class ParseVariableFloat(ParseVariable, ParseFloat):
     def eval(self, vars: Dict[str, ParseAtom]) -> float:
         return cast(ParseFloat, vars[self.name]).eval(vars)
 class ParseVariableRegex(ParseVariable, ParseRegex):
-    def eval(self, vars: Dict[str, ParseAtom]) -> Pattern:
+    def eval(self, vars: Dict[str, ParseAtom]) -> CompiledPattern:
         return cast(ParseRegex, vars[self.name]).eval(vars)
 class ParseVariableBool(ParseVariable, ParseBool):
     def eval(self, vars: Dict[str, ParseAtom]) -> bool:
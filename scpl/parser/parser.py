@@ -1,13 +1,18 @@
+import re
 from collections import deque
 from dataclasses import dataclass
-from typing      import Deque, Generic, List, Sequence, Set, TypeVar
+from typing      import Deque, Generic, Iterable, List, Optional, Sequence, Set, TypeVar
 
-from .common     import ParserError, ParserErrorWithIndex, ParserTypeError
-from .operators  import find_binary_operator, find_unary_operator, find_variable, find_set
+from .common     import (ParserError, ParserErrorWithIndex, ParserRegexRiskError,
+    ParserTypeError)
+from .operators  import (find_binary_operator, find_unary_operator, find_variable,
+    find_set, ParseNamedSet)
 from .operands   import *
 
 from ..common.operators import (Associativity, OPERATORS, OPERATORS_BINARY,
     OPERATORS_UNARY, OperatorName)
+from ..regex.automaton import LinearPattern
+from ..regex.redos     import classify, Risk
 from ..lexer import (Token, TokenDuration, TokenHex, TokenIPv4, TokenIPv6, TokenNumber,
     TokenOperator, TokenParenthesis, TokenRegex, TokenScope, TokenString,
     TokenTransparent, TokenWord)
@@ -18,9 +23,14 @@ SCOPE_COUNTERPART = {
     "}": "{"
 }
 
+# `max_regex_risk` refuses regex literals that backtracking could take longer
+# than that to match (see `classify`), other than those matched by an
+# automaton, which finds both where a match starts and where it ends without
+# backtracking
 def parse(
-        tokens: Deque[Token],
-        vars: Dict[str, ParseAtom]
+        tokens: Iterable[Token],
+        vars: Dict[str, ParseAtom],
+        max_regex_risk: Optional[Risk] = None
         ) -> Tuple[Sequence[ParseAtom], Set[str]]:
 
     operands: Deque[Tuple[ParseAtom, Token]] = deque()
@@ -50,9 +60,7 @@ def parse(
             raise ParserError(op_head_token, "invalid operands for operator")
 
     last_is_operator = False
-    while tokens:
-        token = tokens.popleft()
-
+    for token in tokens:
         if isinstance(token, TokenTransparent):
             pass
 
@@ -146,6 +154,9 @@ def parse(
                     operands.append((keyword_atom, token))
                 elif (var_type := vars.get(token.text)) is None:
                     raise ParserError(token, f"unknown variable {token.text}")
+                elif isinstance(var_type, ParseNamedSet):
+                    # not read from `vars`, so not a dependency
+                    operands.append((var_type, token))
                 elif (var := find_variable(token.text, var_type)) is None:
                     # shouldn't happen
                     raise ParserError(token, f"invalid variable type {var_type!r}")
@@ -165,7 +176,16 @@ def parse(
             elif isinstance(token, TokenString):
                 operands.append((ParseConstString.from_text(token.text), token))
             elif isinstance(token, TokenRegex):
-                operands.append((ParseConstRegex.from_text(token.text), token))
+                try:
+                    regex = ParseConstRegex.from_text(token.text)
+                except re.error as e:
+                    raise ParserError(token, f"invalid regex: {e}")
+                if (max_regex_risk is not None
+                        and not isinstance(regex.compiled, LinearPattern)
+                        and (risk := classify(regex.pattern, regex.compiled.flags))
+                            > max_regex_risk):
+                    raise ParserRegexRiskError(token, risk)
+                operands.append((regex, token))
             elif isinstance(token, TokenIPv4):
                 if "/" in token.text:
                     operands.append((ParseConstCIDRv4.from_text(token.text), token))
@@ -0,0 +1,613 @@
+import re
+from typing import Any, cast, Dict, FrozenSet, List, Optional, Pattern, Set, Tuple, Union
+from .lexer import (tokenise, RegexLexerError, RegexToken, RegexTokenClass,
+    RegexTokenLiteral, RegexTokenOpaque, RegexTokenOperator, RegexTokenRepeat,
+    RegexTokenScope)
+from .redos import classify_tokens, Risk
+
+# not one of python's flags; a pattern compiled with it is always matched by
+# the automaton, or isn't compiled at all
+LINEAR = 1 << 30
+
+# how many NFA states a pattern can expand to (`a{1000}` is 1000) before it's
+# left to python's engine
+MAX_STATES = 10000
+# how many DFA states, and transitions between them, are kept per pattern
+# before they're all thrown away and built again as they're needed
+MAX_DFA_STATES = 4096
+MAX_TRANSITIONS = 65536
+
+class UnsupportedPattern(Exception):
+    pass
+
+# escapes that stand for one character, tested by python's engine
+CHAR_ESCAPES = set("dDwWsSntrfva")
+# assertions the automaton checks itself
+ASSERTIONS   = {"^": "^", "$": "$", "\\A": "A", "\\Z": "Z", "\\b": "b"}
+REPEAT_BOUNDS = re.compile(r"(\d*)(?:(,)(\d*))?")
+
+# the pattern's syntax tree is tuples:
+#   ("char", source)            one character that `source` fullmatches
+#   ("assert", kind)            one of ASSERTIONS' values
+#   ("cat", [node, ...])
+#   ("alt", [node, ...])
+#   ("repeat", node, min, max, greedy)  max is None for unbounded
+#   ("group", index, node)      a capturing group, numbered from 1
+Node = Tuple[Any, ...]
+# where a match starts and ends, then where each group does (-1 for those
+# that didn't take part)
+Slots = Tuple[int, ...]
+
+class _Parser:
+    def __init__(self, tokens: List[RegexToken]):
+        self._tokens = tokens
+        self._i = 0
+        self._groups = 0
+
+    def _peek(self) -> Optional[RegexToken]:
+        if self._i < len(self._tokens):
+            return self._tokens[self._i]
+        return None
+
+    def parse(self) -> Node:
+        node = self._alternation()
+        if self._peek() is not None:
+            raise UnsupportedPattern("unexpected token")
+        return node
+
+    def _alternation(self) -> Node:
+        branches = [self._concat()]
+        while (isinstance(token := self._peek(), RegexTokenOperator)
+                and token.text == "|"):
+            self._i += 1
+            branches.append(self._concat())
+        return branches[0] if len(branches) == 1 else ("alt", branches)
+
+    def _concat(self) -> Node:
+        items: List[Node] = []
+        while (token := self._peek()) is not None:
+            if ((isinstance(token, RegexTokenOperator) and token.text == "|")
+                    or (isinstance(token, RegexTokenScope) and token.text == ")")):
+                break
+            items.append(self._quantified())
+        return ("cat", items)
+
+    def _bounds(self) -> Optional[Tuple[int, Optional[int]]]:
+        token = self._peek()
+        if isinstance(token, RegexTokenOperator) and token.text in {"?", "*", "+"}:
+            self._i += 1
+            return {"?": (0, 1), "*": (0, None), "+": (1, None)}[token.text]
+        elif isinstance(token, RegexTokenRepeat) and token.text == "{":
+            bounds = REPEAT_BOUNDS.fullmatch(self._tokens[self._i+1].text)
+            if bounds is None or not (bounds.group(1) or bounds.group(3)):
+                # python reads something like `{x}` as literal characters
+                raise UnsupportedPattern("literal braces")
+            self._i += 3
+            minimum = int(bounds.group(1) or 0)
+            if bounds.group(2) is None:
+                return minimum, minimum
+            elif bounds.group(3):
+                return minimum, int(bounds.group(3))
+            else:
+                return minimum, None
+        return None
+
+    def _quantified(self) -> Node:
+        node = self._atom()
+        while (bounds := self._bounds()) is not None:
+            token = self._peek()
+            greedy = True
+            if isinstance(token, RegexTokenOperator) and token.text == "?":
+                greedy = False
+                self._i += 1
+            elif isinstance(token, RegexTokenOperator) and token.text == "+":
+                raise UnsupportedPattern("possessive quantifier")
+            node = ("repeat", node, bounds[0], bounds[1], greedy)
+        return node
+
+    def _atom(self) -> Node:
+        token = self._tokens[self._i]
+        self._i += 1
+        if isinstance(token, RegexTokenScope):
+            if token.text == "(":
+                # numbered as they're opened, as python does
+                self._groups += 1
+                index = self._groups
+                node = self._alternation()
+                self._i += 1 # ")"
+                return ("group", index, node)
+            elif token.text == "(?:":
+                node = self._alternation()
+                self._i += 1 # ")"
+                return node
+            elif (re.fullmatch(r"\(\?[aimsux]+", token.text)
+                    and isinstance(self._peek(), RegexTokenScope)):
+                # global flags, already in the compiled pattern's flags
+                self._i += 1
+                return ("cat", [])
+            else:
+                raise UnsupportedPattern(f"unsupported group {token.text!r}")
+        elif isinstance(token, RegexTokenClass):
+            source = token.text
+            while not (isinstance(token := self._tokens[self._i], RegexTokenClass)
+                    and token.text == "]"):
+                source += token.text
+                self._i += 1
+            self._i += 1
+            return ("char", source + "]")
+        elif isinstance(token, RegexTokenLiteral):
+            return ("char", re.escape(token.text))
+        elif isinstance(token, RegexTokenOpaque):
+            if token.text in ASSERTIONS:
+                return ("assert", ASSERTIONS[token.text])
+            elif token.text[1] in CHAR_ESCAPES or not token.text[1].isalnum():
+                return ("char", token.text)
+            else:
+                raise UnsupportedPattern(f"unsupported escape {token.text!r}")
+        elif isinstance(token, RegexTokenOperator):
+            if token.text == ".":
+                return ("char", ".")
+            elif token.text in ASSERTIONS:
+                return ("assert", ASSERTIONS[token.text])
+        raise UnsupportedPattern(f"unexpected {token.text!r}")
+
+# NFA state kinds
+CHAR, SPLIT, ASSERT, MATCH, SAVE, LOOP = range(6)
+NO_REPEATS: FrozenSet[int] = frozenset()
+
+# context bits, what's around a position in the text, for assertions
+AT_START, AT_END, BEFORE_FINAL_NL, AFTER_NL, BEFORE_NL, AT_BOUNDARY = (
+    1 << i for i in range(6)
+)
+
+class _Automaton:
+    # a thompson NFA of a pattern reversed, run as a DFA built lazily (a
+    # DFA state is a set of NFA states) from the end of the text to the
+    # start, which finds where the leftmost match starts without
+    # backtracking. each DFA state and transition is built once and kept,
+    # so each character costs a dict lookup or two.
+    # if `forward`, the NFA isn't reversed and keeps which way each repeat
+    # and alternation would be tried first and where groups start and end.
+    # it's run from where a match starts, to find where python's engine
+    # would end it (see `end`) and where its groups are (see `match`)
+    def __init__(self, tree: Node, flags: int, forward: bool = False):
+        self._forward = forward
+        self._kinds: List[int] = []
+        self._args: List[Any] = []
+        self._outs: List[List[int]] = []
+        self._tests: List[Pattern] = []
+        self._asserts: Set[str] = set()
+        # whether each repeat is greedy, and the repeats each state is in
+        self._repeats: List[bool] = []
+        self._withins: List[FrozenSet[int]] = []
+        self._within: FrozenSet[int] = frozenset()
+        # flags that change which characters one character's pattern matches
+        self._char_flags = flags & (re.I | re.S | re.A | re.U)
+        self._multiline = bool(flags & re.M)
+
+        match = self._state(MATCH, None, [])
+        self._start = self._build(tree, match)
+
+        self._word = re.compile(r"\w", self._char_flags)
+        self._reset()
+
+    def _reset(self):
+        # kernel (NFA states from consuming a character) and context to
+        # (NFA states that can consume the next one, whether it matched)
+        self._closures: Dict[Tuple[FrozenSet[int], int], Tuple[FrozenSet[int], bool]] = {}
+        # consuming NFA states and a character to the next kernel
+        self._steps: Dict[Tuple[FrozenSet[int], str], FrozenSet[int]] = {}
+        self._interned: Dict[FrozenSet[int], FrozenSet[int]] = {}
+        self._members: Dict[Tuple[int, str], bool] = {}
+        self._initial = self._intern(frozenset((self._start,)))
+        # the same, for a `forward` automaton, with NFA states in the order
+        # they'd be tried
+        self._ordered_closures: Dict[Tuple[Tuple[int, ...], int], Tuple[Tuple[int, ...], bool]] = {}
+        self._ordered_steps: Dict[Tuple[Tuple[int, ...], str], Tuple[int, ...]] = {}
+
+    def _intern(self, states: FrozenSet[int]) -> FrozenSet[int]:
+        # the same object for the same states, as frozensets keep their hash
+        # and compare quickest with themselves
+        return self._interned.setdefault(states, states)
+
+    def _state(self, kind: int, arg: Any, outs: List[int]) -> int:
+        if len(self._kinds) >= MAX_STATES:
+            raise UnsupportedPattern("too many states")
+        self._kinds.append(kind)
+        self._args.append(arg)
+        self._outs.append(outs)
+        self._withins.append(self._within)
+        return len(self._kinds) - 1
+
+    def _build(self, node: Node, after: int) -> int:
+        # the state that matches `node` (backwards, unless `_forward`) and
+        # then goes to `after`. where a state can go more than one way, the
+        # way python's engine would try first is first
+        kind = node[0]
+        if kind == "char":
+            self._tests.append(re.compile(node[1], self._char_flags))
+            return self._state(CHAR, len(self._tests) - 1, [after])
+        elif kind == "assert":
+            self._asserts.add(node[1])
+            return self._state(ASSERT, node[1], [after])
+        elif kind == "cat":
+            # built from whichever item is matched last
+            items = node[1][::-1] if self._forward else node[1]
+            for item in items:
+                after = self._build(item, after)
+            return after
+        elif kind == "alt":
+            return self._state(SPLIT, None, [self._build(n, after) for n in node[1]])
+        elif kind == "group":
+            if not self._forward:
+                return self._build(node[2], after)
+            end = self._state(SAVE, node[1] * 2 + 1, [after])
+            return self._state(SAVE, node[1] * 2, [self._build(node[2], end)])
+        else:
+            _, inner, minimum, maximum, greedy = node
+            if maximum is not None and maximum < minimum:
+                raise UnsupportedPattern("bad repeat")
+            # python's engine stops repeating once a repetition that didn't
+            # have to happen matches nothing, so each state that decides
+            # whether to repeat again knows which repeat it's for
+            repeat = len(self._repeats)
+            self._repeats.append(greedy)
+            outer = self._within
+            self._within = outer | {repeat}
+            if maximum is None:
+                loop = self._state(LOOP, repeat, [])
+                outs = [self._build(inner, loop), after]
+                self._outs[loop].extend(outs if greedy else outs[::-1])
+                tail = loop
+            else:
+                tail = after
+                for _ in range(maximum - minimum):
+                    outs = [self._build(inner, tail), after]
+                    tail = self._state(LOOP, repeat, outs if greedy else outs[::-1])
+            self._within = outer
+            for _ in range(minimum):
+                tail = self._build(inner, tail)
+            return tail
+
+    def _context(self, text: str, i: int) -> int:
+        # what's around position `i` in `text`, as far as any assertion in
+        # the pattern cares
+        context = 0
+        if i == 0:
+            context |= AT_START
+        if i == len(text):
+            context |= AT_END
+        if i < len(text) and text[i] == "\n":
+            context |= BEFORE_NL
+            if i == len(text) - 1:
+                context |= BEFORE_FINAL_NL
+        if i > 0 and text[i-1] == "\n":
+            context |= AFTER_NL
+        if "b" in self._asserts:
+            before = i > 0 and self._word.match(text[i-1]) is not None
+            after = i < len(text) and self._word.match(text[i]) is not None
+            if before != after:
+                context |= AT_BOUNDARY
+        return context
+
+    def _holds(self, kind: str, context: int) -> bool:
+        if kind == "A":
+            return bool(context & AT_START)
+        elif kind == "Z":
+            return bool(context & AT_END)
+        elif kind == "^":
+            return bool(context & AT_START
+                or (self._multiline and context & AFTER_NL))
+        elif kind == "$":
+            return bool(context & (AT_END | BEFORE_FINAL_NL)
+                or (self._multiline and context & BEFORE_NL))
+        else:
+            return bool(context & AT_BOUNDARY)
+
+    def _closure(self, kernel: FrozenSet[int], context: int
+            ) -> Tuple[FrozenSet[int], bool]:
+        consuming: Set[int] = set()
+        matched = False
+        seen: Set[int] = set(kernel)
+        stack = list(kernel)
+        while stack:
+            state = stack.pop()
+            kind = self._kinds[state]
+            if kind == CHAR:
+                consuming.add(state)
+                continue
+            elif kind == MATCH:
+                matched = True
+                continue
+            elif kind == ASSERT and not self._holds(self._args[state], context):
+                continue
+            for out in self._outs[state]:
+                if out not in seen:
+                    seen.add(out)
+                    stack.append(out)
+        closure = (self._intern(frozenset(consuming)), matched)
+        self._closures[(kernel, context)] = closure
+        return closure
+
+    def _step(self, consuming: FrozenSet[int], char: str) -> FrozenSet[int]:
+        if (len(self._interned) > MAX_DFA_STATES
+                or len(self._steps) > MAX_TRANSITIONS):
+            self._reset()
+            consuming = self._intern(consuming)
+        following = {self._start}
+        for state in consuming:
+            key = (self._args[state], char)
+            if (member := self._members.get(key)) is None:
+                member = self._members[key] = (
+                    self._tests[self._args[state]].fullmatch(char) is not None
+                )
+            if member:
+                following.add(self._outs[state][0])
+        kernel = self._intern(frozenset(following))
+        self._steps[(consuming, char)] = kernel
+        return kernel
+
+    # where the leftmost match in `text` starts, or None if there isn't one
+    def leftmost(self, text: str) -> Optional[int]:
+        # inlined, as this is the hot path
+        closures, steps, asserts = self._closures, self._steps, self._asserts
+        leftmost: Optional[int] = None
+        kernel = self._initial
+        i = len(text)
+        while True:
+            context = self._context(text, i) if asserts else 0
+            if (closure := closures.get((kernel, context))) is None:
+                closure = self._closure(kernel, context)
+            consuming, matched = closure
+            if matched:
+                leftmost = i
+            if i == 0:
+                return leftmost
+            i -= 1
+            if (next_kernel := steps.get((consuming, text[i]))) is None:
+                next_kernel = self._step(consuming, text[i])
+                # the caches might have been thrown away
+                closures, steps = self._closures, self._steps
+            kernel = next_kernel
+
+    def _member(self, test: int, char: str) -> bool:
+        key = (test, char)
+        if (member := self._members.get(key)) is None:
+            if len(self._members) > MAX_TRANSITIONS:
+                self._members.clear()
+            member = self._members[key] = self._tests[test].fullmatch(char) is not None
+        return member
+
+    def _follow(self, threads: List[Tuple[int, Slots]], i: int, context: int
+            ) -> List[Tuple[int, Slots]]:
+        # `threads` followed, at `i`, to the states that consume a character
+        # or match, in the order python's engine would try them. a thread
+        # also has the repeats that started repeating at `i` (and that it's
+        # still in), as another repetition that matches nothing ends them.
+        # only the first thread to get to a state with the same repeats is
+        # kept, as any later one can only do the same from there. threads
+        # with no slots aren't given any
+        kinds, args, outs, withins = self._kinds, self._args, self._outs, self._withins
+        followed: List[Tuple[int, Slots]] = []
+        seen: Set[Tuple[int, FrozenSet[int]]] = set()
+        for thread, thread_slots in threads:
+            stack = [(thread, thread_slots, NO_REPEATS)]
+            while stack:
+                state, slots, repeating = stack.pop()
+                kind = kinds[state]
+                if kind == CHAR or kind == MATCH:
+                    # consuming a character ends every repetition
+                    repeating = NO_REPEATS
+                else:
+                    repeating &= withins[state]
+                if (state, repeating) in seen:
+                    continue
+                seen.add((state, repeating))
+
+                if kind == CHAR or kind == MATCH:
+                    followed.append((state, slots))
+                elif kind == ASSERT:
+                    if self._holds(args[state], context):
+                        stack.append((outs[state][0], slots, repeating))
+                elif kind == SAVE:
+                    if slots:
+                        slot = args[state]
+                        slots = slots[:slot] + (i,) + slots[slot+1:]
+                    stack.append((outs[state][0], slots, repeating))
+                elif kind == LOOP:
+                    repeat = args[state]
+                    if repeat in repeating:
+                        # a repetition matched nothing. greedy repeats try
+                        # repeating first, lazy ones last
+                        done = outs[state][1 if self._repeats[repeat] else 0]
+                        stack.append((done, slots, repeating))
+                    else:
+                        repeating = repeating | {repeat}
+                        stack.extend((out, slots, repeating) for out in reversed(outs[state]))
+                else:
+                    stack.extend((out, slots, repeating) for out in reversed(outs[state]))
+        return followed
+
+    def _ordered_closure(self, kernel: Tuple[int, ...], i: int, context: int
+            ) -> Tuple[Tuple[int, ...], bool]:
+        consuming: List[int] = []
+        matched = False
+        for state, _ in self._follow([(s, ()) for s in kernel], i, context):
+            if self._kinds[state] == MATCH:
+                # the threads after this one would only be tried if it
+                # hadn't matched
+                matched = True
+                break
+            consuming.append(state)
+        closure = (tuple(consuming), matched)
+        self._ordered_closures[(kernel, context)] = closure
+        return closure
+
+    def _ordered_step(self, consuming: Tuple[int, ...], char: str) -> Tuple[int, ...]:
+        if (len(self._ordered_closures) > MAX_DFA_STATES
+                or len(self._ordered_steps) > MAX_TRANSITIONS):
+            self._reset()
+        kernel = tuple(self._outs[s][0] for s in consuming
+            if self._member(self._args[s], char))
+        self._ordered_steps[(consuming, char)] = kernel
+        return kernel
+
+    # where the match python's engine would find at `start` ends, or None if
+    # there isn't one. a `forward` automaton's threads, in the order they'd
+    # be tried, are run as a DFA, built lazily and kept as for `leftmost`
+    def end(self, text: str, start: int) -> Optional[int]:
+        closures, steps = self._ordered_closures, self._ordered_steps
+        asserts = self._asserts
+        end: Optional[int] = None
+        kernel: Tuple[int, ...] = (self._start,)
+        i = start
+        while True:
+            context = self._context(text, i) if asserts else 0
+            if (closure := closures.get((kernel, context))) is None:
+                closure = self._ordered_closure(kernel, i, context)
+            consuming, matched = closure
+            if matched:
+                end = i
+            if not consuming or i == len(text):
+                return end
+            if (next_kernel := steps.get((consuming, text[i]))) is None:
+                next_kernel = self._ordered_step(consuming, text[i])
+                # the caches might have been thrown away
+                closures, steps = self._ordered_closures, self._ordered_steps
+            kernel = next_kernel
+            i += 1
+
+    # the slots of the match python's engine would find at `start`, or None
+    # if there isn't one. a `forward` automaton's threads, each with their
+    # own slots, are stepped through the text together, at most one per NFA
+    # state, so it's linear in the length of the match
+    def match(self, text: str, start: int, groups: int) -> Optional[Slots]:
+        kinds, args, outs = self._kinds, self._args, self._outs
+        initial = (start, -1) + (-1, -1) * groups
+        context = self._context(text, start) if self._asserts else 0
+        threads = self._follow([(self._start, initial)], start, context)
+        found: Optional[Slots] = None
+        i = start
+        while threads:
+            following: List[Tuple[int, Slots]] = []
+            for state, slots in threads:
+                if kinds[state] == MATCH:
+                    # the threads after this one would only have been tried
+                    # if it hadn't matched
+                    found = slots[:1] + (i,) + slots[2:]
+                    break
+                elif i < len(text) and self._member(args[state], text[i]):
+                    following.append((outs[state][0], slots))
+            if i == len(text):
+                break
+            i += 1
+            context = self._context(text, i) if self._asserts else 0
+            threads = self._follow(following, i, context)
+        return found
+
+class LinearMatch:
+    # what a LinearPattern finds; the parts of re.Match that are about where
+    # the match and its groups are. where the groups are is only worked out
+    # if it's asked for
+    __slots__ = ("string", "re", "_start", "_end", "_slots")
+    def __init__(self, string: str, pattern: "LinearPattern", start: int, end: int):
+        self.string = string
+        self.re = pattern
+        self._start = start
+        self._end = end
+        self._slots: Optional[Slots] = None
+    def __repr__(self) -> str:
+        return f"<LinearMatch object; span={self.span()!r}, match={self.group()!r}>"
+
+    def span(self, group: int = 0) -> Tuple[int, int]:
+        if group == 0:
+            return self._start, self._end
+        if self._slots is None:
+            slots = self.re._forward.match(self.string, self._start, self.re.compiled.groups)
+            # it's the same match, so is found again
+            self._slots = cast(Slots, slots)
+        if not 0 <= group < len(self._slots) // 2:
+            raise IndexError("no such group")
+        return self._slots[group * 2], self._slots[group * 2 + 1]
+    def start(self, group: int = 0) -> int:
+        return self.span(group)[0]
+    def end(self, group: int = 0) -> int:
+        return self.span(group)[1]
+
+    def _group(self, group: int) -> Optional[str]:
+        start, end = self.span(group)
+        return None if start == -1 else self.string[start:end]
+    def group(self, *groups: int) -> Any:
+        if len(groups) > 1:
+            return tuple(self._group(g) for g in groups)
+        return self._group(groups[0] if groups else 0)
+    def __getitem__(self, group: int) -> Optional[str]:
+        return self._group(group)
+    def groups(self, default: Any = None) -> Tuple[Any, ...]:
+        return tuple(default if (g := self._group(i)) is None else g
+            for i in range(1, self.re.compiled.groups + 1))
+
+class LinearPattern:
+    # stands in for a compiled pattern, finding whether and where it matches,
+    # and where its groups are, in time linear in the length of the text: a
+    # reversed automaton finds where the leftmost match starts and a forward
+    # one where it ends
+    __slots__ = ("compiled", "pattern", "flags", "_automaton", "_forward",
+        "__weakref__")
+    def __init__(self,
+            compiled: Pattern,
+            automaton: _Automaton,
+            forward: _Automaton,
+            flags: int):
+
+        self.compiled = compiled
+        self.pattern = compiled.pattern
+        self.flags = flags
+        self._automaton = automaton
+        self._forward = forward
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return (compile_linear, (self.pattern, self.flags))
+
+    def __repr__(self) -> str:
+        return f"LinearPattern({self.pattern!r})"
+
+    def search(self, text: str) -> Optional[LinearMatch]:
+        start = self._automaton.leftmost(text)
+        if start is None:
+            return None
+        # there's a match that starts here, or the reversed automaton
+        # wouldn't have found it
+        if (end := self._forward.end(text, start)) is None:
+            return None
+        return LinearMatch(text, self, start, end)
+
+# what a regex is compiled to, by `compile_linear`
+CompiledPattern = Union[Pattern, LinearPattern]
+
+def _tokens(compiled: Pattern) -> List[RegexToken]:
+    if compiled.flags & (re.X | re.L) or not isinstance(compiled.pattern, str):
+        raise UnsupportedPattern("unsupported flags")
+    try:
+        return tokenise(compiled.pattern)
+    except RegexLexerError as e:
+        raise UnsupportedPattern(str(e))
+
+# `pattern` compiled by python, or as a LinearPattern if `flags` has LINEAR
+# or, if it doesn't, if it's one that backtracking could take exponential
+# time on (see `classify`). re.error if it has LINEAR and can't be an
+# automaton
+def compile_linear(pattern: str, flags: int) -> CompiledPattern:
+    compiled = re.compile(pattern, flags & ~LINEAR)
+    try:
+        tokens = _tokens(compiled)
+        if (flags & LINEAR
+                or classify_tokens(tokens, compiled.flags) == Risk.EXPONENTIAL):
+            tree = _Parser(tokens).parse()
+            return LinearPattern(compiled,
+                _Automaton(tree, compiled.flags),
+                _Automaton(tree, compiled.flags, forward=True),
+                compiled.flags | (flags & LINEAR))
+    except UnsupportedPattern as e:
+        if flags & LINEAR:
+            raise re.error(f"can't be matched in linear time: {e}")
+    return compiled
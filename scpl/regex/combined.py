@@ -0,0 +1,77 @@
+import re
+from typing import Dict, Generic, List, Optional, Pattern, Tuple, TypeVar
+from .automaton import CompiledPattern
+
+TValue = TypeVar("TValue")
+
+# how many patterns go in one alternation. python's regex engine tries
+# every alternative at every position, so past a point a longer alternation
+# is no quicker than two
+CHUNK_SIZE = 64
+
+# numbered and named backreferences, named groups (whose names could clash)
+# conditionals and global inline flags, none of which survive being put in
+# an alternation with other patterns. an escaped backslash before a digit
+# is rejected too, which is only a missed merge
+UNMERGEABLE = re.compile(r"\\[1-9]|\(\?P|\(\?\(|\(\?[aiLmsux]+\)")
+
+# whether `compiled` can be one alternative of many in a combined pattern
+def mergeable(compiled: CompiledPattern) -> bool:
+    if not isinstance(compiled, re.Pattern):
+        # e.g. a LinearPattern, which would be backtracked on in an alternation
+        return False
+    elif compiled.flags & re.X or UNMERGEABLE.search(compiled.pattern):
+        # a verbose pattern's comment would swallow what follows it
+        return False
+    # one that can match nothing would make the whole alternation always
+    # match, which would rule nothing out
+    return compiled.search("") is None
+
+class CombinedPatterns(Generic[TValue]):
+    # many patterns, each holding any number of values, merged in to a few
+    # alternations (one per flags per CHUNK_SIZE patterns) so that finding
+    # which might match is a few searches rather than one per pattern. an
+    # alternation that doesn't match rules out every value in it; one that
+    # does can't say which of its patterns did, so rules out none of them.
+    # the alternations are compiled on the first `find` after an `add`
+    def __init__(self):
+        # (pattern, flags) to values, to merge duplicates
+        self._patterns: Dict[Tuple[str, int], List[TValue]] = {}
+        self._chunks: Optional[List[Tuple[Pattern, List[TValue]]]] = None
+
+    def __repr__(self) -> str:
+        return f"CombinedPatterns(patterns={len(self)})"
+    def __len__(self) -> int:
+        return len(self._patterns)
+
+    # `compiled` has to be `mergeable`
+    def add(self, compiled: Pattern, value: TValue):
+        key = (compiled.pattern, compiled.flags)
+        self._patterns.setdefault(key, []).append(value)
+        self._chunks = None
+
+    def _build(self) -> List[Tuple[Pattern, List[TValue]]]:
+        by_flags: Dict[int, List[Tuple[str, List[TValue]]]] = {}
+        for (pattern, flags), values in self._patterns.items():
+            by_flags.setdefault(flags, []).append((pattern, values))
+
+        chunks: List[Tuple[Pattern, List[TValue]]] = []
+        for flags, patterns in by_flags.items():
+            for i in range(0, len(patterns), CHUNK_SIZE):
+                chunk = patterns[i:i+CHUNK_SIZE]
+                combined = "|".join(f"(?:{pattern})" for pattern, _ in chunk)
+                values = [v for _, chunk_values in chunk for v in chunk_values]
+                chunks.append((re.compile(combined, flags), values))
+        return chunks
+
+    # values of every pattern that might match `text`; every pattern that
+    # does is certain to be among them
+    def find(self, text: str) -> List[TValue]:
+        if self._chunks is None:
+            self._chunks = self._build()
+
+        values: List[TValue] = []
+        for combined, chunk_values in self._chunks:
+            if combined.search(text) is not None:
+                values.extend(chunk_values)
+        return values
@@ -0,0 +1,218 @@
+import re
+from dataclasses import dataclass
+from typing      import List, Optional, Sequence, Tuple
+from .lexer import (tokenise, RegexLexerError, RegexToken, RegexTokenClass,
+    RegexTokenLiteral, RegexTokenOpaque, RegexTokenOperator, RegexTokenRepeat,
+    RegexTokenScope)
+
+# groups whose contents have to match for the group to, unlike lookarounds
+# and groups with their own flags. the lexer keeps the contents of named
+# groups and lookarounds in the group's opening token, so they're missed
+PLAIN_GROUPS = {"(", "(?:"}
+
+def _literal(token: RegexToken) -> str:
+    # the character `token` matches only itself as, or "" if it doesn't
+    if isinstance(token, RegexTokenLiteral):
+        return token.text
+    elif (isinstance(token, RegexTokenOpaque)
+            and len(token.text) == 2
+            and not token.text[1].isalnum()):
+        # an escaped `.`, `(` etc
+        return token.text[1]
+    else:
+        return ""
+
+def _repeat(tokens: Sequence[RegexToken], i: int) -> Tuple[int, int]:
+    # the fewest times the thing before `i` has to match, given the
+    # quantifier at `i` if there is one, and where the quantifier ends
+    if i >= len(tokens):
+        return 1, i
+
+    token = tokens[i]
+    if isinstance(token, RegexTokenOperator) and token.text in {"?", "*", "+"}:
+        minimum = 1 if token.text == "+" else 0
+        i += 1
+    elif isinstance(token, RegexTokenRepeat) and token.text == "{":
+        bounds = tokens[i+1].text.split(",", 1)[0]
+        # something like `{x}` is a literal `{x}` to python, but it's safe
+        # to treat it as possibly matching nothing
+        minimum = int(bounds) if bounds.isdigit() else 0
+        i += 3
+    else:
+        return 1, i
+
+    # lazy or possessive
+    if (i < len(tokens)
+            and isinstance(tokens[i], RegexTokenOperator)
+            and tokens[i].text in {"?", "+"}):
+        i += 1
+    return minimum, i
+
+def _alternates(tokens: Sequence[RegexToken]) -> bool:
+    depth = 0
+    for token in tokens:
+        if isinstance(token, RegexTokenScope):
+            depth += -1 if token.text == ")" else 1
+        elif (depth == 0
+                and isinstance(token, RegexTokenOperator)
+                and token.text == "|"):
+            return True
+    return False
+
+def _literals(tokens: Sequence[RegexToken]) -> List[str]:
+    if _alternates(tokens):
+        # whichever alternative matches, there's nothing any one of them has
+        # to contain
+        return []
+
+    runs: List[str] = []
+    run = ""
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if isinstance(token, RegexTokenScope):
+            depth, end = 1, i + 1
+            while depth:
+                if isinstance(tokens[end], RegexTokenScope):
+                    depth += -1 if tokens[end].text == ")" else 1
+                end += 1
+            minimum, after = _repeat(tokens, end)
+            runs.append(run)
+            run = ""
+            if minimum and token.text in PLAIN_GROUPS:
+                runs.extend(_literals(tokens[i+1:end-1]))
+            i = after
+        elif isinstance(token, RegexTokenClass):
+            end = i + 1
+            while not (isinstance(tokens[end], RegexTokenClass)
+                    and tokens[end].text == "]"):
+                end += 1
+            _, i = _repeat(tokens, end + 1)
+            runs.append(run)
+            run = ""
+        elif char := _literal(token):
+            minimum, after = _repeat(tokens, i + 1)
+            if after == i + 1:
+                run += char
+            else:
+                # it might repeat more than `minimum` times, so what's before
+                # and after it are only certain to be next to `minimum` of it
+                run += char * minimum
+                runs.append(run)
+                run = char * minimum
+            i = after
+        elif isinstance(token, RegexTokenRepeat):
+            # braces with nothing before them to repeat, which python reads
+            # as literal characters
+            runs.append(run)
+            run = ""
+            i += 3
+        else:
+            # `.`, anchors, `\d` and the like, and their quantifier, whose
+            # body mustn't be read as a literal
+            runs.append(run)
+            run = ""
+            _, i = _repeat(tokens, i + 1)
+    runs.append(run)
+    return [r for r in runs if r]
+
+# characters that python's case insensitive matching only ever matches with
+# what `str.lower()` makes them, so that case insensitive literals can be
+# looked for in lowercased text. `i` and `s` are missing because they also
+# match `ı` and `ſ`
+FOLD_SAFE = set(chr(c) for c in range(128)) - set("iIsS")
+
+# substrings that every match of `pattern` contains, lowercased if `flags`
+# has re.I. conservative; anything that isn't certain is left out
+def required_literals(pattern: str, flags: int) -> List[str]:
+    if flags & re.X:
+        # whitespace and comments aren't what they look like
+        return []
+    try:
+        tokens = tokenise(pattern)
+    except RegexLexerError:
+        return []
+    literals = _literals(tokens)
+
+    if flags & re.I:
+        folded: List[str] = []
+        for literal in literals:
+            piece = ""
+            for char in literal:
+                if char in FOLD_SAFE:
+                    piece += char.lower()
+                elif piece:
+                    folded.append(piece)
+                    piece = ""
+            if piece:
+                folded.append(piece)
+        literals = folded
+    return literals
+
+@dataclass
+class PlainShape:
+    # a pattern that only ever matches one of `literals`, and nothing else
+    # about the text, e.g. `spam`, `^foo`, `bar$` or `^(a|b)$`
+    literals: List[str]
+    # anchored to the start of the text
+    start: bool
+    # anchored to the end of the text
+    end: bool
+    # and the end can also be just before a final "\n" (`$`, rather than `\Z`)
+    newline: bool
+
+def _alternatives(tokens: Sequence[RegexToken]) -> Optional[List[str]]:
+    alternatives = [""]
+    for token in tokens:
+        if isinstance(token, RegexTokenOperator) and token.text == "|":
+            alternatives.append("")
+        elif char := _literal(token):
+            alternatives[-1] += char
+        else:
+            return None
+    return alternatives
+
+# the plain string test `pattern` amounts to, if it's one
+def plain_shape(pattern: str, flags: int) -> Optional[PlainShape]:
+    if flags & (re.I | re.X):
+        return None
+    try:
+        tokens = tokenise(pattern)
+    except RegexLexerError:
+        return None
+
+    start = end = newline = False
+    # the lexer only makes these of anchors
+    if tokens and tokens[0].text in {"^", "\\A"}:
+        start = True
+        tokens = tokens[1:]
+    if tokens and tokens[-1].text in {"$", "\\Z"}:
+        end = True
+        newline = tokens[-1].text == "$"
+        tokens = tokens[:-1]
+    if flags & re.M and (start or end):
+        # anchored to lines, not the text
+        return None
+
+    if (len(tokens) > 2
+            and tokens[0].text in PLAIN_GROUPS
+            and isinstance(tokens[0], RegexTokenScope)
+            and not any(isinstance(t, RegexTokenScope) for t in tokens[1:-1])):
+        # the lexer makes sure the last token closes the group
+        literals = _alternatives(tokens[1:-1])
+    else:
+        literals = _alternatives(tokens)
+        if literals is not None and len(literals) > 1:
+            # `^a|b$` is `(^a)|(b$)`
+            return None
+
+    if (literals is None
+            or not all(literals)
+            or (newline and any("\n" in literal for literal in literals))):
+        # a pattern that can match nothing only ever matches nothing, and
+        # which of two literals `$` would match with a newline is in them
+        # depends on their order
+        return None
+    if len(literals) > 1 and not (start and end):
+        return None
+    return PlainShape(literals, start, end, newline)
@@ -0,0 +1,286 @@
+import re
+from enum   import IntEnum
+from typing import FrozenSet, List, Optional, Sequence, Set, Tuple
+from .lexer import (tokenise, RegexLexerError, RegexToken, RegexTokenClass,
+    RegexTokenLiteral, RegexTokenOpaque, RegexTokenOperator, RegexTokenRange,
+    RegexTokenRepeat, RegexTokenScope)
+
+class Risk(IntEnum):
+    SAFE        = 0
+    # backtracking could take time polynomial in the length of the text,
+    # e.g. `\d+\d+`
+    POLYNOMIAL  = 1
+    # backtracking could take time exponential in the length of the text,
+    # e.g. `(a+)+` or `(a|ab)*`
+    EXPONENTIAL = 2
+
+# the start of groups the lexer keeps some of the contents of in the group's
+# opening token: named groups, lookarounds and atomic groups
+GROUP_PREFIX = re.compile(r"\(\?(?:P<\w+>|<?[=!]|>)")
+# groups that take no characters themselves
+ZERO_WIDTH   = ("(?=", "(?!", "(?<=", "(?<!")
+# escapes for one character known ahead of time
+ESCAPED      = {"\\n": "\n", "\\t": "\t", "\\r": "\r", "\\f": "\f", "\\v": "\v", "\\a": "\a"}
+ASSERTIONS   = {"\\b", "\\B", "\\A", "\\Z"}
+SCOPED_FLAGS = re.compile(r"\(\?[aiLmsux-]+:")
+GLOBAL_FLAGS = re.compile(r"\(\?[aiLmsux]+")
+GLOBAL_FOLD  = re.compile(r"\(\?[aLmsux]*i[aLmsux]*")
+
+class _Unanalysable(Exception):
+    pass
+
+class _Shape:
+    # what's known about a piece of a pattern
+    __slots__ = ("chars", "nullable", "repeats", "grows", "ambiguous", "unbounded", "risk")
+    def __init__(self,
+            # characters it could take, None if it could be any
+            chars: Optional[FrozenSet[str]],
+            nullable: bool,
+            # whether it has a quantifier that can match more than once
+            repeats: bool = False,
+            # whether it has a quantifier that can match without bound
+            grows: bool = False,
+            # whether it has an alternation with more than one way to match
+            ambiguous: bool = False,
+            # whether it is itself repeated without bound
+            unbounded: bool = False,
+            risk: Risk = Risk.SAFE):
+        self.chars = chars
+        self.nullable = nullable
+        self.repeats = repeats
+        self.grows = grows
+        self.ambiguous = ambiguous
+        self.unbounded = unbounded
+        self.risk = risk
+
+EMPTY = _Shape(frozenset(), True)
+ANY   = _Shape(None, False)
+
+def _overlap(a: Optional[FrozenSet[str]], b: Optional[FrozenSet[str]]) -> bool:
+    if a is None:
+        return b is None or bool(b)
+    elif b is None:
+        return bool(a)
+    return not a.isdisjoint(b)
+
+def _union(shapes: Sequence[_Shape]) -> Optional[FrozenSet[str]]:
+    chars: FrozenSet[str] = frozenset()
+    for shape in shapes:
+        if shape.chars is None:
+            return None
+        chars |= shape.chars
+    return chars
+
+def _concat(items: List[_Shape]) -> _Shape:
+    if len(items) == 1:
+        return items[0]
+
+    risk = max((item.risk for item in items), default=Risk.SAFE)
+    # unbounded repeats with nothing but what could match nothing between
+    # them; if two take the same characters, any split of a run of those
+    # characters between them is a match, and each is tried
+    adjacent: List[_Shape] = []
+    for item in items:
+        if item.unbounded:
+            if any(_overlap(prev.chars, item.chars) for prev in adjacent):
+                risk = max(risk, Risk.POLYNOMIAL)
+            adjacent.append(item)
+        elif not item.nullable:
+            adjacent = []
+
+    return _Shape(
+        _union(items),
+        all(item.nullable for item in items),
+        any(item.repeats for item in items),
+        any(item.grows for item in items),
+        any(item.ambiguous for item in items),
+        risk=risk
+    )
+
+def _alternate(branches: List[_Shape]) -> _Shape:
+    if len(branches) == 1:
+        return branches[0]
+
+    ambiguous = any(branch.ambiguous for branch in branches)
+    for i, branch in enumerate(branches):
+        for other in branches[i+1:]:
+            if (_overlap(branch.chars, other.chars)
+                    or (branch.nullable and other.nullable)):
+                ambiguous = True
+    return _Shape(
+        _union(branches),
+        any(branch.nullable for branch in branches),
+        any(branch.repeats for branch in branches),
+        any(branch.grows for branch in branches),
+        ambiguous,
+        risk=max(branch.risk for branch in branches)
+    )
+
+def _class(tokens: Sequence[RegexToken], i: int, fold: bool) -> Tuple[_Shape, int]:
+    negated = tokens[i].text == "[^"
+    chars: Optional[Set[str]] = set()
+    i += 1
+    while not (isinstance(tokens[i], RegexTokenClass) and tokens[i].text == "]"):
+        token = tokens[i]
+        if chars is not None:
+            if isinstance(token, RegexTokenLiteral):
+                chars.update(_literal(token.text, fold))
+            elif isinstance(token, RegexTokenRange):
+                start, end = ord(token.text[0]), ord(token.text[-1])
+                for code in range(start, end + 1):
+                    chars.update(_literal(chr(code), fold))
+            elif (isinstance(token, RegexTokenOpaque)
+                    and not token.text[1].isalnum()):
+                chars.update(_literal(token.text[1], fold))
+            else:
+                chars = None
+        i += 1
+
+    if negated or chars is None:
+        return ANY, i + 1
+    return _Shape(frozenset(chars), False), i + 1
+
+def _literal(char: str, fold: bool) -> FrozenSet[str]:
+    if fold:
+        return frozenset((char, char.lower(), char.upper()))
+    return frozenset((char,))
+
+def _quantify(shape: _Shape, tokens: Sequence[RegexToken], i: int
+        ) -> Tuple[_Shape, int]:
+    token = tokens[i] if i < len(tokens) else None
+    maximum: Optional[int]
+    if isinstance(token, RegexTokenOperator) and token.text in {"?", "*", "+"}:
+        minimum = 1 if token.text == "+" else 0
+        maximum = 1 if token.text == "?" else None
+        i += 1
+    elif isinstance(token, RegexTokenRepeat) and token.text == "{":
+        bounds = tokens[i+1].text.split(",")
+        if not all(b.isdigit() or not b for b in bounds) or len(bounds) > 2:
+            # literal braces
+            return shape, i
+        minimum = int(bounds[0] or 0)
+        if len(bounds) == 1:
+            maximum = minimum
+        else:
+            maximum = int(bounds[1]) if bounds[1] else None
+        i += 3
+    else:
+        return shape, i
+
+    possessive = False
+    if (i < len(tokens)
+            and isinstance(tokens[i], RegexTokenOperator)
+            and tokens[i].text in {"?", "+"}):
+        # lazy only changes the order things are tried in, possessive
+        # means they aren't tried again
+        possessive = tokens[i].text == "+"
+        i += 1
+
+    risk = shape.risk
+    if not possessive:
+        # one repeat in another, or a repeated alternation with more than one
+        # way to match, can split a run of characters between its repeats in
+        # exponentially many ways, or polynomially many when the outer one
+        # is bounded and the inner one isn't
+        if maximum is None and (shape.repeats or shape.ambiguous):
+            risk = max(risk, Risk.EXPONENTIAL)
+        elif maximum is not None and maximum > 1 and shape.grows:
+            risk = max(risk, Risk.POLYNOMIAL)
+
+    return _Shape(
+        shape.chars,
+        shape.nullable or minimum == 0,
+        shape.repeats or maximum is None or maximum > 1,
+        shape.grows or maximum is None,
+        shape.ambiguous,
+        unbounded=maximum is None and not possessive,
+        risk=risk
+    ), i
+
+def _group(tokens: Sequence[RegexToken], i: int, fold: bool) -> Tuple[_Shape, int]:
+    opener = tokens[i].text
+    inner, i = _sequence(tokens, i + 1, fold)
+    i += 1 # ")"
+
+    if opener in {"(", "(?:"} or SCOPED_FLAGS.fullmatch(opener):
+        return inner, i
+    elif GLOBAL_FLAGS.fullmatch(opener) or opener.startswith("(?#"):
+        # global flags, or a comment
+        return EMPTY, i
+    elif opener.startswith("(?P="):
+        # a named backreference
+        return _Shape(None, True), i
+    elif (prefix := GROUP_PREFIX.match(opener)) is not None:
+        kept = _sequence(tokenise(opener[prefix.end():]), 0, fold)[0]
+        shape = _concat([kept, inner])
+        if opener.startswith(ZERO_WIDTH):
+            return _Shape(frozenset(), True, risk=shape.risk), i
+        return shape, i
+    else:
+        # e.g. a conditional
+        raise _Unanalysable(opener)
+
+def _atom(tokens: Sequence[RegexToken], i: int, fold: bool) -> Tuple[_Shape, int]:
+    token = tokens[i]
+    if isinstance(token, RegexTokenScope):
+        return _group(tokens, i, fold)
+    elif isinstance(token, RegexTokenClass):
+        return _class(tokens, i, fold)
+    elif isinstance(token, RegexTokenLiteral):
+        return _Shape(_literal(token.text, fold), False), i + 1
+    elif isinstance(token, RegexTokenOpaque):
+        if token.text in ASSERTIONS:
+            return EMPTY, i + 1
+        elif token.text in ESCAPED:
+            return _Shape(frozenset(ESCAPED[token.text]), False), i + 1
+        elif not token.text[1].isalnum():
+            return _Shape(_literal(token.text[1], fold), False), i + 1
+        elif token.text[1].isdigit():
+            # a backreference, which could be anything, even nothing
+            return _Shape(None, True), i + 1
+        return ANY, i + 1
+    elif isinstance(token, RegexTokenOperator) and token.text in {"^", "$"}:
+        return EMPTY, i + 1
+    elif isinstance(token, RegexTokenRepeat):
+        # braces python reads as literal characters
+        return ANY, i + 3
+    return ANY, i + 1
+
+def _sequence(tokens: Sequence[RegexToken], i: int, fold: bool) -> Tuple[_Shape, int]:
+    # up to the end of the current group
+    branches: List[_Shape] = []
+    items: List[_Shape] = []
+    while i < len(tokens):
+        token = tokens[i]
+        if isinstance(token, RegexTokenScope) and token.text == ")":
+            break
+        elif isinstance(token, RegexTokenOperator) and token.text == "|":
+            branches.append(_concat(items) if items else EMPTY)
+            items = []
+            i += 1
+        else:
+            shape, i = _atom(tokens, i, fold)
+            shape, i = _quantify(shape, tokens, i)
+            items.append(shape)
+    branches.append(_concat(items) if items else EMPTY)
+    return _alternate(branches), i
+
+def classify_tokens(tokens: Sequence[RegexToken], flags: int) -> Risk:
+    fold = bool(flags & re.I) or any(
+        isinstance(t, RegexTokenScope) and GLOBAL_FOLD.fullmatch(t.text) for t in tokens
+    )
+    try:
+        return _sequence(tokens, 0, fold)[0].risk
+    except (_Unanalysable, RegexLexerError):
+        # can't be checked, so assume the worst
+        return Risk.EXPONENTIAL
+
+# how long backtracking could take, at worst, to match `pattern`. it's the
+# pattern's shape that's looked at, so it errs towards risky; `(ab+)+` is
+# called exponential, though every repeat of it has to start with an `a`
+def classify(pattern: str, flags: int = 0) -> Risk:
+    try:
+        tokens = tokenise(pattern)
+    except RegexLexerError:
+        return Risk.EXPONENTIAL
+    return classify_tokens(tokens, flags)
@@ -1,7 +1,18 @@
 from .lexer import *
 from .eval import *
+from .codegen import *
+from .vm import *
+from .prepared import *
+from .ruleset import *
 
 from .parser import *
 from .parser_operators import *
 
+from .precompile import *
+
 from .regex import *
+from .radix import *
+from .ahocorasick import *
+from .intervals import *
+from .arrays import *
+from .mapped import *
@@ -0,0 +1,35 @@
+import unittest
+
+from scpl.common.ahocorasick import AhoCorasick
+
+class AhoCorasickTestFind(unittest.TestCase):
+    def setUp(self):
+        self.automaton: AhoCorasick[str] = AhoCorasick()
+        for needle in ["he", "she", "his", "hers"]:
+            self.automaton.add(needle, needle)
+
+    def test_find(self):
+        self.assertEqual(sorted(self.automaton.find("ushers")), ["he", "hers", "she"])
+        self.assertEqual(sorted(self.automaton.find("this")), ["his"])
+        self.assertEqual(self.automaton.find("nothing"), [])
+        self.assertEqual(self.automaton.find(""), [])
+
+    def test_once(self):
+        # however many times a needle is in the text
+        self.assertEqual(self.automaton.find("hehehe"), ["he"])
+
+    def test_values(self):
+        self.automaton.add("he", "again")
+        self.assertEqual(sorted(self.automaton.find("he")), ["again", "he"])
+
+    def test_empty(self):
+        self.automaton.add("", "empty")
+        self.assertEqual(self.automaton.find(""), ["empty"])
+        self.assertEqual(sorted(self.automaton.find("his")), ["empty", "his"])
+
+    def test_overlap(self):
+        automaton: AhoCorasick[str] = AhoCorasick()
+        for needle in ["aab", "ab", "b", "abaab"]:
+            automaton.add(needle, needle)
+        self.assertEqual(sorted(automaton.find("abaab")), ["aab", "ab", "abaab", "b"])
+        self.assertEqual(sorted(automaton.find("aaab")), ["aab", "ab", "b"])
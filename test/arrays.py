@@ -0,0 +1,28 @@
+import unittest
+
+from scpl.common.arrays import SortedArray, TYPECODE_I64, TYPECODE_U32
+
+class ArraysTestSorted(unittest.TestCase):
+    def test_contains(self):
+        values = SortedArray([5, 1, 3, 3], TYPECODE_I64)
+        self.assertEqual(list(values), [1, 3, 5])
+        self.assertIn(1, values)
+        self.assertIn(5, values)
+        self.assertNotIn(0, values)
+        self.assertNotIn(4, values)
+        self.assertNotIn(6, values)
+        self.assertNotIn("1", values)
+
+    def test_negative(self):
+        values = SortedArray([-2, 2], TYPECODE_I64)
+        self.assertIn(-2, values)
+        self.assertNotIn(-1, values)
+
+    def test_overflow(self):
+        self.assertRaises(OverflowError, lambda: SortedArray([1 << 32], TYPECODE_U32))
+
+    def test_equal(self):
+        self.assertEqual(SortedArray([1, 2], TYPECODE_I64), SortedArray([2, 1], TYPECODE_I64))
+        self.assertEqual(hash(SortedArray([1, 2], TYPECODE_I64)),
+            hash(SortedArray([2, 1], TYPECODE_I64)))
+        self.assertNotEqual(SortedArray([1, 2], TYPECODE_I64), SortedArray([1], TYPECODE_I64))
@@ -0,0 +1,118 @@
+import unittest
+
+from scpl.lexer import tokenise
+from scpl.parser import parse
+from scpl.parser import (ParseBool, ParseConstBool, ParseConstFloat, ParseConstInteger,
+    ParseConstIPv4, ParseConstRegex, ParseConstString, ParseFloat, ParseInteger,
+    ParseIPv4, ParseRegex, ParseString)
+from scpl.eval import compile_python, python_source
+
+VARS = {
+    "a": ParseInteger(),
+    "b": ParseInteger(),
+    "f": ParseFloat(),
+    "s": ParseString(),
+    "r": ParseRegex(),
+    "ip": ParseIPv4(),
+    "t": ParseBool(),
+}
+VALUES = {
+    "a": ParseConstInteger(3),
+    "b": ParseConstInteger(-2),
+    "f": ParseConstFloat(1.5),
+    "s": ParseConstString(None, "hello"),
+    "r": ParseConstRegex(None, "l+", set()),
+    "ip": ParseConstIPv4.from_text("10.84.1.1"),
+    "t": ParseConstBool(True),
+}
+
+class CodegenTestEval(unittest.TestCase):
+    def _compare(self, expression: str):
+        atoms, deps = parse(tokenise(expression), VARS)
+        compiled = compile_python(atoms[0])
+        self.assertEqual(compiled(VALUES), atoms[0].eval(VALUES), expression)
+
+    def test_arithmetic(self):
+        self._compare("a + b * 2 - f")
+        self._compare("(a + 1) * (b - 1) % 5")
+        self._compare("a / b + f ** 2")
+        self._compare("-a ** 2")
+        self._compare("a ** -b")
+        self._compare("~a ^ b | a & 3 << 1 >> b * -1")
+
+    def test_compare(self):
+        self._compare("a == 3")
+        self._compare("a != b")
+        self._compare("a > b == t")
+        self._compare("f < a")
+
+    def test_bools(self):
+        self._compare("a && b && !s")
+        self._compare("a == 3 && b || a > 1")
+        self._compare("!t || (s && f)")
+
+    def test_strings(self):
+        self._compare('s + "x"')
+        self._compare('"ell" in s')
+        self._compare("s =~ /l+/")
+        self._compare("s =~ /el+o/")
+        self._compare("s =~ /EL+O/i")
+        self._compare("s =~ /xy+z/")
+        self._compare("s =~ /ell/ + s")
+        self._compare("s =~ /^he/ && s =~ /lo$/")
+        self._compare("s =~ /^(hi|hello)$/")
+        self._compare("s =~ /^(hi|hello)$/ && !(s =~ /^(x|y)\\Z/)")
+        self._compare("s =~ r")
+        self._compare("s =~ r + /o/i")
+
+    def test_contains(self):
+        self._compare("ip in 10.84.0.0/16")
+        self._compare("ip in {10.84.1.1, 10.84.1.2}")
+        self._compare("a in {1, 2, b}")
+        self._compare("b in {1, 2, b}")
+        self._compare("b in {0 - 1, a}")
+        self._compare("ip in {10.0.0.0/8, 10.84.0.0/16}")
+        self._compare("ip in {192.168.0.0/16}")
+
+class CodegenTestSource(unittest.TestCase):
+    def test_constant(self):
+        atoms, deps = parse(tokenise("1 + 2 * 3"), {})
+        source, constants = python_source(atoms[0])
+        self.assertIn("return 7\n", source)
+
+    def test_variable_once(self):
+        atoms, deps = parse(tokenise("a + a * a"), VARS)
+        source, constants = python_source(atoms[0])
+        self.assertEqual(source.count("_vars['a']"), 1)
+
+    def test_short_circuit(self):
+        # `b` is only read if `a` is true, so reading it must not leak out of
+        # the `&&` in to places `a` being false would reach
+        atoms, deps = parse(tokenise("(a && b) || b"), VARS)
+        compiled = compile_python(atoms[0])
+        self.assertEqual(compiled({"a": ParseConstInteger(0), "b": ParseConstInteger(1)}), True)
+        # and a variable that's never reached is never read
+        atoms, deps = parse(tokenise("t || a"), VARS)
+        compiled = compile_python(atoms[0])
+        self.assertEqual(compiled({"t": ParseConstBool(True)}), True)
+
+    def test_huge_integer(self):
+        # folds to an int with too many digits for python to write out
+        atoms, deps = parse(tokenise("2 << 1w"), {})
+        source, constants = python_source(atoms[0])
+        self.assertIn("return _k", source)
+        self.assertTrue(constants[-1] == 2 << 604800)
+        self.assertEqual(compile_python(atoms[0])({}), 2 << 604800)
+        atoms, deps = parse(tokenise("a < 2 << 1w"), VARS)
+        self.assertEqual(compile_python(atoms[0])(VALUES), True)
+
+    def test_error(self):
+        atoms, deps = parse(tokenise("1 / 0"), {})
+        compiled = compile_python(atoms[0])
+        self.assertRaises(ZeroDivisionError, lambda: compiled({}))
+
+    def test_deep(self):
+        # too deep for python to compile, so we get the tree walker back
+        atoms, deps = parse(tokenise(" + ".join(["a"] * 800)), VARS)
+        compiled = compile_python(atoms[0])
+        self.assertEqual(compiled, atoms[0].eval)
@@ -3,8 +3,10 @@ from ipaddress import ip_network
 
 from scpl.lexer import tokenise
 from scpl.parser import parse
-from scpl.parser import (ParseBool, ParseCIDRv4, ParseCIDRv6, ParseInteger, ParseFloat,
-    ParseRegex, ParseString)
+from scpl.parser import (ParseBool, ParseCIDRv4, ParseCIDRv6, ParseConstRegex,
+    ParseConstString, ParseInteger, ParseFloat, ParseRegex, ParseString)
+from scpl.parser.operands import REGEX_CACHE
+from scpl.parser.operators.casemap import CASEMAP_CACHE
 
 class EvalTestString(unittest.TestCase):
     def test_add_string(self):
@@ -78,3 +80,49 @@ class EvalTestRegex(unittest.TestCase):
         atoms, deps = parse(tokenise("'asd' =~ /^bs/"), {})
         atom = atoms[0].eval({})
         self.assertEqual(atom, "")
+
+class EvalTestCasemap(unittest.TestCase):
+    def test_constant(self):
+        vars = {"a": ParseString(casemap=str.maketrans({"a": "b"}))}
+        atoms, deps = parse(tokenise("a =~ /a/i"), vars)
+        regex = atoms[0]._right
+        self.assertIs(regex.eval({}), regex.eval({}))
+        self.assertEqual(regex.eval({}).pattern, "b")
+
+    def test_cache(self):
+        CASEMAP_CACHE.clear()
+        vars = {
+            "a": ParseString(casemap=str.maketrans({"a": "b"})),
+            "r": ParseRegex()
+        }
+        atoms, deps = parse(tokenise("a =~ r"), vars)
+        values = {"a": ParseConstString(None, "b"), "r": ParseConstRegex(None, "a", {"i"})}
+        self.assertEqual(atoms[0].eval(values), "b")
+        self.assertEqual(atoms[0].eval(values), "b")
+        self.assertEqual(CASEMAP_CACHE.misses, 1)
+        self.assertEqual(CASEMAP_CACHE.hits, 1)
+
+class EvalTestRegexCache(unittest.TestCase):
+    def setUp(self):
+        self._maxsize = REGEX_CACHE.maxsize
+        REGEX_CACHE.clear()
+    def tearDown(self):
+        REGEX_CACHE.resize(self._maxsize)
+
+    def test_cast(self):
+        atoms, deps = parse(tokenise("a + /b/"), {"a": ParseString()})
+        atom1 = atoms[0].eval({"a": ParseConstString(None, "a.")})
+        atom2 = atoms[0].eval({"a": ParseConstString(None, "a.")})
+        self.assertIs(atom1, atom2)
+        self.assertEqual(atom1.pattern, "a\\.b")
+        # one miss each for the cast and the add, then one hit each
+        self.assertEqual(REGEX_CACHE.misses, 2)
+        self.assertEqual(REGEX_CACHE.hits, 2)
+
+    def test_evict(self):
+        REGEX_CACHE.resize(2)
+        atoms, deps = parse(tokenise("a + /b/"), {"a": ParseString()})
+        for value in ["a", "b", "c"]:
+            atoms[0].eval({"a": ParseConstString(None, value)})
+        self.assertEqual(len(REGEX_CACHE), 2)
+        self.assertEqual(REGEX_CACHE.evictions, 4)
@@ -0,0 +1,56 @@
+import unittest
+
+from scpl.common.intervals import IntervalSet
+from scpl.parser import ParseConstCIDRv4, ParseConstIPv4, ParseConstIPv6
+
+def _network(text: str):
+    cidr = ParseConstCIDRv4.from_text(text)
+    return cidr.integer, cidr.prefix
+
+def _ip(text: str) -> int:
+    return ParseConstIPv4.to_int(text)
+
+class IntervalsTestMerge(unittest.TestCase):
+    def test_overlap(self):
+        intervals = IntervalSet([(1, 5), (3, 8), (10, 12)], 8)
+        self.assertEqual(list(intervals.ranges()), [(1, 8), (10, 12)])
+
+    def test_adjacent(self):
+        intervals = IntervalSet([(6, 9), (1, 5)], 8)
+        self.assertEqual(list(intervals.ranges()), [(1, 9)])
+
+    def test_inside(self):
+        intervals = IntervalSet([(1, 10), (2, 3)], 8)
+        self.assertEqual(list(intervals.ranges()), [(1, 10)])
+
+    def test_networks(self):
+        networks = [_network(n) for n in ["10.0.0.0/8", "10.84.0.0/16", "11.0.0.0/8"]]
+        intervals = IntervalSet.from_networks(networks, 32)
+        self.assertEqual(len(intervals), 1)
+        self.assertEqual(list(intervals.networks()), [_network("10.0.0.0/7")])
+
+    def test_unaligned(self):
+        networks = [_network(n) for n in ["10.0.1.0/24", "10.0.2.0/23"]]
+        intervals = IntervalSet.from_networks(networks, 32)
+        self.assertEqual(list(intervals.networks()), networks)
+
+class IntervalsTestContains(unittest.TestCase):
+    def test_ipv4(self):
+        networks = [_network(n) for n in ["10.0.0.0/8", "192.168.0.0/16"]]
+        intervals = IntervalSet.from_networks(networks, 32)
+        self.assertIn(_ip("10.0.0.0"), intervals)
+        self.assertIn(_ip("10.255.255.255"), intervals)
+        self.assertIn(_ip("192.168.1.1"), intervals)
+        self.assertNotIn(_ip("9.255.255.255"), intervals)
+        self.assertNotIn(_ip("11.0.0.0"), intervals)
+        self.assertNotIn(_ip("192.169.0.0"), intervals)
+        self.assertNotIn("10.0.0.1", intervals)
+
+    def test_ipv6(self):
+        network = ParseConstIPv6.to_int("fd84:9d71:8b8::")
+        intervals = IntervalSet.from_networks([(network, 48)], 128)
+        self.assertIn(ParseConstIPv6.to_int("fd84:9d71:8b8:1::1"), intervals)
+        self.assertNotIn(ParseConstIPv6.to_int("fd84:9d71:8b9::1"), intervals)
+
+    def test_empty(self):
+        self.assertNotIn(1, IntervalSet([], 32))
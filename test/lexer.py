@@ -1,5 +1,6 @@
 import unittest
-from scpl.lexer import LexerError, LexerUnfinishedError, tokenise
+from scpl.lexer import (itokenise, LexerError, LexerUnfinishedError, tokenise,
+    tokenise_spans)
 from scpl.lexer import (TokenDuration, TokenHex, TokenIPv4, TokenIPv6,
     TokenNumber, TokenOperator, TokenRegex, TokenSpace, TokenString,
     TokenWord)
@@ -228,3 +229,49 @@ class LexerTestIPv6(unittest.TestCase):
         self.assertRaises(LexerError, lambda: tokenise("1::fffff"))
         self.assertRaises(LexerError, lambda: tokenise("1:2:3:4:5:6:7:8:9"))
         self.assertRaises(LexerError, lambda: tokenise("1::g"))
+
+class LexerTestUnknown(unittest.TestCase):
+    def test_index(self):
+        with self.assertRaises(LexerError) as cm:
+            tokenise("1 \\")
+        self.assertNotIsInstance(cm.exception, LexerUnfinishedError)
+        self.assertEqual(cm.exception.index, 2)
+
+class LexerTestLong(unittest.TestCase):
+    def test_string(self):
+        text = '"' + 'a\\"' * 10_000 + '"'
+        tokens = tokenise(text)
+        self.assertEqual(len(tokens), 1)
+        self.assertIsInstance(tokens[0], TokenString)
+        self.assertEqual(tokens[0].text, text)
+
+    def test_set(self):
+        tokens = tokenise("{" + ", ".join(str(i) for i in range(10_000)) + "}")
+        self.assertEqual(len(tokens), 10_000*3)
+        self.assertIsInstance(tokens[-2], TokenNumber)
+        self.assertEqual(tokens[-2].text, "9999")
+
+class LexerTestSpans(unittest.TestCase):
+    def test_same(self):
+        expression = '(a + 1.5) * 1w && "str" =~ /re/i || ::1 in {fd84::1, ::2}'
+        spans = tokenise_spans(expression)
+        self.assertEqual(list(spans), list(tokenise(expression)))
+        self.assertEqual(len(spans), len(tokenise(expression)))
+
+    def test_index(self):
+        spans = tokenise_spans("1 + a")
+        self.assertIsInstance(spans[0], TokenNumber)
+        self.assertIsInstance(spans[-1], TokenWord)
+        self.assertEqual(spans[-1].text, "a")
+        self.assertEqual(spans[-1].index, 4)
+        self.assertRaises(IndexError, lambda: spans[5])
+
+class LexerTestLazy(unittest.TestCase):
+    def test_lazy(self):
+        tokens = itokenise("1 + 'asd")
+        self.assertIsInstance(next(tokens), TokenNumber)
+        self.assertIsInstance(next(tokens), TokenSpace)
+        self.assertIsInstance(next(tokens), TokenOperator)
+        self.assertIsInstance(next(tokens), TokenSpace)
+        with self.assertRaises(LexerUnfinishedError):
+            next(tokens)
@@ -0,0 +1,208 @@
+import os, pickle, tempfile, unittest
+
+from scpl.common.mapped import (Confirmed, MappedBloom, MappedIntegers, MappedStrings,
+    write_bloom, write_integers, write_strings)
+from scpl.eval import compile_program, compile_python, prepare, RuleSet
+from scpl.lexer import tokenise
+from scpl.parser import parse
+from scpl.parser import (ParseConstIPv4, ParseConstString, ParseIPv4, ParseNamedSetInteger,
+    ParseNamedSetIPv4, ParseNamedSetString, ParseString)
+
+class _TempDir(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+    def tearDown(self):
+        self._dir.cleanup()
+    def path(self, name: str) -> str:
+        return os.path.join(self._dir.name, name)
+
+class MappedTestIntegers(_TempDir):
+    def test_contains(self):
+        path = self.path("ints")
+        write_integers(path, [5, 1, 3, 3], 4)
+        values = MappedIntegers(path, 4)
+        self.assertEqual(len(values), 3)
+        self.assertEqual(list(values), [1, 3, 5])
+        self.assertIn(1, values)
+        self.assertIn(5, values)
+        self.assertNotIn(0, values)
+        self.assertNotIn(4, values)
+        self.assertNotIn(6, values)
+        self.assertNotIn("1", values)
+
+    def test_signed(self):
+        path = self.path("ints")
+        write_integers(path, [-2, 2], 8, signed=True)
+        values = MappedIntegers(path, 8, signed=True)
+        self.assertIn(-2, values)
+        self.assertNotIn(-1, values)
+        self.assertIn(2, values)
+
+    def test_empty(self):
+        path = self.path("ints")
+        write_integers(path, [], 4)
+        self.assertNotIn(0, MappedIntegers(path, 4))
+
+    def test_pickle(self):
+        path = self.path("ints")
+        write_integers(path, [1, 2], 4)
+        values = pickle.loads(pickle.dumps(MappedIntegers(path, 4)))
+        self.assertEqual(list(values), [1, 2])
+
+    def test_width(self):
+        path = self.path("ints")
+        with open(path, "wb") as file:
+            file.write(b"\0" * 5)
+        self.assertRaises(ValueError, lambda: MappedIntegers(path, 4))
+
+class MappedTestStrings(_TempDir):
+    def test_contains(self):
+        path = self.path("strings")
+        values = [f"item{i}" for i in range(100)] + ["", "ünïcode"]
+        write_strings(path, values)
+        mapped = MappedStrings(path)
+        self.assertEqual(len(mapped), len(values))
+        self.assertEqual(sorted(mapped), sorted(values))
+        for value in values:
+            self.assertIn(value, mapped)
+        self.assertNotIn("item100", mapped)
+        self.assertNotIn("\ud800", mapped)
+        self.assertNotIn(1, mapped)
+
+    def test_empty(self):
+        path = self.path("strings")
+        write_strings(path, [])
+        self.assertNotIn("", MappedStrings(path))
+
+    def test_magic(self):
+        path = self.path("strings")
+        write_integers(path, range(10), 4)
+        self.assertRaises(ValueError, lambda: MappedStrings(path))
+
+class MappedTestNamedSet(_TempDir):
+    def setUp(self):
+        super().setUp()
+        self.blocked = ParseNamedSetIPv4("blocked")
+        self.nicks = ParseNamedSetString("nicks")
+        self.types = {
+            "ip": ParseIPv4(),
+            "nick": ParseString(),
+            "blocked": self.blocked,
+            "nicks": self.nicks,
+        }
+
+    def _ip(self, text: str) -> int:
+        return ParseConstIPv4.from_text(text).integer
+    def _vars(self, ip: str, nick: str):
+        return {
+            "ip": ParseConstIPv4.from_text(ip),
+            "nick": ParseConstString(None, nick)
+        }
+
+    def test_parse(self):
+        atoms, deps = parse(tokenise("ip in blocked"), self.types)
+        self.assertEqual(deps, {"ip"})
+        self.assertFalse(atoms[0].precompile().is_constant())
+
+    def test_swap(self):
+        atoms, deps = parse(tokenise("ip in blocked && nick in nicks"), self.types)
+        atom = atoms[0].precompile()
+        compiled = compile_python(atom)
+        program = compile_program(atom)
+        values = self._vars("10.0.0.1", "jess")
+
+        for run in [atom.eval, compiled, program.eval]:
+            self.assertEqual(run(values), False)
+        self.blocked.swap({self._ip("10.0.0.1")})
+        self.nicks.swap({"jess"})
+        for run in [atom.eval, compiled, program.eval]:
+            self.assertEqual(run(values), True)
+
+    def test_load(self):
+        write_integers(self.path("blocked"), [self._ip("10.0.0.1")], 4)
+        write_strings(self.path("nicks"), ["jess"])
+        self.blocked.load(self.path("blocked"))
+        self.nicks.load(self.path("nicks"))
+
+        atoms, deps = parse(tokenise("ip in blocked && nick in nicks"), self.types)
+        self.assertEqual(atoms[0].eval(self._vars("10.0.0.1", "jess")), True)
+        self.assertEqual(atoms[0].eval(self._vars("10.0.0.2", "jess")), False)
+
+        # replaced, not written over, so the old mapping stays as it was
+        old = self.blocked.members
+        write_integers(self.path("blocked"), [self._ip("10.0.0.2")], 4)
+        self.blocked.load(self.path("blocked"))
+        self.assertIn(self._ip("10.0.0.1"), old)
+        self.assertEqual(atoms[0].eval(self._vars("10.0.0.2", "jess")), True)
+
+    def test_integer(self):
+        path = self.path("ints")
+        write_integers(path, [-5, 5], 8, signed=True)
+        named = ParseNamedSetInteger("ints")
+        named.load(path)
+        atoms, deps = parse(tokenise("0 - 5 in ints"), {"ints": named})
+        self.assertEqual(atoms[0].eval({}), True)
+
+    def test_prepared(self):
+        prepared = prepare("ip in blocked", self.types)
+        self.assertEqual(prepared.variables, ["ip", "nick"])
+        self.blocked.swap({self._ip("10.0.0.1")})
+        self.assertEqual(prepared.eval(self._ip("10.0.0.1"), "jess"), True)
+
+    def test_ruleset(self):
+        rules = RuleSet(self.types)
+        rules.add("a", "ip in blocked")
+        rules.add("b", "nick in nicks")
+        values = self._vars("10.0.0.1", "jess")
+        self.assertEqual(rules.all(values), [])
+        self.nicks.swap({"jess"})
+        self.assertEqual(rules.all(values), ["b"])
+
+    def test_distinct(self):
+        other = ParseNamedSetIPv4("blocked")
+        self.assertNotEqual(self.blocked, other)
+        self.assertEqual(self.blocked, self.blocked)
+
+class MappedTestBloom(_TempDir):
+    def test_contains(self):
+        path = self.path("bloom")
+        values = [f"host{i}.example" for i in range(1000)]
+        write_bloom(path, values, 0.01)
+        bloom = MappedBloom(path)
+        self.assertEqual(len(bloom), 1000)
+        for value in values:
+            self.assertIn(value, bloom)
+        self.assertNotIn(1, bloom)
+
+    def test_error_rate(self):
+        path = self.path("bloom")
+        write_bloom(path, (f"host{i}" for i in range(10000)), 0.01)
+        bloom = MappedBloom(path)
+        false = sum(1 for i in range(10000) if f"other{i}" in bloom)
+        # 1% expected, with plenty of room for chance
+        self.assertLess(false, 200)
+
+    def test_empty(self):
+        path = self.path("bloom")
+        write_bloom(path, [])
+        self.assertNotIn("", MappedBloom(path))
+
+    def test_confirmed(self):
+        path = self.path("bloom")
+        write_bloom(path, ["a", "b"], 0.5)
+        # pretend the filter thinks everything is in it
+        confirmed = Confirmed({"a", "b", "c"}, {"a"})
+        self.assertIn("a", confirmed)
+        self.assertNotIn("b", confirmed)
+        confirmed = Confirmed(MappedBloom(path), {"b"})
+        self.assertNotIn("a", confirmed)
+        self.assertIn("b", confirmed)
+
+    def test_named(self):
+        path = self.path("bloom")
+        write_bloom(path, ["jess"])
+        nicks = ParseNamedSetString("nicks")
+        nicks.load(path)
+        self.assertIsInstance(nicks.members, MappedBloom)
+        atoms, deps = parse(tokenise('"jess" in nicks'), {"nicks": nicks})
+        self.assertEqual(atoms[0].eval({}), True)
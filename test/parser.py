@@ -1,8 +1,10 @@
-import unittest
+import re, time, unittest
 from ipaddress import ip_address, ip_network
 
-from scpl.lexer import tokenise
-from scpl.parser import operators, parse, ParserError, ParserTypeError
+from scpl.common.arrays import SortedArray
+from scpl.lexer import itokenise, tokenise, tokenise_spans
+from scpl.parser import operators, parse, ParserError, ParserRegexRiskError, ParserTypeError
+from scpl.regex.redos import Risk
 from scpl.parser import (ParseInteger, ParseCIDRv4, ParseCIDRv6, ParseIPv4, ParseIPv6,
     ParseFloat, ParseRegex, ParseString)
 
@@ -28,6 +30,38 @@ class ParserTestRegex(unittest.TestCase):
         self.assertEqual(atoms[0].delimiter, "/")
         self.assertEqual(atoms[0].flags, set("abc"))
 
+    def test_compiled(self):
+        atoms, deps = parse(tokenise("/a/i"), {})
+        self.assertIs(atoms[0].eval({}), atoms[0].eval({}))
+        self.assertEqual(atoms[0].eval({}).flags & re.I, re.I)
+
+    def test_shared(self):
+        atoms1, deps = parse(tokenise("/a/i"), {})
+        atoms2, deps = parse(tokenise(",a,i"), {})
+        self.assertIs(atoms1[0].eval({}), atoms2[0].eval({}))
+
+    def test_invalid(self):
+        with self.assertRaises(ParserError):
+            parse(tokenise("/(/"), {})
+
+    def test_risk(self):
+        # not checked unless asked for
+        parse(tokenise(r"/\d+\d+/"), {})
+        parse(tokenise(r"/\d+\d+/"), {}, Risk.POLYNOMIAL)
+        with self.assertRaises(ParserRegexRiskError) as cm:
+            parse(tokenise(r"/\d+\d+/"), {}, Risk.SAFE)
+        self.assertEqual(cm.exception.risk, Risk.POLYNOMIAL)
+        # a backreference means it can't be matched by an automaton instead
+        with self.assertRaises(ParserRegexRiskError) as cm:
+            parse(tokenise(r"/(a+)+\1/"), {}, Risk.POLYNOMIAL)
+        self.assertEqual(cm.exception.risk, Risk.EXPONENTIAL)
+        # matched by an automaton, so doesn't backtrack
+        atoms, deps = parse(tokenise(r"/(a+)+b/"), {}, Risk.SAFE)
+        start = time.monotonic()
+        self.assertIsNone(atoms[0].eval({}).search("a" * 5000 + "c"))
+        self.assertEqual(atoms[0].eval({}).search("a" * 5000 + "b").span(), (0, 5001))
+        self.assertLess(time.monotonic() - start, 1)
+
 class ParserTestInteger(unittest.TestCase):
     def test(self):
         atoms, deps = parse(tokenise("123"), {})
@@ -88,6 +122,28 @@ class ParserTestCIDRv6(unittest.TestCase):
     def test_invalid(self):
         self.assertRaises(ValueError, lambda: parse(tokenise("fd84:9d71:8b8:1::1/129"), {}))
 
+class ParserTestSpans(unittest.TestCase):
+    def test(self):
+        atoms, deps = parse(tokenise_spans("a + 1"), {"a": ParseInteger()})
+        self.assertIsInstance(atoms[0], ParseInteger)
+        self.assertEqual(deps, {"a"})
+
+    def test_error(self):
+        spans = tokenise_spans("{1, 1.0}")
+        with self.assertRaises(ParserTypeError) as cm:
+            parse(spans, {})
+        self.assertEqual(spans[4], cm.exception.token)
+
+class ParserTestLazy(unittest.TestCase):
+    def test(self):
+        atoms, deps = parse(itokenise("{1, 2, 3}"), {})
+        self.assertIsInstance(atoms[0], operators.set.ParseSetInteger)
+
+    def test_parser_error_first(self):
+        # the parser sees "1 1" before the lexer gets to the unfinished string
+        with self.assertRaises(ParserError):
+            parse(itokenise("1 1 'asd"), {})
+
 class ParserTestParenthesis(unittest.TestCase):
     def test_unwrap(self):
         atoms, deps = parse(tokenise("(1)"), {})
@@ -126,8 +182,67 @@ class ParserTestSet(unittest.TestCase):
         atoms, deps = parse(tokenise("{fd84:9d71:8b8:1::1, fd84:9d71:8b8:1::2}"), {})
         self.assertIsInstance(atoms[0], operators.set.ParseSetIPv6)
 
+    def test_constant(self):
+        # constant members are frozen as soon as the set is made
+        atoms, deps = parse(tokenise("{3, 1 + 1, a}"), {"a": ParseInteger()})
+        self.assertEqual(atoms[0]._constant, frozenset([2, 3]))
+        self.assertEqual(len(atoms[0]._atoms), 1)
+        self.assertEqual(repr(atoms[0]), "Set(Integer(2), Integer(3), GetInteger('a'))")
+
+    def test_compact(self):
+        members = ", ".join(str(i) for i in range(1000))
+        atoms, deps = parse(tokenise(f"{{{members}}}"), {})
+        self.assertIsInstance(atoms[0]._constant, SortedArray)
+        self.assertIn(999, atoms[0].eval({}))
+        self.assertNotIn(1000, atoms[0].eval({}))
+
+    def test_compact_ipv4(self):
+        members = ", ".join(f"10.0.{i // 256}.{i % 256}" for i in range(1000))
+        atoms, deps = parse(tokenise(f"{{{members}}}"), {})
+        self.assertIsInstance(atoms[0]._constant, SortedArray)
+
+    def test_cidrv4(self):
+        atoms, deps = parse(tokenise("{10.84.0.0/16, 10.0.0.0/8}"), {})
+        self.assertIsInstance(atoms[0], operators.set.ParseSetCIDRv4)
+
+    def test_cidr_merged(self):
+        # overlapping and adjacent networks are merged
+        atoms, deps = parse(tokenise("{10.84.0.0/16, 10.0.0.0/8, 11.0.0.0/8}"), {})
+        self.assertEqual(repr(atoms[0]), "Set(CIDRv4(10.0.0.0/7))")
+
+    def test_cidrv6(self):
+        atoms, deps = parse(tokenise("{fd84:9d71:8b8::/48}"), {})
+        self.assertIsInstance(atoms[0], operators.set.ParseSetCIDRv6)
+
     def test_invalid_mixed(self):
         tokens = tokenise("{1, 1.0}")
         with self.assertRaises(ParserTypeError) as cm:
             parse(tokens.copy(), {})
         self.assertEqual(tokens[4], cm.exception.token)
+
+class ParserTestEqual(unittest.TestCase):
+    def _parse(self, expression: str):
+        vars = {"a": ParseInteger(), "b": ParseString()}
+        atoms, deps = parse(tokenise(expression), vars)
+        return atoms[0]
+
+    def test_structural(self):
+        left = self._parse('a + 1 > 2 && b == "x"')
+        right = self._parse('a + 1 > 2 && b == "x"')
+        self.assertIsNot(left, right)
+        self.assertEqual(left, right)
+        self.assertEqual(hash(left), hash(right))
+
+    def test_different(self):
+        self.assertNotEqual(self._parse("a + 1"), self._parse("a + 2"))
+        self.assertNotEqual(self._parse("a + 1"), self._parse("1 + a"))
+        self.assertNotEqual(self._parse('b == "x"'), self._parse("b == 'y'"))
+
+    def test_delimiter(self):
+        # only the value of a string matters
+        self.assertEqual(self._parse('b == "x"'), self._parse("b == 'x'"))
+
+    def test_casemap(self):
+        casemap = str.maketrans({"a": "b"})
+        atoms, deps = parse(tokenise("b"), {"b": ParseString(casemap=casemap)})
+        self.assertNotEqual(atoms[0], self._parse("b"))
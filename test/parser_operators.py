@@ -2,8 +2,9 @@ import unittest
 
 from scpl.lexer import tokenise
 from scpl.parser import operators, parse, ParserError
-from scpl.parser import (ParseInteger, ParseIPv4, ParseIPv6, ParseBool, ParseFloat,
-    ParseRegex, ParseString)
+from scpl.parser import (ParseAtom, ParseBool, ParseConstInteger, ParseConstString,
+    ParseFloat, ParseInteger, ParseIPv4, ParseIPv6, ParseRegex, ParseString)
+from scpl.common.operators import OperatorName
 
 class ParserOperatorTestAdd(unittest.TestCase):
     def test_string_string(self):
@@ -185,11 +186,62 @@ class ParserOperatorTestContains(unittest.TestCase):
         atoms, deps = parse(tokenise("fd84:9d71:8b8:1::1 in fd84:9d71:8b8::/48"), {})
         self.assertIsInstance(atoms[0], operators.contains.ParseBinaryContainsIPCIDR)
 
+    def test_ipv4_cidrv4_set(self):
+        atoms, deps = parse(tokenise("10.84.1.1 in {10.0.0.0/8, 10.84.0.0/16}"), {})
+        self.assertIsInstance(atoms[0], operators.contains.ParseBinaryContainsIPCIDRSet)
+        self.assertEqual(atoms[0].eval({}), True)
+
+    def test_ipv6_cidrv6_set(self):
+        atoms, deps = parse(tokenise("fd84:9d71:8b8:1::1 in {fd84:9d71:8b9::/48}"), {})
+        self.assertIsInstance(atoms[0], operators.contains.ParseBinaryContainsIPCIDRSet)
+        self.assertEqual(atoms[0].eval({}), False)
+
+    def test_ipv4_cidrv6_set(self):
+        self.assertRaises(ParserError,
+            lambda: parse(tokenise("10.84.1.1 in {fd84:9d71:8b8::/48}"), {}))
+
 class ParserOperatorTestMatch(unittest.TestCase):
     def test_string_regex(self):
         atoms, deps = parse(tokenise('"asd" =~ /^a/'), {})
         self.assertIsInstance(atoms[0], operators.match.ParseBinaryMatchStringRegex)
 
+    def test_prefiltered(self):
+        atoms, deps = parse(tokenise("a =~ /^x+foo.*bar/"), {"a": ParseString()})
+        self.assertEqual(atoms[0]._prefiltered.literal, "xfoo")
+        self.assertEqual(atoms[0].eval({"a": ParseConstString(None, "xxfoo bar")}),
+            "xxfoo bar")
+        self.assertEqual(atoms[0].eval({"a": ParseConstString(None, "xxfo bar")}), "")
+
+    def test_prefiltered_fold(self):
+        atoms, deps = parse(tokenise("a =~ /FOO/i"), {"a": ParseString()})
+        self.assertEqual(atoms[0]._prefiltered.literal, "foo")
+        self.assertEqual(atoms[0].eval({"a": ParseConstString(None, "xFoO")}), "FoO")
+
+    def test_string_match(self):
+        match = operators.match
+        for pattern, kind in [("spam", match.SubstringMatch), ("^foo", match.PrefixMatch),
+                ("bar$", match.SuffixMatch), ("^(a|b)$", match.MembersMatch)]:
+            atoms, deps = parse(tokenise(f"a =~ /{pattern}/"), {"a": ParseString()})
+            self.assertIsInstance(atoms[0]._string_match, kind, pattern)
+        for pattern in ["sp+am/", "spam/i", "^foo/i", "^(a|b)/", "a|b/", "^$/"]:
+            atoms, deps = parse(tokenise(f"a =~ /{pattern}"), {"a": ParseString()})
+            self.assertIsNone(atoms[0]._string_match, pattern)
+
+    def test_string_match_newline(self):
+        # `$` also matches before a final newline, `\Z` doesn't
+        atoms, deps = parse(tokenise(r"a =~ /^(a|b)$/"), {"a": ParseString()})
+        self.assertEqual(atoms[0].eval({"a": ParseConstString(None, "b\n")}), "b")
+        atoms, deps = parse(tokenise(r"a =~ /^(a|b)\Z/"), {"a": ParseString()})
+        self.assertEqual(atoms[0].eval({"a": ParseConstString(None, "b\n")}), "")
+        atoms, deps = parse(tokenise(r"a =~ /b$/"), {"a": ParseString()})
+        self.assertEqual(atoms[0].eval({"a": ParseConstString(None, "ab\n")}), "b")
+
+    def test_unfiltered(self):
+        atoms, deps = parse(tokenise("a =~ /a|b/"), {"a": ParseString()})
+        self.assertIsNone(atoms[0]._prefiltered)
+        atoms, deps = parse(tokenise("a =~ b"), {"a": ParseString(), "b": ParseRegex()})
+        self.assertIsNone(atoms[0]._prefiltered)
+
 class ParserOperatorTestNot(unittest.TestCase):
     def test_string(self):
         atoms, deps = parse(tokenise('!"asd"'), {})
@@ -258,6 +310,32 @@ class ParserOperatorTestBoth(unittest.TestCase):
         atoms, deps = parse(tokenise("/a/ && /a/"), {})
         self.assertIsInstance(atoms[0], operators.bools.ParseBinaryBoth)
 
+class ParserOperatorTestChain(unittest.TestCase):
+    def test_all(self):
+        atoms, deps = parse(tokenise("1 && 2 && 3"), {})
+        self.assertIsInstance(atoms[0], operators.bools.ParseAll)
+        self.assertEqual(len(atoms[0]._atoms), 3)
+
+    def test_any(self):
+        atoms, deps = parse(tokenise("1 || (2 || 3) || 4"), {})
+        self.assertIsInstance(atoms[0], operators.bools.ParseAny)
+        self.assertEqual(len(atoms[0]._atoms), 4)
+
+    def test_mixed(self):
+        # `&&` binds tighter, so it stays nested inside `||`
+        atoms, deps = parse(tokenise("1 && 2 || 3 && 4 || 5"), {})
+        self.assertIsInstance(atoms[0], operators.bools.ParseAny)
+        self.assertEqual(len(atoms[0]._atoms), 3)
+        self.assertIsInstance(atoms[0]._atoms[0], operators.bools.ParseBinaryBoth)
+
+    def test_long(self):
+        vars = {"a": ParseInteger()}
+        atoms, deps = parse(tokenise(" && ".join(["a"] * 5000)), vars)
+        self.assertIsInstance(atoms[0], operators.bools.ParseAll)
+        self.assertEqual(len(atoms[0]._atoms), 5000)
+        self.assertTrue(atoms[0].eval({"a": ParseConstInteger(1)}))
+        self.assertFalse(atoms[0].eval({"a": ParseConstInteger(0)}))
+
 class ParserOperatorTestVariable(unittest.TestCase):
     def test_integer(self):
         atoms, deps = parse(tokenise("a"), {"a": ParseInteger()})
@@ -351,3 +429,38 @@ class ParserOperatorTestPrecedence(unittest.TestCase):
     # missing: 9 (positive, negative)
     # missing: 10 (complement)
     # missing: 11 (exponent)
+
+class ParserOperatorTestRegistry(unittest.TestCase):
+    # registrations are global, so put them back as they were for later tests
+    REGISTRIES = ["_BINARY", "_UNARY", "_BINARY_RESOLVED", "_UNARY_RESOLVED"]
+
+    def setUp(self):
+        self._registries = {}
+        for name in self.REGISTRIES:
+            registry = getattr(operators.common, name)
+            self._registries[name] = {
+                k: list(v) if isinstance(v, list) else v for k, v in registry.items()
+            }
+    def tearDown(self):
+        for name, saved in self._registries.items():
+            registry = getattr(operators.common, name)
+            registry.clear()
+            registry.update(saved)
+
+    def test_register(self):
+        class ParseThing(ParseAtom):
+            pass
+        class ParseBinaryAddThingInteger(operators.common.ParseBinaryOperator, ParseInteger):
+            pass
+
+        one = ParseConstInteger(1)
+        self.assertIsNone(operators.find_binary_operator(OperatorName.ADD, ParseThing(), one))
+
+        operators.common.register_binary(
+            OperatorName.ADD, ParseThing, ParseInteger, ParseBinaryAddThingInteger
+        )
+        atom = operators.find_binary_operator(OperatorName.ADD, ParseThing(), one)
+        self.assertIsInstance(atom, ParseBinaryAddThingInteger)
+        # other operand types still resolve as they did
+        atoms, deps = parse(tokenise("1 + 1"), {})
+        self.assertIsInstance(atoms[0], operators.add.ParseBinaryAddIntegerInteger)
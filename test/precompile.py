@@ -0,0 +1,100 @@
+import re, unittest
+
+from scpl.lexer import tokenise
+from scpl.parser import operators, parse
+from scpl.parser import (ParseBool, ParseConstBool, ParseConstFloat, ParseConstInteger,
+    ParseConstRegex, ParseConstString, ParseInteger, ParseString)
+
+class PrecompileTestFold(unittest.TestCase):
+    def test_integer(self):
+        atoms, deps = parse(tokenise("1 + 2 * 3"), {})
+        atom = atoms[0].precompile()
+        self.assertIsInstance(atom, ParseConstInteger)
+        self.assertEqual(atom.value, 7)
+
+    def test_float(self):
+        atoms, deps = parse(tokenise("1 / 2"), {})
+        atom = atoms[0].precompile()
+        self.assertIsInstance(atom, ParseConstFloat)
+        self.assertEqual(atom.value, 0.5)
+
+    def test_string(self):
+        atoms, deps = parse(tokenise('"a" + "b"'), {})
+        atom = atoms[0].precompile()
+        self.assertIsInstance(atom, ParseConstString)
+        self.assertEqual(atom.value, "ab")
+
+    def test_bool(self):
+        atoms, deps = parse(tokenise('!"a"'), {})
+        atom = atoms[0].precompile()
+        self.assertIsInstance(atom, ParseConstBool)
+        self.assertEqual(atom.value, False)
+
+    def test_regex(self):
+        atoms, deps = parse(tokenise('"asd." + /asd/i'), {})
+        atom = atoms[0].precompile()
+        self.assertIsInstance(atom, ParseConstRegex)
+        self.assertEqual(atom.eval({}).pattern, "asd\\.(?i:asd)")
+
+    def test_error(self):
+        # folding fails, so the error is left for eval time
+        atoms, deps = parse(tokenise("1 / 0"), {})
+        atom = atoms[0].precompile()
+        self.assertIsInstance(atom, operators.divide.ParseBinaryDivideFloatFloat)
+        self.assertRaises(ZeroDivisionError, lambda: atom.eval({}))
+
+class PrecompileTestPartial(unittest.TestCase):
+    def test_subtree(self):
+        vars = {"a": ParseInteger()}
+        atoms, deps = parse(tokenise("a + (1 + 2)"), vars)
+        atom = atoms[0].precompile()
+        self.assertIsInstance(atom, operators.add.ParseBinaryAddIntegerInteger)
+        self.assertIsInstance(atom._right, ParseConstInteger)
+        self.assertIs(atom.operands()[1], atom._right)
+        self.assertEqual(atom.eval({"a": ParseConstInteger(1)}), 4)
+
+    def test_regex(self):
+        vars = {"a": ParseString()}
+        atoms, deps = parse(tokenise("a =~ /b/ + /c/"), vars)
+        atom = atoms[0].precompile()
+        self.assertIsInstance(atom._right, ParseConstRegex)
+        self.assertEqual(atom.eval({"a": ParseConstString(None, "abc")}), "bc")
+
+    def test_set(self):
+        vars = {"a": ParseInteger()}
+        atoms, deps = parse(tokenise("1 in {1 + 1, a}"), vars)
+        self.assertFalse(atoms[0].is_constant())
+        atom = atoms[0].precompile()
+        self.assertEqual(atom.eval({"a": ParseConstInteger(1)}), True)
+        self.assertEqual(atom.eval({"a": ParseConstInteger(2)}), False)
+
+    def test_set_exact(self):
+        # hash(-1) == hash(-2), which used to be a false positive
+        vars = {"a": ParseInteger()}
+        atoms, deps = parse(tokenise("a in {0 - 2, 5}"), vars)
+        atom = atoms[0].precompile()
+        self.assertEqual(atom.eval({"a": ParseConstInteger(-1)}), False)
+        self.assertEqual(atom.eval({"a": ParseConstInteger(-2)}), True)
+
+    def test_casemap(self):
+        vars = {"a": ParseString(casemap=str.maketrans({"a": "b"}))}
+        atoms, deps = parse(tokenise("a =~ /a/i"), vars)
+        atom = atoms[0].precompile()
+        self.assertIsInstance(atom._right, ParseConstRegex)
+        self.assertEqual(atom.eval({"a": ParseConstString(None, "b")}), "b")
+
+    def test_chain(self):
+        vars = {"a": ParseInteger(), "b": ParseInteger()}
+        atoms, deps = parse(tokenise("true && a && 1 == 1 && b"), vars)
+        atom = atoms[0].precompile()
+        self.assertIsInstance(atom, operators.bools.ParseAll)
+        self.assertEqual(len(atom._atoms), 2)
+
+    def test_chain_short(self):
+        # `a` is still evaluated, but nothing after `true` is
+        vars = {"a": ParseInteger(), "b": ParseInteger()}
+        atoms, deps = parse(tokenise("a || 1 == 1 || b"), vars)
+        atom = atoms[0].precompile()
+        self.assertEqual(len(atom._atoms), 2)
+        self.assertIsInstance(atom._atoms[1], ParseConstBool)
+        self.assertEqual(atom.eval({"a": ParseConstInteger(0)}), True)
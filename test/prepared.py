@@ -0,0 +1,42 @@
+import unittest
+
+from scpl.eval import prepare
+from scpl.parser import ParserError
+from scpl.parser import (ParseConstIPv4, ParseConstRegex, ParseInteger, ParseIPv4,
+    ParseRegex, ParseString)
+
+SCHEMA = {
+    "nick": ParseString(),
+    "ip": ParseIPv4(),
+    "count": ParseInteger(),
+}
+
+class PreparedTestEval(unittest.TestCase):
+    def test_positional(self):
+        prepared = prepare("nick =~ /^bad/i && count > 5", SCHEMA)
+        ip = ParseConstIPv4.from_text("10.0.0.1").integer
+        self.assertEqual(prepared.eval("BADnick", ip, 6), True)
+        self.assertEqual(prepared.eval("BADnick", ip, 5), False)
+
+    def test_slots(self):
+        prepared = prepare("ip in 10.0.0.0/8", SCHEMA)
+        slots = [None, ParseConstIPv4.from_text("10.0.0.1").integer, None]
+        self.assertEqual(prepared.slot("ip"), 1)
+        self.assertEqual(prepared.eval_slots(slots), True)
+
+    def test_regex(self):
+        prepared = prepare("nick =~ pattern", {**SCHEMA, "pattern": ParseRegex()})
+        regex = ParseConstRegex(None, "b.d", set()).compiled
+        self.assertEqual(prepared.eval("abcde", 0, 0, regex), "bcd")
+
+    def test_casemap(self):
+        schema = {
+            "nick": ParseString(casemap=str.maketrans({"a": "b"})),
+            "pattern": ParseRegex()
+        }
+        prepared = prepare("nick =~ pattern", schema)
+        regex = ParseConstRegex(None, "a", {"i"}).compiled
+        self.assertEqual(prepared.eval("b", regex), "b")
+
+    def test_unknown(self):
+        self.assertRaises(ParserError, lambda: prepare("other == 1", SCHEMA))
@@ -0,0 +1,56 @@
+import unittest
+
+from scpl.common.radix import RadixTrie
+from scpl.parser import ParseConstCIDRv4, ParseConstIPv4, ParseConstIPv6
+
+def _network(text: str):
+    cidr = ParseConstCIDRv4.from_text(text)
+    return cidr.integer, cidr.prefix
+
+def _ip(text: str) -> int:
+    return ParseConstIPv4.to_int(text)
+
+class RadixTestFind(unittest.TestCase):
+    def setUp(self):
+        self.trie: RadixTrie[str] = RadixTrie(32)
+        for network in ["10.0.0.0/8", "10.84.0.0/16", "10.84.1.0/24", "10.85.0.0/16"]:
+            self.trie.add(*_network(network), network)
+
+    def test_covering(self):
+        self.assertEqual(self.trie.find(_ip("10.84.1.1")),
+            ["10.0.0.0/8", "10.84.0.0/16", "10.84.1.0/24"])
+        self.assertEqual(self.trie.find(_ip("10.85.1.1")), ["10.0.0.0/8", "10.85.0.0/16"])
+        self.assertEqual(self.trie.find(_ip("11.0.0.1")), [])
+
+    def test_contains(self):
+        self.assertIn(_ip("10.1.1.1"), self.trie)
+        self.assertNotIn(_ip("192.168.1.1"), self.trie)
+        self.assertNotIn("10.1.1.1", self.trie)
+
+    def test_split(self):
+        # shares a prefix with 10.84.0.0/16 and 10.85.0.0/16 but covers neither
+        self.trie.add(*_network("10.86.0.0/15"), "10.86.0.0/15")
+        self.assertEqual(self.trie.find(_ip("10.87.0.1")), ["10.0.0.0/8", "10.86.0.0/15"])
+        self.assertEqual(self.trie.find(_ip("10.84.0.1")), ["10.0.0.0/8", "10.84.0.0/16"])
+
+    def test_same(self):
+        self.trie.add(*_network("10.84.0.0/16"), "again")
+        self.assertEqual(self.trie.find(_ip("10.84.0.1")),
+            ["10.0.0.0/8", "10.84.0.0/16", "again"])
+        self.assertEqual(len(self.trie), 5)
+
+    def test_host_bits(self):
+        trie: RadixTrie[int] = RadixTrie(32)
+        trie.add(_ip("10.84.1.1"), 16, 1)
+        self.assertEqual(list(trie.networks()), [_network("10.84.0.0/16")])
+
+    def test_default(self):
+        trie: RadixTrie[int] = RadixTrie(128)
+        trie.add(0, 0, 1)
+        self.assertEqual(trie.find(ParseConstIPv6.to_int("fd84::1")), [1])
+
+    def test_host(self):
+        trie: RadixTrie[int] = RadixTrie(32)
+        trie.add(_ip("10.84.1.1"), 32, 1)
+        self.assertEqual(trie.find(_ip("10.84.1.1")), [1])
+        self.assertEqual(trie.find(_ip("10.84.1.2")), [])
@@ -1,7 +1,14 @@
-import re, unittest
+import pickle, re, time, unittest
 from ipaddress import ip_network
 
+from scpl.lexer import tokenise
+from scpl.parser import parse
+from scpl.parser import ParseConstRegex, ParseConstString, ParseString
 from scpl.regex import lexer
+from scpl.regex.automaton import compile_linear, LINEAR, LinearPattern
+from scpl.regex.combined import CombinedPatterns, mergeable
+from scpl.regex.literals import plain_shape, PlainShape, required_literals
+from scpl.regex.redos import classify, Risk
 
 class RegexTestLexer(unittest.TestCase):
     def test_literal(self):
@@ -59,3 +66,202 @@ class RegexTestLexer(unittest.TestCase):
         self.assertEqual(tokens[1].text, "a")
         self.assertIsInstance(tokens[2], lexer.RegexTokenScope)
         self.assertEqual(tokens[2].text, ")")
+
+class RegexTestLiterals(unittest.TestCase):
+    def _literals(self, pattern: str, flags: int = 0):
+        compiled = re.compile(pattern, flags)
+        return required_literals(compiled.pattern, compiled.flags)
+
+    def test_runs(self):
+        self.assertEqual(self._literals("^foo.*bar$"), ["foo", "bar"])
+        self.assertEqual(self._literals(r"a\.b\d"), ["a.b"])
+        self.assertEqual(self._literals("a[bc]d"), ["a", "d"])
+
+    def test_repeats(self):
+        self.assertEqual(self._literals("ab+c"), ["ab", "bc"])
+        self.assertEqual(self._literals("ab*c"), ["a", "c"])
+        self.assertEqual(self._literals("ab?c"), ["a", "c"])
+        self.assertEqual(self._literals("ab{2,3}c"), ["abb", "bbc"])
+        self.assertEqual(self._literals("ab{0,3}c"), ["a", "c"])
+        self.assertEqual(self._literals("ab+?c"), ["ab", "bc"])
+
+    def test_repeats_non_literal(self):
+        self.assertEqual(self._literals(".{2,}a"), ["a"])
+        self.assertEqual(self._literals(r"\d{1,}x"), ["x"])
+        self.assertEqual(self._literals("x.{2,}"), ["x"])
+        self.assertEqual(self._literals("x[ab]{2,3}y"), ["x", "y"])
+        self.assertEqual(self._literals("{x}a"), ["a"])
+
+    def test_groups(self):
+        self.assertEqual(self._literals("a(?:bc)d"), ["a", "bc", "d"])
+        self.assertEqual(self._literals("a(bc)+d"), ["a", "bc", "d"])
+        self.assertEqual(self._literals("a(bc)?d"), ["a", "d"])
+        self.assertEqual(self._literals("a(?!bc)d"), ["a", "d"])
+        self.assertEqual(self._literals("a(b|c)d"), ["a", "d"])
+
+    def test_alternation(self):
+        self.assertEqual(self._literals("ab|cd"), [])
+
+    def test_fold(self):
+        self.assertEqual(self._literals("Hello", re.I), ["hello"])
+        # `i` and `s` match more than what they lowercase to
+        self.assertEqual(self._literals("KISSING", re.I), ["k", "ng"])
+        self.assertEqual(self._literals("(?i)abc"), ["abc"])
+
+    def test_verbose(self):
+        self.assertEqual(self._literals("a b", re.X), [])
+
+class RegexTestPlainShape(unittest.TestCase):
+    def test_shapes(self):
+        self.assertEqual(plain_shape(r"sp\.am", 0), PlainShape(["sp.am"], False, False, False))
+        self.assertEqual(plain_shape(r"\Afoo", 0), PlainShape(["foo"], True, False, False))
+        self.assertEqual(plain_shape(r"bar$", 0), PlainShape(["bar"], False, True, True))
+        self.assertEqual(plain_shape(r"^(?:a|b)\Z", 0), PlainShape(["a", "b"], True, True, False))
+
+    def test_not(self):
+        for pattern in [r"a+", r"a|b", r"(a|b)", r"^a|b$", r"^$", r"^(a|)$", r"\d",
+                r"(a)(b)", "a\n$", r"^(a|(b))$"]:
+            self.assertIsNone(plain_shape(pattern, 0), pattern)
+
+    def test_flags(self):
+        self.assertIsNone(plain_shape("a", re.I))
+        self.assertIsNone(plain_shape("^a", re.M))
+        self.assertIsNotNone(plain_shape("a", re.M))
+
+class RegexTestCombined(unittest.TestCase):
+    def test_mergeable(self):
+        self.assertTrue(mergeable(re.compile(r"\d+x")))
+        self.assertFalse(mergeable(re.compile(r"(a)\1")))
+        self.assertFalse(mergeable(re.compile(r"(?P<a>a)")))
+        self.assertFalse(mergeable(re.compile(r"(?i)a")))
+        self.assertFalse(mergeable(re.compile(r"a*")))
+        self.assertFalse(mergeable(re.compile(r"a # comment", re.X)))
+
+    def test_find(self):
+        patterns: CombinedPatterns[str] = CombinedPatterns()
+        patterns.add(re.compile(r"\d+x"), "digits")
+        patterns.add(re.compile(r"[xy]z", re.I), "fold")
+        self.assertEqual(patterns.find("12x"), ["digits"])
+        self.assertEqual(patterns.find("XZ"), ["fold"])
+        self.assertEqual(patterns.find("nothing"), [])
+
+    def test_chunks(self):
+        patterns: CombinedPatterns[int] = CombinedPatterns()
+        for i in range(100):
+            patterns.add(re.compile(rf"\b{i}x"), i)
+        # only the chunk with a match, but all of it
+        found = patterns.find("5x")
+        self.assertIn(5, found)
+        self.assertLess(len(found), 100)
+        self.assertEqual(patterns.find("x"), [])
+
+class RegexTestAutomaton(unittest.TestCase):
+    def _same(self, pattern: str, texts, flags: int = 0):
+        compiled = re.compile(pattern, flags)
+        linear = compile_linear(pattern, flags | LINEAR)
+        self.assertIsInstance(linear, LinearPattern)
+        for text in texts:
+            expected = compiled.search(text)
+            found = linear.search(text)
+            self.assertEqual(
+                expected and (expected.span(), expected.groups()),
+                found and (found.span(), found.groups()),
+                (pattern, text)
+            )
+
+    def test_same(self):
+        texts = ["", "a", "xabcx", "abab", "ABC", "a\nb\n", "word boundary", "12.5"]
+        self._same(r"a|b+c", texts)
+        self._same(r"(?:ab)*c?", texts)
+        self._same(r"[a-c]{2,3}", texts)
+        self._same(r"[^a-c\s]+", texts)
+        self._same(r"\bb\w*", texts)
+        self._same(r"\d+\.\d", texts)
+        self._same(r"b$", texts)
+        self._same(r"^b", texts, re.M)
+        self._same(r"a.b", texts, re.S)
+        self._same(r"abc", texts, re.I)
+        self._same(r"(?i)abc\Z", texts)
+        self._same(r"\Aa+?", texts)
+        self._same(r"(a|ab)(c|bcd)?", texts)
+        self._same(r"(\w+?)(b*)", texts)
+        # a repetition that matches nothing stops python's engine repeating
+        self._same(r"(a?|.)*", texts)
+        self._same(r"(?:(x*)|a){0,2}b", texts)
+        self._same(r"((a)*|b)+", texts)
+
+    def test_groups(self):
+        linear = compile_linear(r"(\w+)@(\w+)(x)?", LINEAR)
+        found = linear.search("to: jess@example")
+        self.assertEqual(found.groups(), ("jess", "example", None))
+        self.assertEqual(found.group(0, 2), ("jess@example", "example"))
+        self.assertEqual(found.span(3), (-1, -1))
+        self.assertRaises(IndexError, lambda: found.group(4))
+
+    def test_pathological(self):
+        linear = compile_linear(r"(a+)+b", 0)
+        # picked without asking, as it's nested repeats
+        self.assertIsInstance(linear, LinearPattern)
+        self.assertIsNone(linear.search("a" * 100 + "c"))
+        self.assertEqual(linear.search("a" * 100 + "b").span(), (0, 101))
+
+    def test_pathological_match(self):
+        # where a match ends is found without backtracking too. python's
+        # engine takes about a second to get past the first branch with 24
+        # a's, and twice as long for each one after that
+        linear = compile_linear(r"(a|a)*c|(a+)+b", 0)
+        self.assertIsInstance(linear, LinearPattern)
+        started = time.perf_counter()
+        found = linear.search("a" * 40 + "b")
+        self.assertLess(time.perf_counter() - started, 1)
+        self.assertEqual(found.span(), (0, 41))
+        self.assertEqual(found.groups(), (None, "a" * 40))
+
+    def test_automatic(self):
+        self.assertIsInstance(compile_linear(r"\d+x", 0), re.Pattern)
+        self.assertIsInstance(compile_linear(r"(a|ab)*c", 0), LinearPattern)
+        # only one way to match it
+        self.assertIsInstance(compile_linear(r"(a|b)*c", 0), re.Pattern)
+        # unsupported, so left to python's engine
+        self.assertIsInstance(compile_linear(r"(a+)+\1", 0), re.Pattern)
+
+    def test_unsupported(self):
+        for pattern in [r"(a)\1", r"(?=a)", r"(?P<n>a)", r"a++", r"\Ba"]:
+            self.assertRaises(re.error, lambda: compile_linear(pattern, LINEAR))
+
+    def test_pickle(self):
+        linear = pickle.loads(pickle.dumps(compile_linear(r"a+b", LINEAR)))
+        self.assertIsInstance(linear, LinearPattern)
+        self.assertEqual(linear.search("caab").span(), (1, 4))
+
+    def test_flag(self):
+        regex = ParseConstRegex.from_text("/a+b/l")
+        self.assertIsInstance(regex.compiled, LinearPattern)
+        # kept through folding
+        atoms, deps = parse(tokenise("a =~ /a/l + /b/"), {"a": ParseString()})
+        folded = atoms[0].precompile()
+        self.assertIsInstance(folded._right.eval({}), LinearPattern)
+        self.assertEqual(folded.eval({"a": ParseConstString(None, "xab")}), "ab")
+
+class RegexTestRedos(unittest.TestCase):
+    def test_safe(self):
+        for pattern in ["abc", r"hello.*world", r"[a-z]+[0-9]+", r"(a|b)*c",
+                r"(?:a|b?)+", r"(a+)++", r"(?=a+)b", r"\d{1,3}(\.\d{1,3}){3}"]:
+            self.assertEqual(classify(pattern), Risk.SAFE, pattern)
+
+    def test_polynomial(self):
+        for pattern in [r"\d+\d+", r".*.*=.*", r"\s*\s+$", r"(a+){3}"]:
+            self.assertEqual(classify(pattern), Risk.POLYNOMIAL, pattern)
+
+    def test_exponential(self):
+        for pattern in [r"(a+)+", r"(a|ab)*c", r"^(\w+\s?)*$", r"(\d+\.)+\d+",
+                r"(?P<n>a+)+", r"(a{1,3})+"]:
+            self.assertEqual(classify(pattern), Risk.EXPONENTIAL, pattern)
+
+    def test_fold(self):
+        self.assertEqual(classify(r"(a|A)+"), Risk.SAFE)
+        self.assertEqual(classify(r"(a|A)+", re.I), Risk.EXPONENTIAL)
+        self.assertEqual(classify(r"(?i)(a|A)+"), Risk.EXPONENTIAL)
+
+    def test_unanalysable(self):
+        self.assertEqual(classify(r"(?(1)a|b)"), Risk.EXPONENTIAL)
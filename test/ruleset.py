@@ -0,0 +1,215 @@
+import re, unittest
+from typing import Dict
+
+from scpl.eval import RuleSet
+from scpl.parser import (ParseAtom, ParseConstInteger, ParseConstIPv4, ParseConstString,
+    ParseInteger, ParseIPv4, ParseRegex, ParseString)
+
+TYPES = {
+    "channel": ParseString(),
+    "nick": ParseString(),
+    "count": ParseInteger(),
+    "pattern": ParseRegex(),
+}
+
+class _Counting:
+    # a pattern that counts how many times it's searched
+    def __init__(self, pattern: str):
+        self.compiled = re.compile(pattern)
+        self.calls = 0
+    def search(self, value: str):
+        self.calls += 1
+        return self.compiled.search(value)
+
+class _Value(ParseRegex):
+    def __init__(self, value: object):
+        self.value = value
+    def eval(self, vars: Dict[str, ParseAtom]) -> object:
+        return self.value
+
+def _vars(channel: str, nick: str, count: int) -> Dict[str, ParseAtom]:
+    return {
+        "channel": ParseConstString(None, channel),
+        "nick": ParseConstString(None, nick),
+        "count": ParseConstInteger(count),
+    }
+
+class RuleSetTestShare(unittest.TestCase):
+    def test_shared(self):
+        rules = RuleSet(TYPES)
+        first = rules.add("a", 'channel == "#x" && count > 1')
+        second = rules.add("b", 'channel == "#x" && nick == "y"')
+        self.assertIs(first._atoms[0], second._atoms[0])
+        self.assertIsNot(first._atoms[1], second._atoms[1])
+
+    def test_shared_operand(self):
+        rules = RuleSet(TYPES)
+        first = rules.add("a", "-count > 1")
+        second = rules.add("b", "-count > 2")
+        self.assertIs(first._left, second._left)
+        self.assertIs(first.operands()[0], second._left)
+        self.assertIs(first._left._atom, first._left.operands()[0])
+
+    def test_duplicate(self):
+        rules = RuleSet(TYPES)
+        first = rules.add("a", 'nick =~ /x/i')
+        second = rules.add("b", 'nick =~ /x/i')
+        self.assertIs(first, second)
+        self.assertEqual(rules.all(_vars("", "x", 0)), ["a", "b"])
+
+    def test_once(self):
+        rules = RuleSet(TYPES)
+        rules.add("a", 'nick =~ pattern && count > 1')
+        rules.add("b", 'nick =~ pattern && count > 2')
+        rules.add("c", 'count > 3 || nick =~ pattern')
+
+        pattern = _Counting("b.d")
+        vars = {**_vars("", "abcde", 5), "pattern": _Value(pattern)}
+        self.assertEqual(rules.all(vars), ["a", "b", "c"])
+        self.assertEqual(pattern.calls, 1)
+        self.assertEqual(rules.count(vars), 3)
+        self.assertEqual(pattern.calls, 2)
+
+class RuleSetTestModes(unittest.TestCase):
+    def setUp(self):
+        self.rules = RuleSet(TYPES)
+        self.rules.add("join", 'channel == "#x" && count > 5')
+        self.rules.add("nick", 'channel == "#x" && nick =~ /^bad/')
+        self.rules.add(3, 'count > 5')
+
+    def test_first(self):
+        self.assertEqual(self.rules.first(_vars("#x", "badnick", 0)), "nick")
+        self.assertEqual(self.rules.first(_vars("#x", "badnick", 6)), "join")
+        self.assertEqual(self.rules.first(_vars("#y", "nick", 0)), None)
+
+    def test_all(self):
+        self.assertEqual(self.rules.all(_vars("#x", "badnick", 6)), ["join", "nick", 3])
+        self.assertEqual(self.rules.all(_vars("#y", "badnick", 6)), [3])
+
+    def test_count(self):
+        self.assertEqual(self.rules.count(_vars("#x", "badnick", 6)), 3)
+        self.assertEqual(self.rules.count(_vars("#y", "nick", 0)), 0)
+
+    def test_add(self):
+        # compiled again after a rule is added
+        self.assertEqual(self.rules.count(_vars("#y", "nick", 0)), 0)
+        self.rules.add("any", "true")
+        self.assertEqual(self.rules.count(_vars("#y", "nick", 0)), 1)
+        self.assertEqual(len(self.rules), 4)
+
+    def test_error(self):
+        self.rules.add("zero", "1 / count > 0")
+        self.assertRaises(ZeroDivisionError,
+            lambda: self.rules.all(_vars("#y", "nick", 0)))
+
+class RuleSetTestIndex(unittest.TestCase):
+    def setUp(self):
+        self.rules = RuleSet(TYPES)
+        self.rules.add("x", 'channel == "#x" && count > 5')
+        self.rules.add("y", '"#y" == channel')
+        self.rules.add("set", 'count > 5 && nick in {"a", "b"}')
+        self.rules.add("none", 'count > 5 || channel == "#x"')
+
+    def test_candidates(self):
+        self.assertEqual(self.rules.candidates(_vars("#x", "c", 0)), [0, 3])
+        self.assertEqual(self.rules.candidates(_vars("#y", "a", 0)), [1, 2, 3])
+        self.assertEqual(self.rules.candidates(_vars("#z", "c", 0)), [3])
+
+    def test_match(self):
+        self.assertEqual(self.rules.all(_vars("#x", "a", 6)), ["x", "set", "none"])
+        self.assertEqual(self.rules.all(_vars("#y", "a", 0)), ["y"])
+        self.assertEqual(self.rules.first(_vars("#z", "b", 6)), "set")
+
+    def test_skipped(self):
+        # the guard isn't first, but the rule still isn't evaluated
+        rules = RuleSet(TYPES)
+        rules.add("a", 'nick =~ pattern && channel == "#y"')
+
+        pattern = _Counting("b")
+        vars = {**_vars("#x", "abc", 0), "pattern": _Value(pattern)}
+        self.assertEqual(rules.count(vars), 0)
+        self.assertEqual(pattern.calls, 0)
+
+    def test_missing(self):
+        # a guard on a variable that isn't given can't rule anything out
+        rules = RuleSet(TYPES)
+        rules.add("a", 'channel == "#x"')
+        self.assertEqual(rules.candidates({}), [0])
+        self.assertRaises(KeyError, lambda: rules.count({}))
+
+class RuleSetTestSubstringIndex(unittest.TestCase):
+    def setUp(self):
+        self.rules = RuleSet(TYPES)
+        self.rules.add("bad", '"bad" in nick')
+        self.rules.add("worse", 'count > 1 && "worse" in nick')
+        self.rules.add("channel", '"bad" in channel')
+
+    def test_candidates(self):
+        self.assertEqual(self.rules.candidates(_vars("#x", "badworse", 0)), [0, 1])
+        self.assertEqual(self.rules.candidates(_vars("#bad", "nice", 0)), [2])
+        self.assertEqual(self.rules.candidates(_vars("#x", "nice", 0)), [])
+
+    def test_match(self):
+        self.assertEqual(self.rules.all(_vars("#bad", "worse", 0)), ["channel"])
+        self.assertEqual(self.rules.all(_vars("#x", "is_worse", 2)), ["worse"])
+
+    def test_regex(self):
+        # on the literal every match has to contain
+        rules = RuleSet(TYPES)
+        rules.add("regex", "nick =~ /^ba+d[0-9]/")
+        rules.add("both", "count > 1 && nick =~ /^ba+d[0-9]/")
+        rules.add("fold", "nick =~ /BAD/i")
+        self.assertEqual(rules.candidates(_vars("#x", "nice", 0)), [])
+        self.assertEqual(rules.candidates(_vars("#x", "BAD", 0)), [2])
+        self.assertEqual(rules.all(_vars("#x", "baad1", 2)), ["regex", "both"])
+        self.assertEqual(rules.all(_vars("#x", "BAD", 2)), ["fold"])
+
+class RuleSetTestStringMatch(unittest.TestCase):
+    def test_members(self):
+        rules = RuleSet(TYPES)
+        rules.add("a", "nick =~ /^(jess|jesopo)$/")
+        rules.add("b", "nick =~ /^bad/")
+        self.assertEqual(rules.candidates(_vars("#x", "jess", 0)), [0])
+        self.assertEqual(rules.candidates(_vars("#x", "jess\n", 0)), [0])
+        self.assertEqual(rules.candidates(_vars("#x", "jessica", 0)), [])
+        self.assertEqual(rules.all(_vars("#x", "jesopo", 0)), ["a"])
+        self.assertEqual(rules.all(_vars("#x", "badly", 0)), ["b"])
+
+class RuleSetTestRegexIndex(unittest.TestCase):
+    def setUp(self):
+        self.rules = RuleSet(TYPES)
+        self.rules.add("digits", r"nick =~ /\d{3}/")
+        self.rules.add("fold", "count > 1 && nick =~ /[xy]z/i")
+        # can't be merged, so always a candidate
+        self.rules.add("backref", r"nick =~ /(\w)\1/")
+
+    def test_candidates(self):
+        self.assertEqual(self.rules.candidates(_vars("#x", "abc", 0)), [2])
+        # patterns with different flags aren't merged together
+        self.assertEqual(self.rules.candidates(_vars("#x", "a123", 0)), [0, 2])
+        self.assertEqual(self.rules.candidates(_vars("#x", "yZ", 0)), [1, 2])
+
+    def test_match(self):
+        self.assertEqual(self.rules.all(_vars("#x", "a123", 2)), ["digits"])
+        self.assertEqual(self.rules.all(_vars("#x", "XZ", 2)), ["fold"])
+        self.assertEqual(self.rules.all(_vars("#x", "aa", 2)), ["backref"])
+
+class RuleSetTestNetworkIndex(unittest.TestCase):
+    def setUp(self):
+        self.rules = RuleSet({"ip": ParseIPv4(), "count": ParseInteger()})
+        self.rules.add("wide", "ip in 10.0.0.0/8")
+        self.rules.add("narrow", "count > 1 && ip in 10.84.0.0/16")
+        self.rules.add("set", "ip in {10.84.1.0/24, 10.84.0.0/16, 192.168.0.0/16}")
+
+    def _vars(self, ip: str, count: int) -> Dict[str, ParseAtom]:
+        return {"ip": ParseConstIPv4.from_text(ip), "count": ParseConstInteger(count)}
+
+    def test_candidates(self):
+        self.assertEqual(self.rules.candidates(self._vars("10.84.1.1", 0)), [0, 1, 2])
+        self.assertEqual(self.rules.candidates(self._vars("10.1.1.1", 0)), [0])
+        self.assertEqual(self.rules.candidates(self._vars("192.168.1.1", 0)), [2])
+        self.assertEqual(self.rules.candidates(self._vars("11.1.1.1", 0)), [])
+
+    def test_match(self):
+        self.assertEqual(self.rules.all(self._vars("10.84.1.1", 0)), ["wide", "set"])
+        self.assertEqual(self.rules.count(self._vars("10.84.1.1", 2)), 3)
@@ -0,0 +1,93 @@
+import pickle, unittest
+
+from scpl.lexer import tokenise
+from scpl.parser import parse
+from scpl.parser import (ParseConstInteger, ParseConstRegex, ParseConstString,
+    ParseInteger, ParseRegex, ParseString)
+from scpl.eval import compile_program, Op
+from .codegen import VALUES, VARS
+
+class VMTestEval(unittest.TestCase):
+    def _compare(self, expression: str):
+        atoms, deps = parse(tokenise(expression), VARS)
+        program = compile_program(atoms[0])
+        self.assertEqual(program.eval(VALUES), atoms[0].eval(VALUES), expression)
+
+    def test_arithmetic(self):
+        self._compare("a + b * 2 - f")
+        self._compare("(a + 1) * (b - 1) % 5")
+        self._compare("a / b + f ** 2")
+        self._compare("-a ** 2")
+        self._compare("~a ^ b | a & 3 << 1 >> b * -1")
+
+    def test_bools(self):
+        self._compare("a && b && !s")
+        self._compare("a == 3 && b || a > 1")
+        self._compare("!t || (s && f)")
+        self._compare("a != b")
+
+    def test_strings(self):
+        self._compare('s + "x"')
+        self._compare('"ell" in s')
+        self._compare("s =~ /l+/")
+        self._compare("s =~ /el+o/")
+        self._compare("s =~ /EL+O/i")
+        self._compare("s =~ /xy+z/")
+        self._compare("s =~ /ell/ + s")
+        self._compare("s =~ /^he/ && s =~ /lo$/")
+        self._compare("s =~ /^(hi|hello)$/")
+        self._compare("s =~ /^(hi|hello)$/ && !(s =~ /^(x|y)\\Z/)")
+        self._compare("s =~ r + /o/i")
+        self._compare('s =~ r + "."')
+
+    def test_contains(self):
+        self._compare("ip in 10.84.0.0/16")
+        self._compare("ip in {10.84.1.1, 10.84.1.2}")
+        self._compare("a in {1, 2, b}")
+        self._compare("b in {1, 2, b}")
+        self._compare("b in {0 - 1, a}")
+        self._compare("ip in {10.0.0.0/8, 10.84.0.0/16}")
+        self._compare("ip in {192.168.0.0/16}")
+
+    def test_casemap(self):
+        vars = {
+            "a": ParseString(casemap=str.maketrans({"a": "b"})),
+            "r": ParseRegex()
+        }
+        atoms, deps = parse(tokenise("a =~ r + /a/i"), vars)
+        program = compile_program(atoms[0])
+        values = {
+            "a": ParseConstString(None, "xb"),
+            "r": ParseConstRegex(None, "x", {"i"})
+        }
+        self.assertEqual(program.eval(values), "xb")
+        self.assertEqual(program.eval(values), atoms[0].eval(values))
+
+class VMTestProgram(unittest.TestCase):
+    def test_constant(self):
+        atoms, deps = parse(tokenise("1 + 2 * 3"), {})
+        program = compile_program(atoms[0])
+        self.assertEqual(list(program.code), [Op.CONST, 0])
+        self.assertEqual(program.constants, [7])
+
+    def test_short_circuit(self):
+        atoms, deps = parse(tokenise("t || a"), VARS)
+        program = compile_program(atoms[0])
+        self.assertEqual(program.eval({"t": VALUES["t"]}), True)
+
+    def test_error(self):
+        atoms, deps = parse(tokenise("1 / 0"), {})
+        program = compile_program(atoms[0])
+        self.assertRaises(ZeroDivisionError, lambda: program.eval({}))
+
+    def test_pickle(self):
+        atoms, deps = parse(tokenise("s =~ /l+/i && a in {1, 2, 3}"), VARS)
+        program = pickle.loads(pickle.dumps(compile_program(atoms[0])))
+        self.assertEqual(program.eval(VALUES), True)
+
+    def test_deep(self):
+        # far deeper than the tree walker can recurse
+        vars = {"a": ParseInteger()}
+        atoms, deps = parse(tokenise(" + ".join(["a"] * 5000)), vars)
+        program = compile_program(atoms[0])
+        self.assertEqual(program.eval({"a": ParseConstInteger(1)}), 5000)